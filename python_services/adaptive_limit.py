@@ -0,0 +1,156 @@
+"""
+AIMD concurrency limiter for upstream LLM calls.
+
+The limit starts low and grows by one slot per "window" of successful calls
+(+1/limit per success) while the upstream keeps up. It is cut
+multiplicatively on overload: a 429, a 5xx or timeout, or smoothed latency
+drifting past `latency_tolerance` times the observed baseline. At most one
+cut happens per smoothed round trip, so a burst of 429s from one window
+counts once. It only grows while the limit is actually in use, so idle
+periods do not inflate it.
+
+Callers over the limit queue. The queue is bounded in depth (`max_queue`)
+and in time (`max_wait`). Past either bound, `LimiterRejected` is raised
+rather than piling more load onto an upstream that is already saturated.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+
+OK = "ok"
+OVERLOAD = "overload"
+IGNORE = "ignore"  # e.g. a 400: says nothing about upstream capacity
+
+
+class LimiterRejected(Exception):
+    """Raised instead of calling upstream; `reason` is "queue_full" or "timeout"."""
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        backoff: float = 0.7,
+        latency_tolerance: float = 2.0,
+        max_queue: int = 256,
+        max_wait: float = 20.0,
+        smoothing: float = 0.05,
+    ):
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.smoothing = smoothing
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: Deque[threading.Event] = deque()
+        self._latency: Optional[float] = None   # EWMA of recent call latency
+        self._baseline: Optional[float] = None  # slowly rising floor of that EWMA
+        self._last_decrease = 0.0
+        self._stats = {"acquired": 0, "queued": 0, "rejected": 0, "timed_out": 0, "increases": 0, "decreases": 0}
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """Take a slot, waiting up to `timeout` (default `max_wait`) seconds. Returns the time waited."""
+        started = time.monotonic()
+        with self._lock:
+            # No barging past queued callers: freed slots are handed to waiters in FIFO order.
+            if not self._waiters and self._in_flight < int(self._limit):
+                self._in_flight += 1
+                self._stats["acquired"] += 1
+                return 0.0
+            if len(self._waiters) >= self.max_queue:
+                self._stats["rejected"] += 1
+                raise LimiterRejected(f"LLM queue full ({len(self._waiters)} waiting, limit {int(self._limit)})", "queue_full")
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+            self._stats["queued"] += 1
+        if not waiter.wait(self.max_wait if timeout is None else timeout):
+            with self._lock:
+                if not waiter.is_set():
+                    self._waiters.remove(waiter)
+                    self._stats["timed_out"] += 1
+                    raise LimiterRejected(
+                        f"Waited {time.monotonic() - started:.1f}s for an LLM slot (limit {int(self._limit)})", "timeout"
+                    )
+        # The releasing caller already counted this slot as in flight.
+        return time.monotonic() - started
+
+    def release(self, outcome: str = OK, latency: Optional[float] = None) -> None:
+        """Give the slot back and adapt the limit; `latency` (seconds) is optional."""
+        with self._lock:
+            saturated = self._in_flight >= int(self._limit)
+            self._in_flight -= 1
+            now = time.monotonic()
+            if latency is not None and outcome == OK:
+                self._observe_latency(latency)
+                if self._baseline and self._latency > self._baseline * self.latency_tolerance:
+                    outcome = OVERLOAD
+            if outcome == OVERLOAD:
+                # One cut per smoothed round trip: the calls of one window fail together.
+                if now - self._last_decrease >= (self._latency or 1.0):
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+                    self._last_decrease = now
+                    self._stats["decreases"] += 1
+            elif outcome == OK and saturated and self._limit < self.max_limit:
+                previous = int(self._limit)
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+                if int(self._limit) > previous:
+                    self._stats["increases"] += 1
+            while self._waiters and self._in_flight < int(self._limit):
+                self._in_flight += 1
+                self._stats["acquired"] += 1
+                self._waiters.popleft().set()
+
+    def _observe_latency(self, latency: float) -> None:
+        if self._latency is None:
+            self._latency = self._baseline = latency
+            return
+        self._latency += self.smoothing * (latency - self._latency)
+        if self._latency < self._baseline:
+            self._baseline = self._latency
+        else:
+            # Drift up slowly so a permanently slower upstream becomes the new normal.
+            self._baseline += 0.01 * (self._latency - self._baseline)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "latency_seconds": round(self._latency, 4) if self._latency is not None else None,
+                "baseline_seconds": round(self._baseline, 4) if self._baseline is not None else None,
+            }
+
+
+def limiter_from_env(**overrides) -> AdaptiveLimiter:
+    settings = dict(
+        initial_limit=int(os.getenv("LLM_LIMIT_INITIAL", "4")),
+        min_limit=int(os.getenv("LLM_LIMIT_MIN", "1")),
+        max_limit=int(os.getenv("LLM_LIMIT_MAX", "32")),
+        backoff=float(os.getenv("LLM_LIMIT_BACKOFF", "0.7")),
+        latency_tolerance=float(os.getenv("LLM_LIMIT_LATENCY_TOLERANCE", "2.0")),
+        max_queue=int(os.getenv("LLM_LIMIT_MAX_QUEUE", "256")),
+        max_wait=float(os.getenv("LLM_LIMIT_MAX_WAIT", "20")),
+    )
+    settings.update(overrides)
+    return AdaptiveLimiter(**settings)
@@ -0,0 +1,208 @@
+"""
+Micro-benchmarks for the intelligence service. Run from python_services/:
+
+  python benchmarks.py lint --count 20000
+  python benchmarks.py serialize
+  python benchmarks.py hedge --calls 600
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+SAMPLE_COPY = [
+    "🚀 {{FIRST_NAME}}, BANK MAHAPACK 77% OFF ends tonight! 👉 Enroll: https://adda.link/bmp {{9667589247}}",
+    "SSC CGL Tier-1 answer key out. Check your score and plan Tier-2 prep now.",
+    "🔥🔥🔥 Lottery style mega offer!!! free job guaranteed 🎉🎉",
+    "दिवाली धमाका 🪔 सभी कोर्स पर 60% छूट 👉 अभी जुड़ें {{9667589247}}",
+    "⚡️ Last 3 hours ⚡️ Railway NTPC batch at ₹499 👨‍🏫 live classes 👉 {{DEEPLINK}}",
+]
+
+
+def _sample_texts(count: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [rng.choice(SAMPLE_COPY) + " " * rng.randint(0, 3) for _ in range(count)]
+
+
+def _timed(label: str, count: int, fn: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {elapsed * 1000:9.1f} ms   {count / elapsed:>12,.0f} msgs/s")
+    return elapsed
+
+
+def bench_lint(count: int, workers: int, chunk_size: int, banned: int) -> None:
+    from lint_engine import DEFAULT_BANNED_WORDS, DEFAULT_RULES, lint_many, lint_parallel
+
+    texts = _sample_texts(count)
+    rules = dict(DEFAULT_RULES)
+    if banned:
+        rules["banned_words"] = DEFAULT_BANNED_WORDS + [f"blocked phrase {index}" for index in range(banned)]
+    print(f"lint: {count} messages, {len(rules['banned_words'])} banned phrases")
+
+    try:
+        from marcom_service import LintRequest, lint_message
+    except ImportError as exc:
+        print(f"  (skipping /lint loop baseline: {exc})")
+    else:
+        _timed("loop over lint_message", count, lambda: [lint_message(LintRequest(text=text, banned_words=rules["banned_words"])) for text in texts])
+
+    _timed("lint_many (single process)", count, lambda: lint_many(texts, rules))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        lint_parallel(pool, texts[:workers], rules, 1)  # warm the workers
+        _timed(f"lint_parallel ({workers} workers)", count, lambda: lint_parallel(pool, texts, rules, chunk_size))
+
+
+def _per_call_us(fn: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def _serialization_payloads() -> List[Tuple[str, object]]:
+    from datetime import date, timedelta
+
+    from events_calendar import default_calendar
+    from lint_engine import DEFAULT_RULES, lint_many
+    from marcom_service import _curated_trends
+
+    hindi = "दिवाली धमाका 🪔 सभी कोर्स पर 60% छूट, आज ही जुड़ें और अपनी तैयारी को नई उड़ान दें"
+    components = [
+        {
+            "category": f"Component {index}",
+            "emoji": "🔥",
+            "hook": hindi[:40],
+            "body": [hindi, hindi[::-1], "👉 अभी जुड़ें {{DEEPLINK}} {{9667589247}}"],
+            "cta": "अभी जुड़ें",
+        }
+        for index in range(8)
+    ]
+    campaign = {
+        "message": "\n\n".join(c["hook"] + "\n" + "\n".join(c["body"]) for c in components),
+        "components": components,
+        "notes": f"Festive push. [Image Prompt: {hindi}]",
+        "model": "gemini-1.5-flash",
+        "tokens": {"total_tokens": 0},
+    }
+    today = date(2025, 11, 20)
+    events = {
+        "events": [event.to_dict(today) for event in default_calendar().query(today, today + timedelta(days=90))],
+        "updated_at": "2025-11-20T00:00:00",
+    }
+    trends = {"updated_at": "2025-11-20T00:00:00", "items": [item.dict() for item in _curated_trends()] * 5}
+    lint = {"results": lint_many(_sample_texts(5000), DEFAULT_RULES), "count": 5000}
+    moengage = {
+        "count": 1000,
+        "rows": [[f"SSC-20251120-0900-{i}", "SSC", "fomo", "all", ["ssc", "fomo"], "high", hindi, "Join", None, None, "2025-11-20T10:00:00"] for i in range(1000)],
+    }
+    history = {"timestamp": "2025-11-20T09:00:00", "request": {"vertical": "SSC", "language": "Hindi"}, "response_raw": campaign["message"], "components": components}
+    return [
+        ("/generate-campaign-ai", campaign),
+        ("/edtech-events", events),
+        ("/trend-insights", trends),
+        ("/lint/batch (5000)", lint),
+        ("/moengage/payload/batch (1000)", moengage),
+        ("history log line", history),
+    ]
+
+
+def bench_serialize(repeat: int) -> None:
+    from fastapi.responses import JSONResponse
+
+    from json_codec import JSON_BACKEND, dumps
+    from marcom_service import FastJSONResponse
+
+    print(f"serialize: median per call, stock json vs {JSON_BACKEND}")
+    for name, content in _serialization_payloads():
+        if name.endswith("log line"):
+            before = _per_call_us(lambda: json.dumps(content, ensure_ascii=False).encode("utf-8"), repeat)
+            after = _per_call_us(lambda: dumps(content), repeat)
+        else:
+            before = _per_call_us(lambda: JSONResponse(content), repeat)
+            after = _per_call_us(lambda: FastJSONResponse(content), repeat)
+        print(f"  {name:<34} {before:10.1f} us -> {after:10.1f} us   x{before / after:5.1f}")
+
+
+def bench_hedge(calls: int, concurrency: int, median_ms: float, error_rate: float) -> None:
+    from llm_providers import LatencyModel, ResilientProvider, StubProvider
+    from resilience import ResiliencePolicy
+
+    print(f"hedge: {calls} stub calls, {concurrency} at a time, heavy-tail latency (median {median_ms:g} ms), errors {error_rate:.0%}")
+    for label, hedge in (("retries only", False), ("retries + hedging", True)):
+        stub = StubProvider(
+            latency=LatencyModel(kind="heavy_tail", median_ms=median_ms, sigma=0.3, tail_probability=0.03, tail_multiplier=15),
+            error_rate=error_rate,
+            seed=1,
+        )
+        policy = ResiliencePolicy(hedge=hedge, base_delay=median_ms / 1000, hedge_min_delay=median_ms / 2000)
+        provider = ResilientProvider(stub, policy)
+        latencies: List[float] = []
+        failures = 0
+
+        def one(index: int) -> None:
+            nonlocal failures
+            start = time.perf_counter()
+            try:
+                provider.generate(f"prompt {index}")
+            except Exception:
+                failures += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(calls)))
+        provider.close()
+        latencies.sort()
+
+        def pct(q: float) -> float:
+            return latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000
+
+        stats = provider.stats()
+        upstream = calls + stats["retries"] + stats["hedges"]
+        print(
+            f"  {label:<20} p50 {pct(0.5):7.1f} ms  p95 {pct(0.95):7.1f} ms  p99 {pct(0.99):7.1f} ms  "
+            f"failed {failures:3d}  upstream calls x{upstream / calls:.2f} "
+            f"(retries {stats['retries']}, hedges {stats['hedges']}, hedge wins {stats['hedge_wins']})"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    lint = sub.add_parser("lint", help="/lint loop vs batch linting")
+    lint.add_argument("--count", type=int, default=20000)
+    lint.add_argument("--workers", type=int, default=4)
+    lint.add_argument("--chunk-size", type=int, default=2000)
+    lint.add_argument("--banned", type=int, default=0, help="extra synthetic banned phrases")
+
+    serialize = sub.add_parser("serialize", help="response/log JSON encoding, stock json vs json_codec")
+    serialize.add_argument("--repeat", type=int, default=200)
+
+    hedge = sub.add_parser("hedge", help="LLM tail latency with and without hedged requests (stub provider)")
+    hedge.add_argument("--calls", type=int, default=600)
+    hedge.add_argument("--concurrency", type=int, default=8)
+    hedge.add_argument("--median-ms", type=float, default=20.0)
+    hedge.add_argument("--error-rate", type=float, default=0.0)
+
+    args = parser.parse_args()
+    if args.command == "lint":
+        bench_lint(args.count, args.workers, args.chunk_size, args.banned)
+    elif args.command == "serialize":
+        bench_serialize(args.repeat)
+    elif args.command == "hedge":
+        bench_hedge(args.calls, args.concurrency, args.median_ms, args.error_rate)
+
+
+if __name__ == "__main__":
+    main()
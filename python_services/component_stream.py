@@ -0,0 +1,76 @@
+"""
+Incremental extraction of `components` entries from a streamed JSON reply.
+
+The model streams a single JSON document shaped like
+{"components": [{...}, {...}], "image_prompt": "...", "notes": "..."}.
+ComponentStreamParser is fed raw text chunks as they arrive and hands back
+each component object as soon as its closing brace has been seen, without
+re-scanning text it has already consumed.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import List
+
+_COMPONENTS_KEY = re.compile(r'"components"\s*:\s*\[')
+
+
+class ComponentStreamParser:
+    def __init__(self) -> None:
+        self.buffer = ""
+        self._pos = 0              # next unscanned index in buffer
+        self._in_array = False     # inside the components array
+        self._done = False         # components array closed
+        self._depth = 0            # brace/bracket depth relative to the array
+        self._in_string = False
+        self._escaped = False
+        self._obj_start = -1
+
+    def feed(self, chunk: str) -> List[dict]:
+        """Append a chunk; return components completed by it."""
+        self.buffer += chunk
+        if self._done:
+            return []
+        if not self._in_array:
+            match = _COMPONENTS_KEY.search(self.buffer)
+            if not match:
+                return []
+            self._in_array = True
+            self._pos = match.end()
+
+        completed: List[dict] = []
+        buf = self.buffer
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0 and ch == "{":
+                    self._obj_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # The components array itself closed.
+                    self._done = True
+                    i += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and ch == "}" and self._obj_start >= 0:
+                    try:
+                        completed.append(json.loads(buf[self._obj_start:i + 1]))
+                    except ValueError:
+                        pass
+                    self._obj_start = -1
+            i += 1
+        self._pos = i
+        return completed
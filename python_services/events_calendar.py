@@ -0,0 +1,264 @@
+"""
+Date-indexed EdTech event calendar behind /edtech-events.
+
+Events are built once into a list sorted by date with a parallel list of
+date ordinals, so a date range is two bisects. Secondary indexes map each
+canonical vertical (see knowledge_base.canonical_vertical) and each category
+to the sorted positions of their events; events tagged ALL match every
+vertical. Descriptions, emojis and relevance notes are computed at build
+time, and only `days_until` depends on the day a query runs.
+
+The automation pipeline builds an EventCalendar over its own event list and
+queries it the same way.
+"""
+
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from knowledge_base import canonical_vertical
+
+ALL_VERTICALS = "ALL"
+
+
+@dataclass(frozen=True)
+class CalendarEvent:
+    title: str
+    date: date
+    category: str
+    emoji: str = "📅"
+    description: str = ""
+    relevance: str = ""
+    suggested_tonality: Tuple[str, ...] = ()
+    verticals: Tuple[str, ...] = ()
+    tags: Tuple[str, ...] = ()
+
+    def days_until(self, today: date) -> int:
+        return (self.date - today).days
+
+    def to_dict(self, today: date) -> dict:
+        """Shaped like the service's EdTechEvent."""
+        return {
+            "title": self.title,
+            "date": self.date.isoformat(),
+            "category": self.category,
+            "emoji": self.emoji,
+            "description": self.description,
+            "relevance": self.relevance,
+            "suggested_tonality": list(self.suggested_tonality),
+            "verticals": list(self.verticals),
+            "days_until": self.days_until(today),
+        }
+
+
+class EventCalendar:
+    def __init__(self, events: Iterable[CalendarEvent]):
+        # Stable sort: same-day events keep their source order.
+        self.events: List[CalendarEvent] = sorted(events, key=lambda event: event.date)
+        self._ordinals = [event.date.toordinal() for event in self.events]
+        self._by_vertical: Dict[str, List[int]] = {}
+        self._by_category: Dict[str, List[int]] = {}
+        for position, event in enumerate(self.events):
+            for vertical in {canonical_vertical(name) for name in event.verticals}:
+                self._by_vertical.setdefault(vertical, []).append(position)
+            self._by_category.setdefault(event.category, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def verticals(self) -> List[str]:
+        return sorted(self._by_vertical)
+
+    def categories(self) -> List[str]:
+        return sorted(self._by_category)
+
+    def _span(self, start: date, end: date) -> Tuple[int, int]:
+        return bisect_left(self._ordinals, start.toordinal()), bisect_right(self._ordinals, end.toordinal())
+
+    @staticmethod
+    def _within(positions: Sequence[int], lo: int, hi: int) -> Sequence[int]:
+        return positions[bisect_left(positions, lo):bisect_left(positions, hi)]
+
+    def _candidates(self, lo: int, hi: int, vertical: Optional[str], category: Optional[str]) -> Iterator[int]:
+        if vertical:
+            canonical = canonical_vertical(vertical)
+            lists = [self._within(self._by_vertical.get(canonical, []), lo, hi)]
+            if canonical != ALL_VERTICALS:
+                lists.append(self._within(self._by_vertical.get(ALL_VERTICALS, []), lo, hi))
+            previous = -1
+            for position in heapq.merge(*lists):
+                if position != previous:
+                    yield position
+                previous = position
+        elif category:
+            yield from self._within(self._by_category.get(category, []), lo, hi)
+        else:
+            yield from range(lo, hi)
+
+    def query(
+        self,
+        start: date,
+        end: date,
+        vertical: Optional[str] = None,
+        category: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[CalendarEvent]:
+        """Events dated start..end (inclusive), soonest first."""
+        if end < start:
+            return []
+        lo, hi = self._span(start, end)
+        results: List[CalendarEvent] = []
+        for position in self._candidates(lo, hi, vertical, category):
+            event = self.events[position]
+            if category and event.category != category:
+                continue
+            results.append(event)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+
+# --- Default EdTech calendar (key competitive exams, festivals, seasonal windows) ---
+
+EXAM_DATES = [
+    ("SSC CGL Tier-2 Results", "2025-12-15", ["SSC", "GOVT JOBS"], ["fomo", "serious"]),
+    ("UPSC Prelims 2026 Notification", "2026-01-10", ["UPSC"], ["fomo", "motivational"]),
+    ("Banking PO Prelims", "2026-01-20", ["BANKING"], ["fomo", "premium"]),
+    ("SSC CHSL Answer Key Release", "2025-12-20", ["SSC"], ["fomo", "friendly"]),
+    ("Railway NTPC Result Declaration", "2026-01-05", ["RAILWAYS"], ["fomo", "friendly"]),
+    ("CTET January 2026 Registration", "2025-12-10", ["CTET", "Teaching"], ["serious", "friendly"]),
+    ("CUET UG 2026 Application Start", "2026-02-01", ["CUET UG", "K12 & CUET UG"], ["fomo", "celebratory"]),
+    ("UPSC Mains 2025 Results", "2025-12-28", ["UPSC"], ["fomo", "serious"]),
+    ("SSC CGL 2026 Notification", "2026-01-15", ["SSC"], ["fomo", "friendly"]),
+    ("Defence NDA-1 2026 Admit Card", "2026-01-25", ["DEFENCE"], ["motivational", "premium"]),
+    ("UGC NET December 2025 Results", "2025-12-18", ["UGC_NET"], ["serious", "premium"]),
+    ("Banking IBPS PO Interview Dates", "2026-01-12", ["BANKING"], ["fomo", "premium"]),
+    ("SSC MTS 2026 Notification Expected", "2026-02-05", ["SSC"], ["fomo", "friendly"]),
+    ("UPSC CSE 2026 Calendar Release", "2026-01-08", ["UPSC"], ["motivational", "serious"]),
+    ("Railway Group D Result", "2025-12-22", ["RAILWAYS"], ["fomo", "friendly"]),
+]
+
+FESTIVALS = [
+    ("Republic Day", "2026-01-26", ["celebratory", "friendly"], ["SSC", "UPSC", "BANKING", "RAILWAYS"]),
+    ("Dayanand Anniversary", "2026-02-12", ["celebratory", "motivational"], ["Teaching", "CTET", "UGC_NET", "ALL"]),
+    ("Holi", "2026-03-14", ["celebratory", "friendly"], ["ALL"]),
+    ("Ram Navami", "2026-04-07", ["celebratory", "motivational"], ["ALL"]),
+    ("Eid al-Fitr", "2026-03-31", ["celebratory", "friendly"], ["ALL"]),
+    ("Guru Purnima", "2026-07-10", ["celebratory", "motivational"], ["Teaching", "CTET", "UGC_NET"]),
+    ("Independence Day", "2026-08-15", ["celebratory", "motivational"], ["DEFENCE", "UPSC", "ALL"]),
+    ("Teachers Day", "2026-09-05", ["celebratory", "friendly"], ["Teaching", "CTET", "UGC_NET"]),
+    ("Dussehra", "2026-10-02", ["celebratory", "motivational"], ["ALL"]),
+    ("Diwali", "2026-10-20", ["celebratory", "premium"], ["ALL"]),
+    ("Children's Day", "2026-11-14", ["celebratory", "friendly"], ["K12 & CUET UG", "Teaching", "CTET", "ALL"]),
+    ("Christmas", "2025-12-25", ["celebratory", "friendly"], ["ALL"]),
+    ("New Year 2026 Prep", "2025-12-31", ["motivational", "fomo"], ["ALL"]),
+]
+
+SEASONAL = [
+    ("New Year Resolution Push", "2025-01-01", ["motivational", "fomo"], ["ALL"]),
+    ("Summer Prep Season", "2025-03-01", ["fomo", "friendly"], ["ALL"]),
+    ("Monsoon Study Boost", "2025-06-15", ["motivational", "serious"], ["ALL"]),
+    ("Year-End Sale Prep", "2025-11-15", ["fomo", "premium"], ["ALL"]),
+]
+
+# Emoji mapping for specific events
+EVENT_EMOJIS = {
+    "Children's Day": "🎈",
+    "Christmas": "🎄",
+    "Dayanand Anniversary": "📚",
+    "Teachers Day": "👨‍🏫",
+    "Republic Day": "🇮🇳",
+    "Independence Day": "🇮🇳",
+}
+
+# Custom relevance descriptions for specific events
+EVENT_RELEVANCE = {
+    "Children's Day": "Perfect for K12 campaigns! Parents actively seek educational gifts and courses for their children. Use child-friendly language and family-focused offers.",
+    "Christmas": "Year-end festive season drives gift purchases and course enrollments. Combine celebration messaging with special offers and New Year prep themes.",
+    "Dayanand Anniversary": "Honor the founder of Arya Samaj and education reformer. Ideal for teaching verticals - emphasize values, knowledge, and educational excellence.",
+    "Teachers Day": "High engagement for teaching courses and educator training. Parents and students show appreciation - perfect for CTET, UGC NET, and teaching verticals.",
+}
+
+
+def _exam_event(title: str, date_str: str, verticals: List[str], tonalities: List[str]) -> CalendarEvent:
+    # Determine emoji based on event type
+    emoji = "📢" if "Notification" in title or "Registration" in title else \
+            "📊" if "Results" in title or "Answer Key" in title else \
+            "🎫" if "Admit Card" in title else \
+            "📅" if "Calendar" in title or "Dates" in title else "📝"
+
+    # Create specific descriptions
+    if "Results" in title or "Answer Key" in title:
+        description = f"{title} - Students anxiously waiting. High engagement opportunity."
+        relevance = f"Peak engagement period! Students checking results multiple times. Perfect for result analysis courses, next exam prep, and congratulatory campaigns."
+    elif "Notification" in title or "Registration" in title:
+        description = f"{title} - Application window opening. Create urgency campaigns."
+        relevance = f"Application rush period! Target aspirants with form filling guides, eligibility checkers, and early bird course offers."
+    elif "Admit Card" in title:
+        description = f"{title} - Exam approaching. Last-minute prep campaigns."
+        relevance = f"Final preparation phase! Promote quick revision courses, mock tests, and exam day tips."
+    else:
+        description = f"{title} - Important exam update for aspirants."
+        relevance = f"Key milestone for {', '.join(verticals[:2])} aspirants. Ideal timing for targeted campaigns."
+
+    return CalendarEvent(
+        title=title,
+        date=date.fromisoformat(date_str),
+        category="exam",
+        emoji=emoji,
+        description=description,
+        relevance=relevance,
+        suggested_tonality=tuple(tonalities),
+        verticals=tuple(verticals),
+    )
+
+
+def _festival_event(title: str, date_str: str, tonalities: List[str], verticals: List[str]) -> CalendarEvent:
+    # Use specific emoji if available, otherwise default logic
+    emoji = EVENT_EMOJIS.get(title, "🎉" if "Day" in title else "🪔")
+    category = "national_day" if "Day" in title or "Anniversary" in title else "festival"
+    relevance = EVENT_RELEVANCE.get(
+        title,
+        f"Festive buying behavior + emotional connection. Use celebration-themed offers and motivational messaging."
+    )
+    return CalendarEvent(
+        title=title,
+        date=date.fromisoformat(date_str),
+        category=category,
+        emoji=emoji,
+        description=f"{title} celebration. Great opportunity for themed campaigns.",
+        relevance=relevance,
+        suggested_tonality=tuple(tonalities),
+        verticals=tuple(verticals),
+    )
+
+
+def _seasonal_event(title: str, date_str: str, tonalities: List[str], verticals: List[str]) -> CalendarEvent:
+    return CalendarEvent(
+        title=title,
+        date=date.fromisoformat(date_str),
+        category="seasonal",
+        emoji="📅",
+        description=f"{title} - strategic campaign window.",
+        relevance=f"Seasonal behavior patterns. Align messaging with user mindset during this period.",
+        suggested_tonality=tuple(tonalities),
+        verticals=tuple(verticals),
+    )
+
+
+def default_events() -> List[CalendarEvent]:
+    return (
+        [_exam_event(*row) for row in EXAM_DATES]
+        + [_festival_event(*row) for row in FESTIVALS]
+        + [_seasonal_event(*row) for row in SEASONAL]
+    )
+
+
+@lru_cache(maxsize=1)
+def default_calendar() -> EventCalendar:
+    return EventCalendar(default_events())
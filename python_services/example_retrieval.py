@@ -0,0 +1,113 @@
+"""
+BM25 retrieval of few-shot examples from the campaign knowledge base.
+
+Each canonical vertical's example pool gets its own inverted index over the
+title, message and CTA of every entry. Tokenization keeps Indic combining
+marks attached to their base letters, so Devanagari/Bengali/Tamil/... words
+stay whole instead of being split at every matra.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Latin/digits plus the Devanagari..Malayalam blocks (letters *and* vowel signs),
+# minus the danda punctuation.
+_TOKEN = re.compile(r"(?:[^\W_]|[\u0900-\u0963\u0966-\u0D7F])+")
+_STRIP = str.maketrans("", "", "\u200c\u200d")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be br by for from get has have in is it its now of on or our the this to with you your
+    ka ki ke ko hai hain se me mein par aur ab bhi na
+    """.split()
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    if not text:
+        return []
+    text = unicodedata.normalize("NFC", text).translate(_STRIP).lower()
+    return [tok for tok in _TOKEN.findall(text) if len(tok) > 1 and tok not in STOPWORDS]
+
+
+def example_text(example: dict) -> str:
+    return " ".join(
+        str(example.get(key) or "")
+        for key in ("title", "hook", "message", "body", "cta")
+    )
+
+
+class Bm25Index:
+    """Inverted index with precomputed IDF; scoring touches only the query's postings."""
+
+    def __init__(self, docs: Sequence[dict]):
+        self.docs = list(docs)
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths: List[int] = []
+        for doc_id, doc in enumerate(self.docs):
+            tokens = tokenize(example_text(doc))
+            lengths.append(len(tokens))
+            counts: Dict[str, int] = {}
+            for tok in tokens:
+                counts[tok] = counts.get(tok, 0) + 1
+            for tok, tf in counts.items():
+                self.postings.setdefault(tok, []).append((doc_id, tf))
+
+        n = len(self.docs)
+        avg_len = (sum(lengths) / n) if n else 0.0
+        # Per-doc length normalisation folded into one factor at build time.
+        self._norm = [
+            BM25_K1 * (1 - BM25_B + BM25_B * (length / avg_len if avg_len else 0.0))
+            for length in lengths
+        ]
+        self.idf = {
+            tok: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for tok, plist in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def search(self, query_tokens: Iterable[str], limit: int) -> List[Tuple[float, int]]:
+        """(score, doc_id) pairs for the best `limit` matching docs, best first."""
+        weights: Dict[str, int] = {}
+        for tok in query_tokens:
+            if tok in self.postings:
+                weights[tok] = weights.get(tok, 0) + 1
+        if not weights or limit <= 0:
+            return []
+
+        scores: Dict[int, float] = {}
+        norm = self._norm
+        for tok, qtf in weights.items():
+            idf = self.idf[tok] * qtf
+            for doc_id, tf in self.postings[tok]:
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * (tf * (BM25_K1 + 1)) / (tf + norm[doc_id])
+        return heapq.nlargest(limit, ((score, doc_id) for doc_id, score in scores.items()))
+
+    def top_examples(self, query_tokens: Sequence[str], k: int, offset: int = 0) -> List[dict]:
+        """Top-k docs; `offset` pages further down the ranking (wrapping) so variations differ."""
+        if k <= 0:
+            return []
+        ranked = self.search(query_tokens, k * (offset + 1))
+        if not ranked:
+            return []
+        start = (offset * k) % len(ranked) if offset else 0
+        window = ranked[start:start + k]
+        if len(window) < k:
+            window += ranked[: k - len(window)]
+        seen = set()
+        picked = []
+        for _, doc_id in window:
+            if doc_id not in seen:
+                seen.add(doc_id)
+                picked.append(self.docs[doc_id])
+        return picked
@@ -0,0 +1,14 @@
+"""
+gunicorn settings: preload the app's read-only state once in the master.
+
+    gunicorn marcom_service:app -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker -w 4 --bind 0.0.0.0:8787
+"""
+
+preload_app = True
+
+
+def on_starting(server):
+    # Runs in the master after the app was imported and before any worker is forked.
+    import marcom_service
+
+    marcom_service.preload(freeze_gc=True)
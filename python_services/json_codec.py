@@ -0,0 +1,48 @@
+"""
+One JSON encoder for response bodies, SSE frames, caches and JSONL logs.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Both paths emit compact UTF-8 without ASCII-escaping, so Hindi
+and other Indic copy goes out as-is instead of as \\uXXXX runs. Anything
+orjson refuses (e.g. integers beyond 64 bits) is retried with `json`.
+Web-framework free, so the log sink and caches can use it anywhere; the
+service's response class lives in marcom_service.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; see requirements.txt
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass
+    return _stdlib_dumps(content)
+
+
+def dumps_str(content: Any) -> str:
+    return dumps(content).decode("utf-8")
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
@@ -0,0 +1,249 @@
+"""
+Resident, hot-reloading index over campaign_knowledge_base.json.
+
+The knowledge base is parsed once at startup and kept in memory keyed by
+vertical. A daemon thread polls the file's mtime/size and, when they change,
+re-reads it off the request path; the new snapshot is only swapped in if the
+content hash actually differs. Readers always see a complete snapshot.
+
+Raw knowledge-base keys are inconsistent ("Banking", "Bank", "BANK",
+"Banking3", "Railway", "Rail", ...). Each snapshot folds them into canonical
+verticals named like the frontend's VERTICALS list, with one merged,
+de-duplicated example pool per canonical vertical and an alias table, built
+with the snapshot, that resolves any known spelling in a single dict lookup.
+Examples stored under an empty key belong to no vertical and get no pool, so
+"General" requests (like unknown verticals) get no KB examples. Each pool
+also carries a prebuilt BM25 index (see example_retrieval) for few-shot
+selection. Snapshots are never modified after they are built.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from example_retrieval import Bm25Index
+
+GENERAL_VERTICAL = "GENERAL"
+
+# Spellings that don't normalize onto the canonical name on their own.
+VERTICAL_SYNONYMS: Dict[str, str] = {
+    "BANK": "BANKING",
+    "बैंकिंग": "BANKING",
+    "RAIL": "RAILWAYS",
+    "RAILWAY": "RAILWAYS",
+    "रेलवे": "RAILWAYS",
+    "AGRI": "AGRICULTURE",
+    "TEACHING": "CTET",
+    "REGULATORY": "REGULATORY_BODIES",
+    "एस.एस.सी": "SSC",
+    "एसएससी": "SSC",
+    "यूपीएससी": "UPSC",
+}
+
+_SEPARATORS = re.compile(r"[\s.\-/&,]+")
+_SHEET_SUFFIX = re.compile(r"_?\d+$")
+
+
+def normalize_vertical(name: str) -> str:
+    """'Banking3' -> 'BANKING', 'Engineering 2' -> 'ENGINEERING', 'K12 & CUET UG' -> 'K12_CUET_UG'."""
+    key = _SEPARATORS.sub("_", (name or "").strip()).strip("_").upper()
+    stripped = _SHEET_SUFFIX.sub("", key)
+    if len(stripped) >= 3:
+        key = stripped
+    return key
+
+
+_NORMALIZED_SYNONYMS = {normalize_vertical(alias): canonical for alias, canonical in VERTICAL_SYNONYMS.items()}
+
+
+def canonical_vertical(name: str) -> str:
+    key = normalize_vertical(name)
+    if not key or key == GENERAL_VERTICAL:
+        return GENERAL_VERTICAL
+    return _NORMALIZED_SYNONYMS.get(key, key)
+
+
+@dataclass(frozen=True)
+class KnowledgeBaseSnapshot:
+    by_vertical: Dict[str, List[dict]] = field(default_factory=dict)
+    pools: Dict[str, List[dict]] = field(default_factory=dict)
+    aliases: Dict[str, str] = field(default_factory=dict)
+    sources: Dict[str, List[str]] = field(default_factory=dict)
+    retrievers: Dict[str, Bm25Index] = field(default_factory=dict)
+    digest: str = ""
+    mtime_ns: int = 0
+    size: int = 0
+    loaded_at: float = 0.0
+
+    @property
+    def example_count(self) -> int:
+        return sum(len(v) for v in self.by_vertical.values())
+
+    def resolve(self, vertical: str) -> Optional[str]:
+        """Map any vertical spelling to its canonical name, or None if the KB has no pool for it."""
+        key = normalize_vertical(vertical)
+        canonical = self.aliases.get(key)
+        if canonical is not None:
+            return canonical
+        # Rare spelling outside the table: a scan of the aliases, not cached, so readers never write.
+        return self._resolve_partial(key)
+
+    def _resolve_partial(self, key: str) -> Optional[str]:
+        if len(key) < 3 or key == GENERAL_VERTICAL:
+            return None
+        canonical = _NORMALIZED_SYNONYMS.get(key, key)
+        if canonical in self.pools:
+            return canonical
+        # Most specific alias contained in (or containing) the query wins.
+        matches = [alias for alias in self.aliases if len(alias) >= 3 and (alias in key or key in alias)]
+        if not matches:
+            return None
+        return self.aliases[max(matches, key=lambda alias: (len(alias), alias))]
+
+    def examples_for(self, vertical: str) -> List[dict]:
+        canonical = self.resolve(vertical)
+        return self.pools.get(canonical, []) if canonical else []
+
+    def top_examples(self, vertical: str, query_tokens: Sequence[str], k: int, offset: int = 0) -> List[dict]:
+        """Best-matching pool entries for the query; empty when nothing in the pool matches."""
+        canonical = self.resolve(vertical)
+        retriever = self.retrievers.get(canonical) if canonical else None
+        if retriever is None:
+            return []
+        return retriever.top_examples(query_tokens, k, offset)
+
+
+def _stat_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _build_pools(by_vertical: Dict[str, List[dict]]) -> Tuple[Dict[str, List[dict]], Dict[str, str], Dict[str, List[str]]]:
+    pools: Dict[str, List[dict]] = {}
+    sources: Dict[str, List[str]] = {}
+    seen: Dict[str, set] = {}
+    for raw_key, examples in by_vertical.items():
+        if not normalize_vertical(raw_key):
+            # Untagged examples: no vertical to serve them for.
+            continue
+        canonical = canonical_vertical(raw_key)
+        pool = pools.setdefault(canonical, [])
+        sources.setdefault(canonical, []).append(raw_key)
+        keys = seen.setdefault(canonical, set())
+        for ex in examples:
+            fingerprint = (ex.get("title", ""), ex.get("message", ""), ex.get("cta", ""))
+            if fingerprint in keys:
+                continue
+            keys.add(fingerprint)
+            pool.append(ex)
+
+    aliases: Dict[str, str] = {canonical: canonical for canonical in pools}
+    for canonical, raw_keys in sources.items():
+        for raw_key in raw_keys:
+            aliases[normalize_vertical(raw_key)] = canonical
+    for alias, canonical in _NORMALIZED_SYNONYMS.items():
+        if canonical in pools:
+            aliases[alias] = canonical
+    return pools, aliases, sources
+
+
+def _build_snapshot(path: Path, raw: bytes, signature: Tuple[int, int], digest: str) -> KnowledgeBaseSnapshot:
+    data = json.loads(raw.decode("utf-8"))
+    by_vertical: Dict[str, List[dict]] = {}
+    if isinstance(data, dict):
+        for vertical, examples in data.items():
+            if isinstance(examples, list):
+                by_vertical[str(vertical)] = [ex for ex in examples if isinstance(ex, dict)]
+    pools, aliases, sources = _build_pools(by_vertical)
+    return KnowledgeBaseSnapshot(
+        by_vertical=by_vertical,
+        pools=pools,
+        aliases=aliases,
+        sources=sources,
+        retrievers={canonical: Bm25Index(pool) for canonical, pool in pools.items()},
+        digest=digest,
+        mtime_ns=signature[0],
+        size=signature[1],
+        loaded_at=time.time(),
+    )
+
+
+class KnowledgeBaseIndex:
+    """In-process knowledge-base index with atomic snapshot swaps."""
+
+    def __init__(self, path: Path, poll_interval: float = 5.0):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._snapshot = KnowledgeBaseSnapshot()
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def snapshot(self) -> KnowledgeBaseSnapshot:
+        if not self._loaded:
+            # Only hit when used outside the app lifecycle (scripts, REPL).
+            self.refresh()
+        return self._snapshot
+
+    def get(self, vertical: str) -> List[dict]:
+        """Merged example pool for any spelling of a vertical."""
+        return self.snapshot().examples_for(vertical)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the file if it changed. Returns True when a new snapshot was swapped in."""
+        with self._load_lock:
+            try:
+                return self._reload_locked(force)
+            finally:
+                self._loaded = True
+
+    def _reload_locked(self, force: bool) -> bool:
+        signature = _stat_signature(self.path)
+        current = self._snapshot
+        if signature is None:
+            return False
+        if not force and signature == (current.mtime_ns, current.size):
+            return False
+        try:
+            raw = self.path.read_bytes()
+            digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+            if not force and digest == current.digest:
+                # Touched but unchanged: remember the new stat so we stop re-hashing.
+                self._snapshot = replace(current, mtime_ns=signature[0], size=signature[1])
+                return False
+            new_snapshot = _build_snapshot(self.path, raw, signature, digest)
+        except Exception as exc:
+            # Keep serving the last good snapshot on a bad write.
+            print(f"Knowledge base reload failed: {exc}")
+            return False
+        self._snapshot = new_snapshot
+        return True
+
+    def start(self) -> None:
+        self.refresh()
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="kb-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher:
+            self._watcher.join(timeout=self.poll_interval + 1)
+            self._watcher = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
@@ -0,0 +1,204 @@
+"""
+Campaign copy lint rules, free of FastAPI/pydantic so they can run in worker
+processes. `lint_text` returns plain dicts shaped like LintResponse; the
+service wraps them for /lint and streams them straight out for /lint/batch.
+
+Emojis are counted as graphemes by one precompiled regex pass (ZWJ
+sequences, skin tones, flags and keycaps count once), and banned phrases go
+through a matcher compiled once per distinct list, so adding phrases does not
+add passes over the text.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from concurrent.futures import Executor
+from functools import lru_cache
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BANNED_WORDS = ["free job", "lottery"]
+DEFAULT_RULES = {
+    "max_length": 480,
+    "min_emojis": 1,
+    "max_emojis": 12,
+    "require_cta": True,
+    "banned_words": DEFAULT_BANNED_WORDS,
+}
+
+CTA_MARKER = "👉"
+CONTACT_PLACEHOLDER = "{{9667589247}}"
+
+# --- emoji graphemes ---
+#
+# `re` has no \p{Extended_Pictographic}, so the classes below spell out the
+# emoji blocks. BMP symbols that render as text by default only count when
+# followed by VS16 (U+FE0F); a whole ZWJ sequence, flag or keycap counts once.
+
+_PICTOGRAPHIC_ASTRAL = "\U0001F000-\U0001F1E5\U0001F200-\U0001F3FA\U0001F400-\U0001FAFF"
+_PRESENTATION_BMP = (
+    "⌚⌛⏩-⏬⏰⏳◽◾☔☕♈-♓♿⚓⚡"
+    "⚪⚫⚽⚾⛄⛅⛎⛔⛪⛲⛳⛵⛺⛽✅"
+    "✊✋✨❌❎❓-❕❗➕-➗➰➿⬛⬜⭐⭕"
+)
+_TEXT_DEFAULT_BMP = (
+    "©®‼⁉™ℹ↔-↙↩↪⌨⏏⏭-⏯⏱⏲"
+    "⏸-⏺Ⓜ▪▫▶◀◻◼☀-➿⤴⤵⬅-⬇"
+    "〰〽㊗㊙"
+)
+_MODIFIER = "[\U0001F3FB-\U0001F3FF]"
+_TAGS = "[\U000E0020-\U000E007F]*"
+_ELEMENT = (
+    f"(?:[{_PICTOGRAPHIC_ASTRAL}{_PRESENTATION_BMP}]{_MODIFIER}?\ufe0f?"
+    f"|[{_TEXT_DEFAULT_BMP}]\ufe0f){_TAGS}"
+)
+# Inside a ZWJ sequence text-default symbols may join without VS16 (runner + ZWJ + ♀).
+_JOINED = f"(?:[{_PICTOGRAPHIC_ASTRAL}{_PRESENTATION_BMP}{_TEXT_DEFAULT_BMP}]{_MODIFIER}?\ufe0f?)"
+_EMOJI_START = f"[0-9#*{_PICTOGRAPHIC_ASTRAL}\U0001F1E6-\U0001F1FF{_PRESENTATION_BMP}{_TEXT_DEFAULT_BMP}]"
+EMOJI_PATTERN = (
+    # The lookahead lets the engine skip ordinary characters with one class test.
+    f"(?={_EMOJI_START})(?:"
+    "[\U0001F1E6-\U0001F1FF]{2}"  # flags
+    "|[0-9#*]\ufe0f?\u20e3"  # keycaps
+    f"|{_ELEMENT}(?:\u200d{_JOINED})*)"
+)
+EMOJI_RE = re.compile(EMOJI_PATTERN)
+
+
+def count_emojis(text: str) -> int:
+    return len(EMOJI_RE.findall(text))
+
+
+def has_cta(text: str, lowered: str) -> bool:
+    return CTA_MARKER in text or "http" in lowered
+
+
+# --- banned phrases ---
+
+# Below this many phrases, C-level substring checks beat walking the automaton
+# in Python; above it the automaton's single pass wins and stays flat.
+AUTOMATON_MIN_PHRASES = 24
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over lower-cased phrases.
+
+    `find(lowered)` returns the indices of every phrase that occurs in the
+    (already lower-cased) text, overlaps included, in the original list order.
+    """
+
+    def __init__(self, phrases: Sequence[str]):
+        self.phrases = tuple(phrases)
+        patterns = [phrase.lower() for phrase in self.phrases]
+        self._use_automaton = len(patterns) >= AUTOMATON_MIN_PHRASES
+        self._patterns = [(index, pattern) for index, pattern in enumerate(patterns) if pattern]
+        if self._use_automaton:
+            self._delta, self._outputs = self._compile(self._patterns)
+
+    @staticmethod
+    def _compile(patterns: Sequence[Tuple[int, str]]):
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Tuple[int, ...]] = [()]
+        for index, pattern in patterns:
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    goto.append({})
+                    outputs.append(())
+                    nxt = goto[state][ch] = len(goto) - 1
+                state = nxt
+            outputs[state] += (index,)
+
+        # Breadth-first: fold failure links into a complete transition table so
+        # matching is one dict lookup per character.
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        fail = [0] * len(goto)
+        pending = deque(goto[0].values())
+        while pending:
+            state = pending.popleft()
+            fallback = delta[fail[state]]
+            delta[state] = {**fallback, **goto[state]}
+            outputs[state] += outputs[fail[state]]
+            for ch, child in goto[state].items():
+                fail[child] = fallback.get(ch, 0) if state else 0
+                pending.append(child)
+        return delta, outputs
+
+    def find(self, lowered: str) -> List[int]:
+        if not self._use_automaton:
+            return [index for index, pattern in self._patterns if pattern in lowered]
+        delta = self._delta
+        outputs = self._outputs
+        found = set()
+        state = 0
+        for ch in lowered:
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return sorted(found)
+
+
+@lru_cache(maxsize=64)
+def phrase_matcher(phrases: Tuple[str, ...]) -> PhraseMatcher:
+    return PhraseMatcher(phrases)
+
+
+def _issue(severity: str, message: str, suggestion: Optional[str] = None) -> dict:
+    return {"severity": severity, "message": message, "suggestion": suggestion}
+
+
+def lint_text(raw_text: str, rules: dict) -> dict:
+    issues: List[dict] = []
+    text = raw_text.strip()
+    lowered = text.lower()
+    emoji_count = count_emojis(text)
+    max_length = rules["max_length"]
+    min_emojis = rules["min_emojis"]
+    max_emojis = rules["max_emojis"]
+
+    if len(text) > max_length:
+        issues.append(_issue("warning", f"Message is {len(text)} chars (max {max_length}). Trim the body."))
+
+    if rules["require_cta"] and not has_cta(text, lowered):
+        issues.append(
+            _issue(
+                "error",
+                "CTA missing. Add 👉 line with action + link/promo code.",
+                "Example: 👉 Join live now: {{DEEPLINK}}",
+            )
+        )
+
+    if emoji_count < min_emojis:
+        issues.append(_issue("warning", f"Add at least {min_emojis} emojis (currently {emoji_count})."))
+
+    if emoji_count > max_emojis:
+        issues.append(_issue("warning", f"Too many emojis ({emoji_count}). Keep under {max_emojis}."))
+
+    banned_words = rules["banned_words"]
+    if banned_words:
+        matcher = phrase_matcher(tuple(banned_words))
+        for index in matcher.find(lowered):
+            issues.append(_issue("error", f"Contains blocked phrase '{banned_words[index]}'. Remove or rephrase."))
+
+    if CONTACT_PLACEHOLDER not in text:
+        issues.append(_issue("info", f"Contact number {CONTACT_PLACEHOLDER} missing.", "Add support line near CTA."))
+
+    return {"issues": issues, "emojis_found": emoji_count, "length": len(text)}
+
+
+def lint_many(texts: Sequence[str], rules: dict) -> List[dict]:
+    return [lint_text(text, rules) for text in texts]
+
+
+def chunked(items: Sequence[str], size: int) -> List[Sequence[str]]:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def lint_parallel(executor: Executor, texts: Sequence[str], rules: dict, chunk_size: int) -> List[dict]:
+    """Lint on a (process) pool in order-preserving chunks."""
+    results: List[dict] = []
+    for part in executor.map(lint_many, chunked(texts, chunk_size), repeat(rules)):
+        results.extend(part)
+    return results
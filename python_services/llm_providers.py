@@ -0,0 +1,617 @@
+"""
+LLM providers shared by the campaign service and the offline scripts.
+
+Every backend implements the same small interface (`generate`, `stream`,
+`model_name`), so callers never touch a vendor SDK directly:
+
+  * GeminiProvider      - google.generativeai, configured once and shared
+                          so the underlying channel is reused.
+  * AzureOpenAIProvider - Azure OpenAI chat completions over a pooled
+                          requests.Session (used by the scripts).
+  * StubProvider        - deterministic, schema-valid JSON after a simulated
+                          latency (fixed / lognormal / heavy tail) with an
+                          injectable error rate, for load tests and
+                          benchmarks without the network.
+
+`provider_from_env()` picks one via LLM_PROVIDER=gemini|azure|stub and, unless
+LLM_ADAPTIVE_LIMIT=0, wraps it in a `LimitedProvider` so every upstream call
+goes through an AIMD concurrency limiter (see adaptive_limit.py), then in a
+`ResilientProvider` that retries transient errors and hedges slow calls
+(see resilience.py; LLM_RESILIENCE=0 turns it off).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+from adaptive_limit import IGNORE, OK, OVERLOAD, AdaptiveLimiter, LimiterRejected, limiter_from_env
+from resilience import BudgetExhausted, LatencyWindow, ResiliencePolicy, TokenBudget, backoff_delay
+
+
+class ProviderError(Exception):
+    """Upstream failure; `status_code` mirrors the HTTP status when there is one."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ProviderTimeout(ProviderError, TimeoutError):
+    """No reply in time, or the connection dropped: the upstream is saturated or unreachable."""
+
+
+class LLMProvider(ABC):
+    name = "base"
+
+    @property
+    @abstractmethod
+    def model_name(self) -> str:
+        """Model or deployment that serves the calls."""
+
+    @abstractmethod
+    def generate(self, prompt: str, system: Optional[str] = None, **options) -> str:
+        """One complete reply for `prompt`."""
+
+    def generate_timed(self, prompt: str, system: Optional[str] = None, **options) -> Tuple[str, float]:
+        """`generate` plus the seconds spent upstream (wrappers leave out their own queueing)."""
+        started = time.monotonic()
+        text = self.generate(prompt, system=system, **options)
+        return text, time.monotonic() - started
+
+    def stream(self, prompt: str, system: Optional[str] = None, **options) -> Iterator[str]:
+        yield self.generate(prompt, system=system, **options)
+
+    def close(self) -> None:
+        pass
+
+
+# --- Gemini ---
+
+@dataclass(frozen=True)
+class GeminiSettings:
+    api_key: str
+    model: str = "gemini-1.5-flash"
+    max_output_tokens: int = 800
+    temperature: float = 0.8
+    top_p: float = 0.9
+    top_k: int = 40
+    transport: Optional[str] = None  # "grpc" (SDK default) or "rest"
+
+    @classmethod
+    def from_env(cls) -> "GeminiSettings":
+        return cls(
+            api_key=os.getenv("GEMINI_API_KEY", "YOUR_GEMINI_API_KEY"),
+            model=os.getenv("GEMINI_MODEL", cls.model),
+            max_output_tokens=int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", cls.max_output_tokens)),
+            temperature=float(os.getenv("GEMINI_TEMPERATURE", cls.temperature)),
+            top_p=float(os.getenv("GEMINI_TOP_P", cls.top_p)),
+            top_k=int(os.getenv("GEMINI_TOP_K", cls.top_k)),
+            transport=os.getenv("GEMINI_TRANSPORT") or None,
+        )
+
+
+class GeminiProvider(LLMProvider):
+    """One configured GenerativeModel shared by all callers."""
+
+    name = "gemini"
+
+    def __init__(self, settings: GeminiSettings):
+        import google.generativeai as genai
+
+        self.settings = settings
+        configure_kwargs = {"api_key": settings.api_key}
+        if settings.transport:
+            configure_kwargs["transport"] = settings.transport
+        genai.configure(**configure_kwargs)
+        self.generation_config = genai.types.GenerationConfig(
+            candidate_count=1,
+            max_output_tokens=settings.max_output_tokens,
+            temperature=settings.temperature,
+            top_p=settings.top_p,
+            top_k=settings.top_k,
+            response_mime_type="application/json",  # Enforce JSON output
+        )
+        self.model = genai.GenerativeModel(settings.model, generation_config=self.generation_config)
+
+    @property
+    def model_name(self) -> str:
+        return self.settings.model
+
+    @staticmethod
+    def _combine(prompt: str, system: Optional[str]) -> str:
+        return f"{system}\n\n{prompt}" if system else prompt
+
+    @staticmethod
+    def _request_options(options: dict) -> Optional[dict]:
+        return {"timeout": options["timeout"]} if options.get("timeout") else None
+
+    def generate(self, prompt: str, system: Optional[str] = None, **options) -> str:
+        return self.model.generate_content(self._combine(prompt, system), request_options=self._request_options(options)).text
+
+    def stream(self, prompt: str, system: Optional[str] = None, **options) -> Iterator[str]:
+        for chunk in self.model.generate_content(self._combine(prompt, system), stream=True, request_options=self._request_options(options)):
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+
+
+# --- Azure OpenAI ---
+
+@dataclass(frozen=True)
+class AzureOpenAISettings:
+    api_key: str
+    endpoint: str
+    deployment: str
+    api_version: str
+    timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls, defaults: Optional["AzureOpenAISettings"] = None) -> "AzureOpenAISettings":
+        base = defaults or cls(api_key="", endpoint="", deployment="", api_version="")
+        return cls(
+            api_key=os.getenv("AZURE_OPENAI_API_KEY", base.api_key),
+            endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", base.endpoint),
+            deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", base.deployment),
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION", base.api_version),
+            timeout=float(os.getenv("AZURE_OPENAI_TIMEOUT", base.timeout)),
+        )
+
+
+class AzureOpenAIProvider(LLMProvider):
+    name = "azure"
+
+    def __init__(self, settings: AzureOpenAISettings):
+        import requests
+
+        self.settings = settings
+        self.url = (
+            f"{settings.endpoint}/openai/deployments/{settings.deployment}"
+            f"/chat/completions?api-version={settings.api_version}"
+        )
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json", "api-key": settings.api_key})
+
+    @property
+    def model_name(self) -> str:
+        return self.settings.deployment
+
+    def generate(self, prompt: str, system: Optional[str] = None, **options) -> str:
+        import requests
+
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        payload = {
+            "messages": messages,
+            "temperature": options.get("temperature", 0.8),
+            "max_tokens": options.get("max_tokens", 800),
+            "top_p": options.get("top_p", 0.95),
+        }
+        try:
+            response = self.session.post(self.url, json=payload, timeout=options.get("timeout", self.settings.timeout))
+        except (requests.Timeout, requests.ConnectionError) as exc:
+            raise ProviderTimeout(str(exc)) from exc
+        except requests.RequestException as exc:
+            raise ProviderError(str(exc)) from exc
+        if response.status_code >= 400:
+            raise ProviderError(f"Azure OpenAI returned {response.status_code}: {response.text[:200]}", response.status_code)
+        return response.json()["choices"][0]["message"]["content"]
+
+
+# --- Offline stub ---
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """Simulated upstream latency in milliseconds.
+
+    fixed:      always `median_ms`
+    lognormal:  median_ms * exp(sigma * N(0, 1))
+    heavy_tail: lognormal, but with probability `tail_probability` multiplied
+                by `tail_multiplier` (stalled / queued upstream calls)
+    """
+
+    kind: str = "fixed"
+    median_ms: float = 800.0
+    sigma: float = 0.5
+    tail_probability: float = 0.02
+    tail_multiplier: float = 10.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.median_ms
+        value = self.median_ms * math.exp(self.sigma * rng.gauss(0.0, 1.0))
+        if self.kind == "heavy_tail" and rng.random() < self.tail_probability:
+            value *= self.tail_multiplier
+        return value
+
+
+_STUB_CATEGORIES = ["FOMO", "Urgency", "Simple Product Promotion", "Feel Good Messages", "Curiosity / Psychological Hooks"]
+
+
+def _stub_components(seed: int) -> dict:
+    rng = random.Random(seed)
+    categories = rng.sample(_STUB_CATEGORIES, 3)
+    return {
+        "components": [
+            {
+                "category": category,
+                "emoji": "",
+                "hook": f"{{{{FIRST_NAME}}}}, offer #{rng.randint(10, 99)} ends tonight",
+                "body": [f"Get {rng.choice([40, 50, 60, 77])}% off on {{{{COURSE_NAME}}}}. Call {{{{9667589247}}}}."],
+                "cta": "Enroll now",
+                "tonality": "stub",
+            }
+            for category in categories
+        ],
+        "image_prompt": "Professional educational banner. Red and white theme.",
+        "notes": "Generated by the offline stub provider.",
+    }
+
+
+def _stub_push_campaign(seed: int) -> dict:
+    rng = random.Random(seed)
+    discount = rng.choice([40, 50, 60, 77])
+    return {
+        "hook": f"{discount}% off ends tonight!",
+        "push_copy": f"Hi {{{{Username}}}}, your prep deserves the best. Get {discount}% off today. Call 9667589247.",
+        "cta": "Enroll now",
+        "promo_code": f"STUB{rng.randint(10, 99)}",
+        "discount": f"{discount}% Off",
+        "user_segment": "Active learners",
+        "scheduled_time": "7:00 PM",
+        "product_ids": [str(rng.randint(10000, 99999)) for _ in range(3)],
+        "personalization_tokens": ["Username"],
+        "contact_number": "9667589247",
+        "event_context": "stub",
+    }
+
+
+STUB_SCHEMAS = {
+    "components": _stub_components,        # marcom_service CampaignResponse JSON
+    "push_campaign": _stub_push_campaign,   # scripts' hook/push_copy/cta JSON
+}
+
+
+class StubProvider(LLMProvider):
+    """Deterministic offline backend: same prompt -> same JSON, after a simulated delay."""
+
+    name = "stub"
+
+    def __init__(
+        self,
+        schema: str = "components",
+        latency: Optional[LatencyModel] = None,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        stream_chunks: int = 8,
+    ):
+        if schema not in STUB_SCHEMAS:
+            raise ValueError(f"Unknown stub schema '{schema}' (expected one of {sorted(STUB_SCHEMAS)})")
+        self.schema = schema
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.stream_chunks = max(stream_chunks, 1)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._seed = seed
+
+    @property
+    def model_name(self) -> str:
+        return f"stub-{self.schema}"
+
+    def _draw(self) -> tuple:
+        with self._rng_lock:
+            return self.latency.sample(self._rng), self._rng.random()
+
+    def _body(self, prompt: str, system: Optional[str]) -> str:
+        digest = hashlib.blake2b(f"{self._seed}:{system or ''}:{prompt}".encode("utf-8"), digest_size=8).digest()
+        return json.dumps(STUB_SCHEMAS[self.schema](int.from_bytes(digest, "big")), ensure_ascii=False)
+
+    def _maybe_fail(self, roll: float) -> None:
+        if roll < self.error_rate:
+            status = 429 if roll < self.error_rate / 2 else 503
+            raise ProviderError(f"Stub provider injected HTTP {status}", status)
+
+    def generate(self, prompt: str, system: Optional[str] = None, **options) -> str:
+        latency_ms, roll = self._draw()
+        time.sleep(latency_ms / 1000.0)
+        self._maybe_fail(roll)
+        return self._body(prompt, system)
+
+    def stream(self, prompt: str, system: Optional[str] = None, **options) -> Iterator[str]:
+        latency_ms, roll = self._draw()
+        body = self._body(prompt, system)
+        # A third of the latency before the first token, the rest spread over the chunks.
+        time.sleep(latency_ms * 0.3 / 1000.0)
+        self._maybe_fail(roll)
+        step = max(len(body) // self.stream_chunks, 1)
+        pause = latency_ms * 0.7 / 1000.0 / self.stream_chunks
+        for start in range(0, len(body), step):
+            yield body[start:start + step]
+            time.sleep(pause)
+
+
+def stub_from_env(schema: str = "components") -> StubProvider:
+    return StubProvider(
+        schema=schema,
+        latency=LatencyModel(
+            kind=os.getenv("LLM_STUB_LATENCY", "fixed"),
+            median_ms=float(os.getenv("LLM_STUB_LATENCY_MS", "800")),
+            sigma=float(os.getenv("LLM_STUB_SIGMA", "0.5")),
+            tail_probability=float(os.getenv("LLM_STUB_TAIL_PROBABILITY", "0.02")),
+            tail_multiplier=float(os.getenv("LLM_STUB_TAIL_MULTIPLIER", "10")),
+        ),
+        error_rate=float(os.getenv("LLM_STUB_ERROR_RATE", "0")),
+        seed=int(os.getenv("LLM_STUB_SEED", "0")),
+    )
+
+
+# --- Flow control ---
+
+# SDK exception names (google.api_core, grpc, requests) that mean "upstream is saturated".
+_OVERLOAD_ERROR_NAMES = ("ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded", "Timeout", "InternalServerError")
+
+
+def is_overload(exc: BaseException) -> bool:
+    """429, 5xx and timeouts: errors that say the upstream needs less concurrency.
+
+    Wrapped errors count by their cause too, so a `raise ProviderError(...) from
+    requests.Timeout(...)` is still recognised.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, TimeoutError):
+            return True
+        status_code = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+        if isinstance(status_code, int) and (status_code == 429 or status_code >= 500):
+            return True
+        if any(name in type(exc).__name__ for name in _OVERLOAD_ERROR_NAMES):
+            return True
+        exc = exc.__cause__
+    return False
+
+
+class LimitedProvider(LLMProvider):
+    """Runs every call of `inner` under an AdaptiveLimiter slot."""
+
+    def __init__(self, inner: LLMProvider, limiter: AdaptiveLimiter):
+        self.inner = inner
+        self.limiter = limiter
+        self.name = inner.name
+
+    @property
+    def model_name(self) -> str:
+        return self.inner.model_name
+
+    def generate(self, prompt: str, system: Optional[str] = None, **options) -> str:
+        return self.generate_timed(prompt, system=system, **options)[0]
+
+    def generate_timed(self, prompt: str, system: Optional[str] = None, **options) -> Tuple[str, float]:
+        # Timed inside the slot: the wait for it is our queueing, not upstream latency.
+        self.limiter.acquire()
+        started = time.monotonic()
+        try:
+            text = self.inner.generate(prompt, system=system, **options)
+        except Exception as exc:
+            self.limiter.release(OVERLOAD if is_overload(exc) else IGNORE)
+            raise
+        latency = time.monotonic() - started
+        self.limiter.release(OK, latency)
+        return text, latency
+
+    def stream(self, prompt: str, system: Optional[str] = None, **options) -> Iterator[str]:
+        # The slot is held until the stream ends; stream durations are not fed to the
+        # latency signal since they depend on how fast the client reads.
+        self.limiter.acquire()
+        outcome = IGNORE
+        try:
+            yield from self.inner.stream(prompt, system=system, **options)
+            outcome = OK
+        except Exception as exc:
+            outcome = OVERLOAD if is_overload(exc) else IGNORE
+            raise
+        finally:
+            self.limiter.release(outcome)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class ResilientProvider(LLMProvider):
+    """Retries, backoff and hedging around `inner`; see resilience.py for the policy."""
+
+    def __init__(self, inner: LLMProvider, policy: ResiliencePolicy, limiter: Optional[AdaptiveLimiter] = None, hedge_workers: int = 32):
+        self.inner = inner
+        self.policy = policy
+        self.limiter = limiter
+        self.name = inner.name
+        self.latencies = LatencyWindow()
+        self.retry_budget = TokenBudget(policy.retry_ratio)
+        self.hedge_budget = TokenBudget(policy.hedge_ratio)
+        self._executor = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix="llm-attempt") if policy.hedge else None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "retries": 0,
+            "retry_wins": 0,
+            "retry_budget_denied": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "hedge_budget_denied": 0,
+            "budget_exhausted": 0,
+        }
+
+    @property
+    def model_name(self) -> str:
+        return self.inner.model_name
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self.inner.close()
+
+    # --- retries ---
+
+    def _start_call(self) -> float:
+        self._count("calls")
+        self.retry_budget.deposit()
+        self.hedge_budget.deposit()
+        return time.monotonic() + self.policy.call_budget
+
+    def _retry_delay(self, exc: Exception, attempt: int, deadline: float) -> Optional[float]:
+        """Seconds to sleep before the next attempt, or None to give up and re-raise."""
+        if isinstance(exc, LimiterRejected) or not is_overload(exc) or attempt + 1 >= self.policy.max_attempts:
+            return None
+        if not self.retry_budget.try_spend():
+            self._count("retry_budget_denied")
+            return None
+        delay = backoff_delay(attempt, self.policy.base_delay, self.policy.max_delay)
+        if time.monotonic() + delay >= deadline:
+            self._count("budget_exhausted")
+            return None
+        self._count("retries")
+        return delay
+
+    def generate(self, prompt: str, system: Optional[str] = None, **options) -> str:
+        deadline = self._start_call()
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count("budget_exhausted")
+                raise BudgetExhausted(f"LLM call budget of {self.policy.call_budget:g}s exhausted after {attempt} attempts")
+            attempt_options = {**options, "timeout": min(options.get("timeout") or self.policy.attempt_timeout, remaining)}
+            try:
+                text = self._attempt(prompt, system, attempt_options, deadline)
+            except Exception as exc:
+                delay = self._retry_delay(exc, attempt, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            if attempt:
+                self._count("retry_wins")
+            return text
+
+    def stream(self, prompt: str, system: Optional[str] = None, **options) -> Iterator[str]:
+        # Retried only until the first chunk is out; streams are never hedged.
+        deadline = self._start_call()
+        attempt = 0
+        while True:
+            attempt_options = {**options, "timeout": min(options.get("timeout") or self.policy.attempt_timeout, max(deadline - time.monotonic(), 0.001))}
+            started = False
+            try:
+                for chunk in self.inner.stream(prompt, system=system, **attempt_options):
+                    started = True
+                    yield chunk
+                if attempt:
+                    self._count("retry_wins")
+                return
+            except Exception as exc:
+                delay = None if started else self._retry_delay(exc, attempt, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+    # --- hedging ---
+
+    def _timed_generate(self, prompt: str, system: Optional[str], options: dict) -> str:
+        text, latency = self.inner.generate_timed(prompt, system=system, **options)
+        self.latencies.add(latency)
+        return text
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self._executor is None:
+            return None
+        quantile = self.latencies.quantile(self.policy.hedge_quantile, self.policy.hedge_min_samples)
+        if quantile is None:
+            return None
+        return max(quantile, self.policy.hedge_min_delay)
+
+    def _may_hedge(self) -> bool:
+        # A hedge is extra load: never add it while calls are already queueing for a slot.
+        if self.limiter is not None and self.limiter.stats()["queue_depth"] > 0:
+            self._count("hedge_budget_denied")
+            return False
+        if not self.hedge_budget.try_spend():
+            self._count("hedge_budget_denied")
+            return False
+        return True
+
+    def _attempt(self, prompt: str, system: Optional[str], options: dict, deadline: float) -> str:
+        delay = self._hedge_delay()
+        if delay is None or time.monotonic() + delay >= deadline:
+            return self._timed_generate(prompt, system, options)
+        primary = self._executor.submit(self._timed_generate, prompt, system, options)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        pending = {primary}
+        hedge: Optional[Future] = None
+        if self._may_hedge():
+            self._count("hedges")
+            hedge = self._executor.submit(self._timed_generate, prompt, system, options)
+            pending.add(hedge)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                self._count("budget_exhausted")
+                raise BudgetExhausted(f"LLM call budget of {self.policy.call_budget:g}s exhausted waiting for a reply")
+            for future in done:
+                if future.exception() is None:
+                    # The other attempt (if any) finishes in the background and is discarded.
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+
+def provider_from_env(
+    default: str = "gemini",
+    schema: str = "components",
+    azure_defaults: Optional[AzureOpenAISettings] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+    policy: Optional[ResiliencePolicy] = None,
+) -> LLMProvider:
+    """Build the backend named by LLM_PROVIDER (falling back to `default`), behind the limiter and retry layers."""
+    kind = os.getenv("LLM_PROVIDER", default).strip().lower()
+    if kind == "stub":
+        provider: LLMProvider = stub_from_env(schema)
+    elif kind == "azure":
+        provider = AzureOpenAIProvider(AzureOpenAISettings.from_env(azure_defaults))
+    elif kind == "gemini":
+        provider = GeminiProvider(GeminiSettings.from_env())
+    else:
+        raise ValueError(f"Unknown LLM_PROVIDER '{kind}' (expected gemini, azure or stub)")
+    if os.getenv("LLM_ADAPTIVE_LIMIT", "1") != "0":
+        limiter = limiter or limiter_from_env()
+        provider = LimitedProvider(provider, limiter)
+    else:
+        limiter = None
+    if os.getenv("LLM_RESILIENCE", "1") == "0":
+        return provider
+    return ResilientProvider(provider, policy or ResiliencePolicy.from_env(), limiter=limiter)
@@ -0,0 +1,244 @@
+"""
+Background, batched JSONL writer for the service's append-only logs.
+
+Request handlers call `write(record)`, which only enqueues. A daemon thread
+drains the queue and appends a whole batch with a single O_APPEND write once
+`batch_size` records are waiting or `flush_interval` seconds have passed, so
+lines from several uvicorn workers never interleave mid-line. Files rotate by
+size or calendar day under an advisory lock; the rotated file is gzipped and
+every worker notices the swap (inode change) and reopens. `close()` flushes
+whatever is still queued once the writer thread has exited.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+from json_codec import dumps
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev setups only
+    fcntl = None
+
+
+def _default_encoder(record: dict) -> bytes:
+    return dumps(record)
+
+
+class JsonlLogSink:
+    def __init__(
+        self,
+        path: Path,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_bytes: int = 50 * 1024 * 1024,
+        rotate_daily: bool = True,
+        compress: bool = True,
+        max_queue: int = 100_000,
+        encoder: Callable[[dict], bytes] = _default_encoder,
+    ):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.compress = compress
+        self.encoder = encoder
+        # Entries are single records or lists queued by write_many.
+        self._queue: "queue.Queue[Union[dict, List[dict]]]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._day: Optional[date] = None
+        self.stats = {"written": 0, "dropped": 0, "batches": 0, "rotations": 0, "errors": 0}
+
+    # --- producer side ---
+
+    def write(self, record: dict) -> None:
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def write_many(self, records: List[dict]) -> None:
+        """Queue records as one unit so they land in the same append."""
+        if not records:
+            return
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(list(records))
+        except queue.Full:
+            self.stats["dropped"] += len(records)
+
+    # --- lifecycle ---
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"log-sink:{self.path.name}", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                # Still mid-write: it drains the queue itself before exiting, and
+                # flushing or closing the fd from here would race it.
+                print(f"Log sink for {self.path.name} still writing after {timeout:g}s; leaving it to finish")
+                return
+            self._thread = None
+        # Anything enqueued after the thread exited.
+        self._flush_pending()
+        self._close_fd()
+
+    # --- consumer side ---
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                self._flush(batch)
+        self._flush_pending()
+
+    def _flush_pending(self) -> None:
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self._flush(batch)
+
+    def _drain(self, block: bool) -> List[Union[dict, List[dict]]]:
+        batch: List[Union[dict, List[dict]]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0 and not self._stop.is_set():
+                    batch.append(self._queue.get(timeout=min(timeout, 0.25)))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                if not block or timeout <= 0 or self._stop.is_set():
+                    break
+        return batch
+
+    def _flush(self, batch: List[Union[dict, List[dict]]]) -> None:
+        if not batch:
+            return
+        lines = []
+        for entry in batch:
+            for record in entry if isinstance(entry, list) else (entry,):
+                try:
+                    lines.append(self.encoder(record) + b"\n")
+                except Exception as exc:
+                    self.stats["errors"] += 1
+                    print(f"Log sink could not encode record for {self.path.name}: {exc}")
+        payload = b"".join(lines)
+        try:
+            self._append(payload)
+            self.stats["written"] += len(lines)
+            self.stats["batches"] += 1
+        except OSError as exc:
+            self.stats["errors"] += 1
+            print(f"Log sink write to {self.path} failed: {exc}")
+
+    def _append(self, payload: bytes) -> None:
+        fd = self._ensure_fd()
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        rotated: Optional[Path] = None
+        try:
+            fd, rotated = self._maybe_rotate(fd, len(payload))
+            # os.write may write less than asked (signals, some filesystems); the
+            # lock keeps the remainder contiguous with the first part.
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        if rotated is not None and self.compress:
+            self._compress(rotated)
+
+    # --- file management ---
+
+    def _ensure_fd(self) -> int:
+        if self._fd is not None and not self._replaced():
+            return self._fd
+        self._close_fd()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(str(self.path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        st = os.fstat(self._fd)
+        self._day = date.fromtimestamp(st.st_mtime) if st.st_size else date.today()
+        return self._fd
+
+    def _replaced(self) -> bool:
+        """True when another worker rotated the file out from under our fd."""
+        try:
+            on_disk = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        ours = os.fstat(self._fd)
+        return (on_disk.st_ino, on_disk.st_dev) != (ours.st_ino, ours.st_dev)
+
+    def _maybe_rotate(self, fd: int, incoming: int):
+        # Called with the lock held on `fd`; re-check in case a peer already rotated.
+        if self._replaced():
+            return self._swap_fd(fd), None
+        size = os.fstat(fd).st_size
+        if size == 0:
+            return fd, None
+        too_big = self.max_bytes and size + incoming > self.max_bytes
+        new_day = self.rotate_daily and self._day != date.today()
+        if not (too_big or new_day):
+            return fd, None
+
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        rotated = self.path.with_name(f"{self.path.name}.{stamp}.{os.getpid()}")
+        os.rename(self.path, rotated)
+        self.stats["rotations"] += 1
+        return self._swap_fd(fd), rotated
+
+    def _swap_fd(self, old_fd: int) -> int:
+        """Open (and lock) the current file, then release the stale descriptor."""
+        new_fd = os.open(str(self.path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(new_fd, fcntl.LOCK_EX)
+            fcntl.flock(old_fd, fcntl.LOCK_UN)
+        os.close(old_fd)
+        self._fd = new_fd
+        st = os.fstat(new_fd)
+        self._day = date.fromtimestamp(st.st_mtime) if st.st_size else date.today()
+        return new_fd
+
+    def _compress(self, rotated: Path) -> None:
+        try:
+            with rotated.open("rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            rotated.unlink()
+        except OSError as exc:
+            print(f"Log sink could not compress {rotated}: {exc}")
+
+    def _close_fd(self) -> None:
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
@@ -11,21 +11,56 @@ to call these endpoints.
 
 from __future__ import annotations
 
+import asyncio
+import gc
 import json
+import multiprocessing
+import os
 import random
-from datetime import datetime, timedelta
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
+from adaptive_limit import LimiterRejected, limiter_from_env
+from component_stream import ComponentStreamParser
+from events_calendar import default_calendar
+from example_retrieval import tokenize
+from json_codec import dumps, dumps_str
+from knowledge_base import KnowledgeBaseIndex, canonical_vertical
+from lint_engine import chunked, lint_many, lint_text
+from llm_providers import LLMProvider, ProviderError, ResilientProvider, provider_from_env
+from log_sink import JsonlLogSink
+from metrics import SIZE_BUCKETS, Registry, RequestMetricsMiddleware
+from profiling import ProfileMiddleware
+from response_cache import ResponseCache, request_cache_key
+from single_flight import SingleFlight
+from trend_cache import TrendCache, TrendSnapshot, encode_json, etag_matches, strong_etag
+from trend_feed import JsonDirectorySource, TrendFeed, enabled_sources, migrate_trend_file, snapshot_event
+from warmup import StartupReport
+
 BASE_DIR = Path(__file__).parent
 TREND_CACHE_PATH = BASE_DIR / "trend_cache.json"
 MOENGAGE_LOG_PATH = BASE_DIR / "moengage_payloads.log"
+GENERATION_HISTORY_PATH = BASE_DIR / "generation_history.jsonl"
+
+
+class FastJSONResponse(JSONResponse):
+    """Drop-in JSONResponse rendered through json_codec; the app's default response class."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
 
-app = FastAPI(title="Sandesh.ai Intelligence API", version="0.1.0")
+app = FastAPI(title="Sandesh.ai Intelligence API", version="0.1.0", default_response_class=FastJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -33,6 +68,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Prometheus text at /metrics; recording is a locked dict update, cheap enough to leave on.
+METRICS = Registry()
+HTTP_REQUESTS = METRICS.counter("marcom_http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+HTTP_LATENCY = METRICS.histogram("marcom_http_request_duration_seconds", "HTTP request latency by route.", ("route", "method"))
+GENERATION_STAGE_SECONDS = METRICS.histogram("marcom_generation_stage_seconds", "Time spent in each campaign generation stage.", ("stage",))
+LLM_CALLS = METRICS.counter("marcom_llm_calls_total", "LLM calls by mode and outcome (ok, timeout, rate_limited, upstream_error, shed, error).", ("mode", "outcome"))
+LLM_PROMPT_CHARS = METRICS.histogram("marcom_llm_prompt_chars", "Prompt size sent to the LLM, in characters.", buckets=SIZE_BUCKETS)
+LLM_RESPONSE_CHARS = METRICS.histogram("marcom_llm_response_chars", "LLM reply size, in characters.", buckets=SIZE_BUCKETS)
+app.add_middleware(RequestMetricsMiddleware, requests_total=HTTP_REQUESTS, request_seconds=HTTP_LATENCY)
+
+# Per-request profiling for debugging; not installed at all unless PROFILE_TOKEN is set.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+if PROFILE_TOKEN:
+    app.add_middleware(
+        ProfileMiddleware,
+        token=PROFILE_TOKEN,
+        directory=Path(os.getenv("PROFILE_DIR", str(BASE_DIR / "profiles"))),
+        interval=float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.001")),
+    )
+
+# Append-only logs are queued and written in batches by a background thread,
+# rotated (and gzipped) by size or day, so handlers never wait on disk I/O.
+_LOG_SINK_OPTIONS = dict(
+    batch_size=int(os.getenv("LOG_BATCH_SIZE", "200")),
+    flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "1.0")),
+    max_bytes=int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024))),
+)
+MOENGAGE_LOG = JsonlLogSink(MOENGAGE_LOG_PATH, **_LOG_SINK_OPTIONS)
+GENERATION_HISTORY_LOG = JsonlLogSink(GENERATION_HISTORY_PATH, **_LOG_SINK_OPTIONS)
+
+
+@app.on_event("startup")
+def _start_log_sinks() -> None:
+    MOENGAGE_LOG.start()
+    GENERATION_HISTORY_LOG.start()
+
+
+@app.on_event("shutdown")
+def _flush_log_sinks() -> None:
+    MOENGAGE_LOG.close()
+    GENERATION_HISTORY_LOG.close()
+
 
 class TrendItem(BaseModel):
     title: str
@@ -49,8 +126,7 @@ class TrendResponse(BaseModel):
     items: List[TrendItem]
 
 
-class LintRequest(BaseModel):
-    text: str
+class LintRules(BaseModel):
     max_length: int = 480
     min_emojis: int = 1
     max_emojis: int = 12
@@ -58,6 +134,10 @@ class LintRequest(BaseModel):
     banned_words: List[str] = Field(default_factory=lambda: ["free job", "lottery"])
 
 
+class LintRequest(LintRules):
+    text: str
+
+
 class LintIssue(BaseModel):
     severity: str
     message: str
@@ -70,6 +150,16 @@ class LintResponse(BaseModel):
     length: int
 
 
+class LintBatchRequest(BaseModel):
+    texts: List[str]
+    rules: LintRules = Field(default_factory=LintRules)
+
+
+class LintBatchResponse(BaseModel):
+    results: List[LintResponse]
+    count: int
+
+
 class MoEngageRequest(BaseModel):
     vertical: str
     tonality: str
@@ -113,8 +203,11 @@ def _load_trend_cache() -> List[TrendItem]:
         except Exception:
             pass
 
-    # Default curated examples
-    today = datetime.utcnow().date()
+    # No usable file yet: serve the curated defaults; the trend feed writes the file.
+    return _curated_trends()
+
+
+def _curated_trends() -> List[TrendItem]:
     defaults = [
         TrendItem(
             title="SSC CGL Tier-1 Answer Key Buzz",
@@ -153,90 +246,172 @@ def _load_trend_cache() -> List[TrendItem]:
             tags=["navratri", "banking", "offers"],
         ),
     ]
-    TREND_CACHE_PATH.write_text(json.dumps([item.dict() for item in defaults], indent=2))
     return defaults
 
 
+# Held in memory with its JSON body pre-encoded; the trend feed task re-checks the file every TREND_RELOAD_INTERVAL seconds.
+TREND_CACHE = TrendCache(
+    TREND_CACHE_PATH,
+    lambda: [item.dict() for item in _load_trend_cache()],
+    check_interval=float(os.getenv("TREND_RELOAD_INTERVAL", "2")),
+)
+
+
+def _event_trends() -> List[dict]:
+    """Upcoming calendar events (next two weeks) as trend items."""
+    today = datetime.utcnow().date()
+    return [
+        TrendItem(
+            title=event.title,
+            category="event",
+            emoji=event.emoji,
+            summary=event.description,
+            rationale=event.relevance,
+            source="edtech-calendar",
+            tags=[event.category] + [vertical.lower() for vertical in event.verticals],
+        ).dict()
+        for event in EVENTS_CALENDAR.query(today, today + timedelta(days=14))
+    ]
+
+
+# Drop JSON files into trend_sources/ to add topics; TREND_SOURCES picks and orders the sources.
+TREND_SOURCES_DIR = Path(os.getenv("TREND_SOURCES_DIR", str(BASE_DIR / "trend_sources")))
+TREND_FEED = TrendFeed(
+    TREND_CACHE,
+    validate=lambda item: TrendItem(**item).dict(),
+    refresh_interval=float(os.getenv("TREND_REFRESH_INTERVAL", "300")),
+    check_interval=TREND_CACHE.check_interval,
+)
+for _name, _source in enabled_sources(
+    os.getenv("TREND_SOURCES", "directory,curated"),
+    {
+        "curated": lambda: [item.dict() for item in _curated_trends()],
+        "directory": JsonDirectorySource(TREND_SOURCES_DIR),
+        "events": _event_trends,
+    },
+):
+    TREND_FEED.add_source(_name, _source)
+
+
+@app.on_event("startup")
+async def _start_trend_feed() -> None:
+    TREND_FEED.start()
+
+
+@app.on_event("shutdown")
+async def _stop_trend_feed() -> None:
+    await TREND_FEED.stop()
+
+
+async def _trend_snapshot() -> TrendSnapshot:
+    # The trend feed task re-checks the file in a thread; handlers only read what it loaded.
+    snapshot = TREND_CACHE.current()
+    if snapshot is None:
+        snapshot = await asyncio.get_running_loop().run_in_executor(None, TREND_CACHE.snapshot)
+    return snapshot
+
+
 @app.get("/trend-insights", response_model=TrendResponse)
-def trend_insights() -> TrendResponse:
-    items = _load_trend_cache()
-    return TrendResponse(updated_at=datetime.utcnow().isoformat(), items=items)
+async def trend_insights(request: Request) -> Response:
+    snapshot = await _trend_snapshot()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
 
 
-@app.post("/lint", response_model=LintResponse)
-def lint_message(req: LintRequest) -> LintResponse:
-    issues: List[LintIssue] = []
-    text = req.text.strip()
-    emoji_count = sum(
-        ch in "😀😁😂🤣😃😄😅😆😉😊😍😘😜🤩🤗🤔🤩🙏🔥⚡️🚀🎯🎉💥💪📣📢📈📚📖📝🪔🚨✅" for ch in text
+async def _trend_events() -> AsyncIterator[str]:
+    queue = TREND_FEED.subscribe()
+    try:
+        yield _sse("snapshot", snapshot_event(await _trend_snapshot()))
+        while True:
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout=15)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse(event, data)
+    finally:
+        TREND_FEED.unsubscribe(queue)
+
+
+@app.get("/trend-insights/stream")
+async def trend_insights_stream() -> StreamingResponse:
+    """SSE: one `snapshot` event with the full feed, then a `delta` event
+    (added / updated / removed by title) whenever the feed changes."""
+    return StreamingResponse(
+        _trend_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    if len(text) > req.max_length:
-        issues.append(
-            LintIssue(
-                severity="warning",
-                message=f"Message is {len(text)} chars (max {req.max_length}). Trim the body.",
-            )
-        )
 
-    if req.require_cta and "👉" not in text and "http" not in text.lower():
-        issues.append(
-            LintIssue(
-                severity="error",
-                message="CTA missing. Add 👉 line with action + link/promo code.",
-                suggestion="Example: 👉 Join live now: {{DEEPLINK}}",
-            )
+@app.post("/lint", response_model=LintResponse)
+def lint_message(req: LintRequest) -> LintResponse:
+    return LintResponse(**lint_text(req.text, req.dict(exclude={"text"})))
+
+
+# Large /lint/batch requests are split into chunks and linted on a process pool; smaller
+# ones run on a thread, so the event loop never lints.
+LINT_WORKERS = int(os.getenv("LINT_WORKERS", str(os.cpu_count() or 2)))
+LINT_PARALLEL_THRESHOLD = int(os.getenv("LINT_PARALLEL_THRESHOLD", "5000"))
+LINT_CHUNK_SIZE = int(os.getenv("LINT_CHUNK_SIZE", "2000"))
+LINT_BATCH_MAX_ITEMS = int(os.getenv("LINT_BATCH_MAX_ITEMS", "20000"))
+_lint_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_lint_pool() -> ProcessPoolExecutor:
+    global _lint_pool
+    if _lint_pool is None:
+        # spawn: children only need lint_engine, not this process's threads.
+        _lint_pool = ProcessPoolExecutor(max_workers=LINT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _lint_pool
+
+
+@app.on_event("shutdown")
+def _stop_lint_pool() -> None:
+    if _lint_pool is not None:
+        _lint_pool.shutdown(wait=False, cancel_futures=True)
+
+
+@app.post("/lint/batch", response_model=LintBatchResponse)
+async def lint_batch(req: LintBatchRequest):
+    """Lint many texts against one rule set; results are in input order."""
+    if len(req.texts) > LINT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch has {len(req.texts)} texts (max {LINT_BATCH_MAX_ITEMS}).")
+    rules = req.rules.dict()
+    texts = req.texts
+    loop = asyncio.get_running_loop()
+    if len(texts) < LINT_PARALLEL_THRESHOLD or LINT_WORKERS <= 1:
+        results = await loop.run_in_executor(None, lint_many, texts, rules)
+    else:
+        pool = _get_lint_pool()
+        parts = await asyncio.gather(
+            *(loop.run_in_executor(pool, lint_many, chunk, rules) for chunk in chunked(texts, LINT_CHUNK_SIZE))
         )
+        results = [item for part in parts for item in part]
+    # Results are already plain dicts in the LintResponse shape; skip re-validating them.
+    return FastJSONResponse({"results": results, "count": len(results)})
 
-    if emoji_count < req.min_emojis:
-        issues.append(
-            LintIssue(
-                severity="warning",
-                message=f"Add at least {req.min_emojis} emojis (currently {emoji_count}).",
-            )
-        )
 
-    if emoji_count > req.max_emojis:
-        issues.append(
-            LintIssue(
-                severity="warning",
-                message=f"Too many emojis ({emoji_count}). Keep under {req.max_emojis}.",
-            )
-        )
+MOENGAGE_THROTTLE_PER_USER = 10
+MOENGAGE_BATCH_MAX_ITEMS = int(os.getenv("MOENGAGE_BATCH_MAX_ITEMS", "1000"))
 
-    lowered = text.lower()
-    for banned in req.banned_words:
-        if banned in lowered:
-            issues.append(
-                LintIssue(
-                    severity="error",
-                    message=f"Contains blocked phrase '{banned}'. Remove or rephrase.",
-                )
-            )
 
-    token_placeholders = [token for token in ["{{FIRST_NAME}}", "{{COURSE_NAME}}", "{{9667589247}}"] if token in text]
-    if "{{9667589247}}" not in text:
-        issues.append(
-            LintIssue(
-                severity="info",
-                message="Contact number {{9667589247}} missing.",
-                suggestion="Add support line near CTA.",
-            )
-        )
+def _moengage_tags(vertical: str, tonality: str, tags: Tuple[str, ...]) -> List[str]:
+    return list(dict.fromkeys(tags + (vertical.lower(), tonality)))
 
-    return LintResponse(issues=issues, emojis_found=emoji_count, length=len(text))
 
+def _moengage_priority(tonality: str) -> str:
+    return "high" if tonality == "fomo" else "normal"
 
-@app.post("/moengage/payload", response_model=MoEngageResponse)
-def build_moengage_payload(req: MoEngageRequest) -> MoEngageResponse:
-    now = datetime.utcnow()
-    recommended_time = now + timedelta(minutes=random.randint(30, 180))
 
-    payload = {
-        "campaign_name": f"{req.vertical}-{now.strftime('%Y%m%d-%H%M')}",
+def _moengage_payload(req: MoEngageRequest, campaign_name: str, tags: List[str], priority: str) -> dict:
+    return {
+        "campaign_name": campaign_name,
         "target_segment": {
             "audience_query": req.audience,
-            "tags": list(set(req.tags + [req.vertical.lower(), req.tonality])),
+            "tags": tags,
         },
         "content": {
             "message": req.campaign_text,
@@ -245,184 +420,183 @@ def build_moengage_payload(req: MoEngageRequest) -> MoEngageResponse:
             "pdp_link": req.pdp_link,
         },
         "settings": {
-            "priority": "high" if req.tonality == "fomo" else "normal",
-            "throttle_per_user": 10,
+            "priority": priority,
+            "throttle_per_user": MOENGAGE_THROTTLE_PER_USER,
         },
     }
 
-    metadata = {
+
+def _moengage_metadata(req: MoEngageRequest, generated_at: str) -> dict:
+    return {
         "tonality": req.tonality,
         "audience": req.audience,
         "trend": req.trend,
-        "generated_at": now.isoformat(),
+        "generated_at": generated_at,
     }
 
-    with MOENGAGE_LOG_PATH.open("a") as fh:
-        fh.write(json.dumps({"payload": payload, "metadata": metadata}, ensure_ascii=False) + "\n")
+
+def _recommended_send_time(now: datetime) -> str:
+    return (now + timedelta(minutes=random.randint(30, 180))).isoformat()
+
+
+@app.post("/moengage/payload", response_model=MoEngageResponse)
+def build_moengage_payload(req: MoEngageRequest) -> MoEngageResponse:
+    now = datetime.utcnow()
+    payload = _moengage_payload(
+        req,
+        f"{req.vertical}-{now.strftime('%Y%m%d-%H%M')}",
+        _moengage_tags(req.vertical, req.tonality, tuple(req.tags)),
+        _moengage_priority(req.tonality),
+    )
+    metadata = _moengage_metadata(req, now.isoformat())
+
+    MOENGAGE_LOG.write({"payload": payload, "metadata": metadata})
 
     return MoEngageResponse(
         payload=payload,
         metadata=metadata,
-        recommended_send_time=recommended_time.isoformat(),
+        recommended_send_time=_recommended_send_time(now),
     )
 
 
-def _get_upcoming_edtech_events() -> List[EdTechEvent]:
-    """Generate upcoming Indian EdTech-relevant events for the next 90 days."""
-    today = datetime.utcnow().date()
-    events: List[EdTechEvent] = []
-    
-    # Exam dates (2026 calendar - key competitive exams)
-    exam_dates = [
-        ("SSC CGL Tier-2 Results", "2025-12-15", ["SSC", "GOVT JOBS"], ["fomo", "serious"]),
-        ("UPSC Prelims 2026 Notification", "2026-01-10", ["UPSC"], ["fomo", "motivational"]),
-        ("Banking PO Prelims", "2026-01-20", ["BANKING"], ["fomo", "premium"]),
-        ("SSC CHSL Answer Key Release", "2025-12-20", ["SSC"], ["fomo", "friendly"]),
-        ("Railway NTPC Result Declaration", "2026-01-05", ["RAILWAYS"], ["fomo", "friendly"]),
-        ("CTET January 2026 Registration", "2025-12-10", ["CTET", "Teaching"], ["serious", "friendly"]),
-        ("CUET UG 2026 Application Start", "2026-02-01", ["CUET UG", "K12 & CUET UG"], ["fomo", "celebratory"]),
-        ("UPSC Mains 2025 Results", "2025-12-28", ["UPSC"], ["fomo", "serious"]),
-        ("SSC CGL 2026 Notification", "2026-01-15", ["SSC"], ["fomo", "friendly"]),
-        ("Defence NDA-1 2026 Admit Card", "2026-01-25", ["DEFENCE"], ["motivational", "premium"]),
-        ("UGC NET December 2025 Results", "2025-12-18", ["UGC_NET"], ["serious", "premium"]),
-        ("Banking IBPS PO Interview Dates", "2026-01-12", ["BANKING"], ["fomo", "premium"]),
-        ("SSC MTS 2026 Notification Expected", "2026-02-05", ["SSC"], ["fomo", "friendly"]),
-        ("UPSC CSE 2026 Calendar Release", "2026-01-08", ["UPSC"], ["motivational", "serious"]),
-        ("Railway Group D Result", "2025-12-22", ["RAILWAYS"], ["fomo", "friendly"]),
-    ]
-    
-    for title, date_str, verticals, tonalities in exam_dates:
-        event_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        days_until = (event_date - today).days
-        if 0 <= days_until <= 90:
-            # Determine emoji based on event type
-            emoji = "📢" if "Notification" in title or "Registration" in title else \
-                    "📊" if "Results" in title or "Answer Key" in title else \
-                    "🎫" if "Admit Card" in title else \
-                    "📅" if "Calendar" in title or "Dates" in title else "📝"
-            
-            # Create specific descriptions
-            if "Results" in title or "Answer Key" in title:
-                description = f"{title} - Students anxiously waiting. High engagement opportunity."
-                relevance = f"Peak engagement period! Students checking results multiple times. Perfect for result analysis courses, next exam prep, and congratulatory campaigns."
-            elif "Notification" in title or "Registration" in title:
-                description = f"{title} - Application window opening. Create urgency campaigns."
-                relevance = f"Application rush period! Target aspirants with form filling guides, eligibility checkers, and early bird course offers."
-            elif "Admit Card" in title:
-                description = f"{title} - Exam approaching. Last-minute prep campaigns."
-                relevance = f"Final preparation phase! Promote quick revision courses, mock tests, and exam day tips."
-            else:
-                description = f"{title} - Important exam update for aspirants."
-                relevance = f"Key milestone for {', '.join(verticals[:2])} aspirants. Ideal timing for targeted campaigns."
-            
-            events.append(EdTechEvent(
-                title=title,
-                date=date_str,
-                category="exam",
-                emoji=emoji,
-                description=description,
-                relevance=relevance,
-                suggested_tonality=tonalities,
-                verticals=verticals,
-                days_until=days_until,
-            ))
-    
-    # Festivals & National Days (2025-2026)
-    festivals = [
-        ("Republic Day", "2026-01-26", ["celebratory", "friendly"], ["SSC", "UPSC", "BANKING", "RAILWAYS"]),
-        ("Dayanand Anniversary", "2026-02-12", ["celebratory", "motivational"], ["Teaching", "CTET", "UGC_NET", "ALL"]),
-        ("Holi", "2026-03-14", ["celebratory", "friendly"], ["ALL"]),
-        ("Ram Navami", "2026-04-07", ["celebratory", "motivational"], ["ALL"]),
-        ("Eid al-Fitr", "2026-03-31", ["celebratory", "friendly"], ["ALL"]),
-        ("Guru Purnima", "2026-07-10", ["celebratory", "motivational"], ["Teaching", "CTET", "UGC_NET"]),
-        ("Independence Day", "2026-08-15", ["celebratory", "motivational"], ["DEFENCE", "UPSC", "ALL"]),
-        ("Teachers Day", "2026-09-05", ["celebratory", "friendly"], ["Teaching", "CTET", "UGC_NET"]),
-        ("Dussehra", "2026-10-02", ["celebratory", "motivational"], ["ALL"]),
-        ("Diwali", "2026-10-20", ["celebratory", "premium"], ["ALL"]),
-        ("Children's Day", "2026-11-14", ["celebratory", "friendly"], ["K12 & CUET UG", "Teaching", "CTET", "ALL"]),
-        ("Christmas", "2025-12-25", ["celebratory", "friendly"], ["ALL"]),
-        ("New Year 2026 Prep", "2025-12-31", ["motivational", "fomo"], ["ALL"]),
-    ]
-    
-    # Emoji mapping for specific events
-    event_emojis = {
-        "Children's Day": "🎈",
-        "Christmas": "🎄",
-        "Dayanand Anniversary": "📚",
-        "Teachers Day": "👨‍🏫",
-        "Republic Day": "🇮🇳",
-        "Independence Day": "🇮🇳",
-    }
-    
-    # Custom relevance descriptions for specific events
-    event_relevance = {
-        "Children's Day": "Perfect for K12 campaigns! Parents actively seek educational gifts and courses for their children. Use child-friendly language and family-focused offers.",
-        "Christmas": "Year-end festive season drives gift purchases and course enrollments. Combine celebration messaging with special offers and New Year prep themes.",
-        "Dayanand Anniversary": "Honor the founder of Arya Samaj and education reformer. Ideal for teaching verticals - emphasize values, knowledge, and educational excellence.",
-        "Teachers Day": "High engagement for teaching courses and educator training. Parents and students show appreciation - perfect for CTET, UGC NET, and teaching verticals.",
+class MoEngageBatchRequest(BaseModel):
+    items: List[MoEngageRequest]
+    compact: bool = True  # columns + rows instead of one MoEngageResponse per item
+
+
+MOENGAGE_BATCH_COLUMNS = [
+    "campaign_name",
+    "vertical",
+    "tonality",
+    "audience_query",
+    "tags",
+    "priority",
+    "message",
+    "cta",
+    "trend",
+    "pdp_link",
+    "recommended_send_time",
+]
+
+
+@app.post("/moengage/payload/batch")
+def build_moengage_payload_batch(batch: MoEngageBatchRequest):
+    """Build a whole send plan in one call; all log records go out in a single append.
+
+    Compact form: {"generated_at", "count", "settings", "columns", "rows"}, where
+    each row follows `columns` and `settings` is shared by every payload."""
+    items = batch.items
+    if not items:
+        raise HTTPException(status_code=400, detail="Provide at least one item.")
+    if len(items) > MOENGAGE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch has {len(items)} items (max {MOENGAGE_BATCH_MAX_ITEMS}).")
+
+    now = datetime.utcnow()
+    generated_at = now.isoformat()
+    stamp = now.strftime("%Y%m%d-%H%M")
+
+    # Tags and priority depend only on (vertical, tonality, tags): derive each distinct combination once.
+    derived = {}
+    for req in items:
+        key = (req.vertical, req.tonality, tuple(req.tags))
+        if key not in derived:
+            derived[key] = (_moengage_tags(*key), _moengage_priority(req.tonality))
+
+    # Several languages for one vertical would share a name; suffix repeats.
+    name_counts: dict = {}
+    names = []
+    for req in items:
+        base = f"{req.vertical}-{stamp}"
+        name_counts[base] = name_counts.get(base, 0) + 1
+        names.append(base if name_counts[base] == 1 else f"{base}-{name_counts[base]}")
+
+    records = []
+    send_times = []
+    for req, name in zip(items, names):
+        tags, priority = derived[(req.vertical, req.tonality, tuple(req.tags))]
+        records.append({
+            "payload": _moengage_payload(req, name, tags, priority),
+            "metadata": _moengage_metadata(req, generated_at),
+        })
+        send_times.append(_recommended_send_time(now))
+
+    MOENGAGE_LOG.write_many(records)
+
+    if not batch.compact:
+        return {
+            "count": len(records),
+            "items": [
+                {**record, "recommended_send_time": send_time}
+                for record, send_time in zip(records, send_times)
+            ],
+        }
+    rows = []
+    for req, record, send_time in zip(items, records, send_times):
+        payload = record["payload"]
+        rows.append([
+            payload["campaign_name"],
+            req.vertical,
+            req.tonality,
+            req.audience,
+            payload["target_segment"]["tags"],
+            payload["settings"]["priority"],
+            req.campaign_text,
+            req.cta,
+            req.trend,
+            req.pdp_link,
+            send_time,
+        ])
+    return {
+        "generated_at": generated_at,
+        "count": len(rows),
+        "settings": {"throttle_per_user": MOENGAGE_THROTTLE_PER_USER},
+        "columns": MOENGAGE_BATCH_COLUMNS,
+        "rows": rows,
     }
-    
-    for title, date_str, tonalities, verticals in festivals:
-        event_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        days_until = (event_date - today).days
-        if 0 <= days_until <= 90:
-            # Use specific emoji if available, otherwise default logic
-            emoji = event_emojis.get(title, "🎉" if "Day" in title else "🪔")
-            category = "national_day" if "Day" in title or "Anniversary" in title else "festival"
-            relevance = event_relevance.get(
-                title,
-                f"Festive buying behavior + emotional connection. Use celebration-themed offers and motivational messaging."
-            )
-            
-            events.append(EdTechEvent(
-                title=title,
-                date=date_str,
-                category=category,
-                emoji=emoji,
-                description=f"{title} celebration. Great opportunity for themed campaigns.",
-                relevance=relevance,
-                suggested_tonality=tonalities,
-                verticals=verticals,
-                days_until=days_until,
-            ))
-    
-    # Seasonal/Strategic dates
-    seasonal = [
-        ("New Year Resolution Push", "2025-01-01", ["motivational", "fomo"], ["ALL"]),
-        ("Summer Prep Season", "2025-03-01", ["fomo", "friendly"], ["ALL"]),
-        ("Monsoon Study Boost", "2025-06-15", ["motivational", "serious"], ["ALL"]),
-        ("Year-End Sale Prep", "2025-11-15", ["fomo", "premium"], ["ALL"]),
-    ]
-    
-    for title, date_str, tonalities, verticals in seasonal:
-        event_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        days_until = (event_date - today).days
-        if 0 <= days_until <= 90:
-            events.append(EdTechEvent(
-                title=title,
-                date=date_str,
-                category="seasonal",
-                emoji="📅",
-                description=f"{title} - strategic campaign window.",
-                relevance=f"Seasonal behavior patterns. Align messaging with user mindset during this period.",
-                suggested_tonality=tonalities,
-                verticals=verticals,
-                days_until=days_until,
-            ))
-    
-    # Sort by days_until (soonest first)
-    events.sort(key=lambda e: e.days_until)
-    return events[:30]  # Return top 30 upcoming events
+
+
+# Built once; /edtech-events answers range queries by bisect over the sorted calendar.
+EVENTS_CALENDAR = default_calendar()
+EVENTS_LOADED_AT = datetime.utcnow().isoformat()
+EVENTS_WINDOW_DAYS = 90
+EVENTS_DEFAULT_LIMIT = 30
+
+
+@lru_cache(maxsize=512)
+def _events_response(today: date, start: date, end: date, vertical: Optional[str], category: Optional[str], limit: int) -> Tuple[bytes, str]:
+    """Pre-serialized body + ETag; `today` is part of the key because days_until depends on it."""
+    events = EVENTS_CALENDAR.query(start, end, vertical=vertical, category=category, limit=limit)
+    body = encode_json({"events": [event.to_dict(today) for event in events], "updated_at": EVENTS_LOADED_AT})
+    return body, strong_etag(body)
 
 
 @app.get("/edtech-events", response_model=EventsResponse)
-def upcoming_edtech_events() -> EventsResponse:
-    """Get upcoming Indian EdTech-relevant events for campaign generation."""
-    events = _get_upcoming_edtech_events()
-    return EventsResponse(
-        events=events,
-        updated_at=datetime.utcnow().isoformat(),
+async def upcoming_edtech_events(
+    request: Request,
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = None,
+    vertical: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = Query(EVENTS_DEFAULT_LIMIT, ge=1, le=500),
+) -> Response:
+    """Upcoming Indian EdTech-relevant events; defaults to the next 90 days, soonest first."""
+    today = datetime.utcnow().date()
+    start = from_ or today
+    end = to or start + timedelta(days=EVENTS_WINDOW_DAYS)
+    if end < start:
+        raise HTTPException(status_code=400, detail="`to` must not be before `from`.")
+    body, etag = _events_response(
+        today,
+        start,
+        end,
+        canonical_vertical(vertical) if vertical else None,
+        category or None,
+        limit,
     )
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.get("/health")
@@ -448,6 +622,10 @@ class CampaignRequest(BaseModel):
     variationIndex: Optional[int] = 0
     additionalContext: Optional[str] = None # For Merlin mode
     merlinMode: Optional[bool] = False
+    bypassCache: Optional[bool] = False  # Skip the response cache lookup (the fresh result is still stored)
+    lint: Optional[bool] = False  # Attach a lint report to every component
+    lintRules: Optional[LintRules] = None
+    lintRetries: Optional[int] = 0  # Regenerate components with lint errors, up to LINT_RETRY_MAX rounds
 
 
 class CampaignResponse(BaseModel):
@@ -456,6 +634,7 @@ class CampaignResponse(BaseModel):
     notes: str = ""
     model: str
     tokens: dict = {}
+    lint: Optional[dict] = None  # passed / failed / retried / repaired counts when `lint` was requested
 
 
 COMPONENT_LIBRARY = [
@@ -470,99 +649,129 @@ COMPONENT_LIBRARY = [
 ]
 
 KNOWLEDGE_BASE_PATH = BASE_DIR / "campaign_knowledge_base.json"
+KB_RELOAD_INTERVAL = float(os.getenv("KB_RELOAD_INTERVAL", "5"))
 
-def _load_knowledge_base() -> dict:
-    if KNOWLEDGE_BASE_PATH.exists():
-        try:
-            return json.loads(KNOWLEDGE_BASE_PATH.read_text())
-        except Exception:
-            pass
-    return {}
-
-def build_system_prompt(tonality: str, language: str, sample_examples: List[dict] = [], variation_index: int = 0, merlin_mode: bool = False, additional_context: str = None, vertical: str = "General") -> str:
-    # Expanded Tonality Guides
-    tonality_guides = {
-        "Authoritative": "You are an authoritative expert. Speak with command, absolute confidence, and professional reliability. Use clear, direct language.",
-        "Casual": "You are a relaxed friend. Keep it low-key, easygoing, and conversational. Use natural language and a warm vibe.",
-        "Celebratory": "You are the life of the party! Energetic, happy, and congratulatory. Use festive language and high energy.",
-        "Compassionate": "You are deeply caring and understanding. Show genuine concern, empathy, and reassurance. Validate their feelings.",
-        "Curious": "You are inquisitive. Ask questions and spark wonder. Make them think and want to know more.",
-        "Dramatic": "You are a storyteller. Use high stakes, strong emotions, and suspense. Build tension and anticipation.",
-        "Educational": "You are a teacher. Informative, clear, and helpful. Focus on explaining value and sharing knowledge.",
-        "Funny": "You are a comedian. Witty, humorous, and entertaining. Use clever wordplay and make them smile.",
-        "Inspirational": "You are a guru and coach. Motivate them to achieve greatness. Use empowering language and strong verbs.",
-        "Luxurious": "You are premium. Sophisticated, exclusive, and high-end. Use elegant language and focus on quality/exclusivity.",
-        "Nostalgic": "You are looking back fondly. Warm memories and sentiment. Connect with the past.",
-        "Persuasive": "You are a closer. Convincing, logical, and compelling. Highlight value, offers, and why they should act now.",
-        "Sarcastic": "You are dry and witty. Use irony carefully to be edgy but not offensive. Appeal to a younger, smarter audience.",
-        "Urgent": "You are a siren. Immediate action required. Create intense FOMO (Fear of Missing Out) and scarcity.",
-        
-        # Fallbacks for backward compatibility
-        "Friendly": "You are a relaxed friend. Keep it low-key, easygoing, and conversational.",
-        "Professional": "You are an authoritative expert. Speak with command and absolute confidence.",
-        "Humorous": "You are a comedian. Witty, humorous, and entertaining.",
-        "Motivational": "You are a guru and coach. Motivate them to achieve greatness.",
-        "Sophisticated": "You are premium. Sophisticated, exclusive, and high-end.",
-        "Promotional": "You are a closer. Convincing, logical, and compelling.",
-        "FOMO": "You are a siren. Immediate action required. Create intense FOMO.",
-    }
+# Parsed once at startup; a background watcher swaps in a new snapshot when the file changes.
+KB_INDEX = KnowledgeBaseIndex(KNOWLEDGE_BASE_PATH, poll_interval=KB_RELOAD_INTERVAL)
+# Few-shot examples sent per prompt, picked by BM25 against the request fields.
+FEW_SHOT_EXAMPLES = int(os.getenv("FEW_SHOT_EXAMPLES", "3"))
+# Caller-supplied sampleExamples are all used, up to this many (they are not cut to FEW_SHOT_EXAMPLES).
+SAMPLE_EXAMPLES_MAX = int(os.getenv("SAMPLE_EXAMPLES_MAX", "10"))
 
-    language_guide = {
-        "English": 'Write in clear, simple English.',
-        "Hindi": 'Write primarily in Hindi (Devanagari script) with some English words for modern terms.',
-        "Hinglish": 'Write in Hinglish - a natural mix of Hindi and English that Indian youth use. Use Latin script for both.',
-        "Marathi": 'Write primarily in Marathi using Devanagari script with natural conversational tone.',
-        "Bengali": 'Write primarily in Bengali using Bengali script with natural conversational tone.',
-        "Tamil": 'Write primarily in Tamil using Tamil script with natural conversational tone.',
-        "Telugu": 'Write primarily in Telugu using Telugu script with natural conversational tone.',
-        "Gujarati": 'Write primarily in Gujarati using Gujarati script with natural conversational tone.',
-        "Kannada": 'Write primarily in Kannada using Kannada script with natural conversational tone.',
-        "Malayalam": 'Write primarily in Malayalam using Malayalam script with natural conversational tone.',
-        "Digital Slang": 'Write in Gen-Z internet slang, using abbreviations, memes, and casual vibes.',
-    }
 
-    lang_note = ""
-    if language in ["Hindi", "Marathi", "Bengali", "Tamil", "Telugu", "Gujarati", "Kannada", "Malayalam"]:
-        lang_note = f"Write the ENTIRE message in {language} using its native script. Do NOT include full English sentences except for unavoidable brand names, URLs, or promo codes."
-    elif language == "Hinglish":
-        lang_note = "Write the ENTIRE message in Hinglish (Hindi + English mixed) using Latin script only. Do NOT use Devanagari or any other Indic script."
-    else:
-        lang_note = "Write the ENTIRE message in English. Do NOT mix in other languages except for 1–2 words if absolutely needed."
-
-    # Load Knowledge Base Examples
-    kb = _load_knowledge_base()
-    kb_examples = kb.get(vertical, [])
-    if not kb_examples and vertical != "General":
-        # Try partial match
-        for k in kb:
-            if vertical.lower() in k.lower() or k.lower() in vertical.lower():
-                kb_examples = kb[k]
-                break
+@app.on_event("startup")
+def _start_knowledge_base() -> None:
+    KB_INDEX.start()
+
+
+@app.on_event("shutdown")
+def _stop_knowledge_base() -> None:
+    KB_INDEX.stop()
+
+
+class VerticalInfo(BaseModel):
+    canonical: str
+    aliases: List[str]
+    source_keys: List[str]
+    examples: int
+
+
+class VerticalTaxonomyResponse(BaseModel):
+    verticals: List[VerticalInfo]
+    knowledge_base_digest: str
+    loaded_at: str
+
+
+@app.get("/verticals", response_model=VerticalTaxonomyResponse)
+def vertical_taxonomy() -> VerticalTaxonomyResponse:
+    """List canonical verticals with every alias that resolves to them."""
+    snapshot = KB_INDEX.snapshot()
+    aliases_by_canonical: dict = {}
+    for alias, canonical in snapshot.aliases.items():
+        aliases_by_canonical.setdefault(canonical, []).append(alias)
+    verticals = [
+        VerticalInfo(
+            canonical=canonical,
+            aliases=sorted(aliases_by_canonical.get(canonical, [])),
+            source_keys=snapshot.sources.get(canonical, []),
+            examples=len(pool),
+        )
+        for canonical, pool in sorted(snapshot.pools.items())
+    ]
+    return VerticalTaxonomyResponse(
+        verticals=verticals,
+        knowledge_base_digest=snapshot.digest,
+        loaded_at=datetime.utcfromtimestamp(snapshot.loaded_at).isoformat(),
+    )
+
+
+def _retrieval_query(req: CampaignRequest) -> str:
+    """Request fields that describe what the copy is about; occasion and offer count double."""
+    parts = [req.occasion, req.occasion, req.offer, req.offer, req.tonality, req.audience, req.campaignType, req.promoCode]
+    if req.trendContext:
+        parts.extend(str(value) for value in req.trendContext.values() if isinstance(value, str))
+    return " ".join(part for part in parts if part)
+
+
+# --- Prompt Assembly ---
+# Everything that does not depend on the request is rendered once at import time;
+# the (tonality, language) frame around the examples is memoized, so a request only
+# formats its own examples and user-prompt fields.
+
+TONALITY_GUIDES = {
+    "Authoritative": "You are an authoritative expert. Speak with command, absolute confidence, and professional reliability. Use clear, direct language.",
+    "Casual": "You are a relaxed friend. Keep it low-key, easygoing, and conversational. Use natural language and a warm vibe.",
+    "Celebratory": "You are the life of the party! Energetic, happy, and congratulatory. Use festive language and high energy.",
+    "Compassionate": "You are deeply caring and understanding. Show genuine concern, empathy, and reassurance. Validate their feelings.",
+    "Curious": "You are inquisitive. Ask questions and spark wonder. Make them think and want to know more.",
+    "Dramatic": "You are a storyteller. Use high stakes, strong emotions, and suspense. Build tension and anticipation.",
+    "Educational": "You are a teacher. Informative, clear, and helpful. Focus on explaining value and sharing knowledge.",
+    "Funny": "You are a comedian. Witty, humorous, and entertaining. Use clever wordplay and make them smile.",
+    "Inspirational": "You are a guru and coach. Motivate them to achieve greatness. Use empowering language and strong verbs.",
+    "Luxurious": "You are premium. Sophisticated, exclusive, and high-end. Use elegant language and focus on quality/exclusivity.",
+    "Nostalgic": "You are looking back fondly. Warm memories and sentiment. Connect with the past.",
+    "Persuasive": "You are a closer. Convincing, logical, and compelling. Highlight value, offers, and why they should act now.",
+    "Sarcastic": "You are dry and witty. Use irony carefully to be edgy but not offensive. Appeal to a younger, smarter audience.",
+    "Urgent": "You are a siren. Immediate action required. Create intense FOMO (Fear of Missing Out) and scarcity.",
     
-    # Combine provided samples with KB samples
-    all_examples = sample_examples + kb_examples
-    # Randomly select a few if too many
-    if len(all_examples) > 5:
-        import random
-        all_examples = random.sample(all_examples, 5)
-
-    examples_section = ""
-    if all_examples:
-        examples_str = "\n".join([
-            f"Example {i+1}:\nTitle: {ex.get('title', ex.get('hook', ''))}\nMessage: {ex.get('message', ex.get('body', ''))}\nCTA: {ex.get('cta', '')}"
-            for i, ex in enumerate(all_examples)
-        ])
-        examples_section = f"\n\nREAL SUCCESSFUL APP PUSH EXAMPLES ({vertical} - {tonality}):\n{examples_str}\n\nStudy these examples. Notice they are SHORT, PUNCHY, and DIRECT."
+    # Fallbacks for backward compatibility
+    "Friendly": "You are a relaxed friend. Keep it low-key, easygoing, and conversational.",
+    "Professional": "You are an authoritative expert. Speak with command and absolute confidence.",
+    "Humorous": "You are a comedian. Witty, humorous, and entertaining.",
+    "Motivational": "You are a guru and coach. Motivate them to achieve greatness.",
+    "Sophisticated": "You are premium. Sophisticated, exclusive, and high-end.",
+    "Promotional": "You are a closer. Convincing, logical, and compelling.",
+    "FOMO": "You are a siren. Immediate action required. Create intense FOMO.",
+}
+
+LANGUAGE_GUIDES = {
+    "English": 'Write in clear, simple English.',
+    "Hindi": 'Write primarily in Hindi (Devanagari script) with some English words for modern terms.',
+    "Hinglish": 'Write in Hinglish - a natural mix of Hindi and English that Indian youth use. Use Latin script for both.',
+    "Marathi": 'Write primarily in Marathi using Devanagari script with natural conversational tone.',
+    "Bengali": 'Write primarily in Bengali using Bengali script with natural conversational tone.',
+    "Tamil": 'Write primarily in Tamil using Tamil script with natural conversational tone.',
+    "Telugu": 'Write primarily in Telugu using Telugu script with natural conversational tone.',
+    "Gujarati": 'Write primarily in Gujarati using Gujarati script with natural conversational tone.',
+    "Kannada": 'Write primarily in Kannada using Kannada script with natural conversational tone.',
+    "Malayalam": 'Write primarily in Malayalam using Malayalam script with natural conversational tone.',
+    "Digital Slang": 'Write in Gen-Z internet slang, using abbreviations, memes, and casual vibes.',
+}
+
+NATIVE_SCRIPT_LANGUAGES = frozenset(["Hindi", "Marathi", "Bengali", "Tamil", "Telugu", "Gujarati", "Kannada", "Malayalam"])
 
-    component_guidance = "\n".join([f"- {item['category']}: {item['desc']}" for item in COMPONENT_LIBRARY])
+COMPONENT_GUIDANCE = "\n".join([f"- {item['category']}: {item['desc']}" for item in COMPONENT_LIBRARY])
 
-    base_prompt = f"""You are an expert App Push Notification copywriter for Adda247.
+_SYSTEM_PROMPT_HEAD = """You are an expert App Push Notification copywriter for Adda247.
 
-TONALITY: {tonality_guides.get(tonality, tonality_guides.get('Friendly'))}
+TONALITY: {tonality_guide}
 
-LANGUAGE: {language_guide.get(language, language_guide.get('Hinglish'))}
+LANGUAGE: {language_guide}
 
-LANGUAGE ENFORCEMENT: {lang_note}{examples_section}
+LANGUAGE ENFORCEMENT: {lang_note}"""
+
+# Literal braces are doubled once here; only {tonality} is left to fill per tonality.
+_SYSTEM_PROMPT_TAIL = """
 
 IMPORTANT RULES FOR APP PUSH NOTIFICATIONS:
 1. **NO EMOJIS ALLOWED**: Strict rule.
@@ -596,11 +805,75 @@ OUTPUT FORMAT REQUIREMENTS:
   "notes": "Optional single sentence reminder"
 }}
 - Choose categories from this library:
-{component_guidance}
+""" + COMPONENT_GUIDANCE.replace("{", "{{").replace("}", "}}") + """
 - Always include at least 3 variations/components.
 - body MUST be an array with usually just 1 string for Push, or 2 very short lines.
 """
 
+_USER_PROMPT_REQUIREMENTS = """
+REQUIREMENTS:
+1. **Title**: Catchy, <50 chars.
+2. **Body**: Value-driven, <120 chars.
+3. **CTA**: Actionable.
+4. **NO EMOJIS**.
+5. Include {{9667589247}}.
+6. **Image Prompt**: Include a detailed prompt for generating a matching banner image.
+
+Make it highly creative and conversion-focused!
+"""
+
+
+def _language_note(language: str) -> str:
+    if language in NATIVE_SCRIPT_LANGUAGES:
+        return f"Write the ENTIRE message in {language} using its native script. Do NOT include full English sentences except for unavoidable brand names, URLs, or promo codes."
+    elif language == "Hinglish":
+        return "Write the ENTIRE message in Hinglish (Hindi + English mixed) using Latin script only. Do NOT use Devanagari or any other Indic script."
+    return "Write the ENTIRE message in English. Do NOT mix in other languages except for 1–2 words if absolutely needed."
+
+
+@lru_cache(maxsize=512)
+def system_prompt_frame(tonality: str, language: str) -> Tuple[str, str]:
+    """(head, tail) of the system prompt; the examples section goes between them."""
+    head = _SYSTEM_PROMPT_HEAD.format(
+        tonality_guide=TONALITY_GUIDES.get(tonality, TONALITY_GUIDES.get('Friendly')),
+        language_guide=LANGUAGE_GUIDES.get(language, LANGUAGE_GUIDES.get('Hinglish')),
+        lang_note=_language_note(language),
+    )
+    return head, _SYSTEM_PROMPT_TAIL.format(tonality=tonality)
+
+
+def _render_examples(examples: List[dict], vertical: str, tonality: str) -> str:
+    if not examples:
+        return ""
+    examples_str = "\n".join([
+        f"Example {i+1}:\nTitle: {ex.get('title', ex.get('hook', ''))}\nMessage: {ex.get('message', ex.get('body', ''))}\nCTA: {ex.get('cta', '')}"
+        for i, ex in enumerate(examples)
+    ])
+    return f"\n\nREAL SUCCESSFUL APP PUSH EXAMPLES ({vertical} - {tonality}):\n{examples_str}\n\nStudy these examples. Notice they are SHORT, PUNCHY, and DIRECT."
+
+
+def select_examples(vertical: str, tonality: str, sample_examples: List[dict], variation_index: int = 0, retrieval_query: str = "") -> List[dict]:
+    # Caller-provided samples first (up to SAMPLE_EXAMPLES_MAX), then KB entries that best
+    # match the request for whatever is left of FEW_SHOT_EXAMPLES.
+    # Every alias ("Bank", "BANKING", "Banking3", ...) resolves to one merged pool.
+    sample_examples = list(sample_examples[:max(SAMPLE_EXAMPLES_MAX, 0)])
+    slots = max(FEW_SHOT_EXAMPLES - len(sample_examples), 0)
+    with GENERATION_STAGE_SECONDS.time(stage="kb_retrieval"):
+        snapshot = KB_INDEX.snapshot()
+        kb_examples = snapshot.top_examples(vertical, tokenize(retrieval_query or tonality), slots, variation_index)
+        if not kb_examples and slots:
+            # Nothing in the pool matches the request text; keep some variety.
+            pool = snapshot.examples_for(vertical)
+            kb_examples = random.sample(pool, min(slots, len(pool)))
+
+    return sample_examples + kb_examples
+
+
+def build_system_prompt(tonality: str, language: str, sample_examples: List[dict] = [], variation_index: int = 0, merlin_mode: bool = False, additional_context: str = None, vertical: str = "General", retrieval_query: str = "") -> str:
+    head, tail = system_prompt_frame(tonality, language)
+    examples = select_examples(vertical, tonality, sample_examples, variation_index, retrieval_query)
+    base_prompt = head + _render_examples(examples, vertical, tonality) + tail
+
     if merlin_mode and additional_context:
         try:
             context_json = json.loads(additional_context)
@@ -614,51 +887,211 @@ OUTPUT FORMAT REQUIREMENTS:
 
 
 def build_user_prompt(params: CampaignRequest, variation_index: int = 0) -> str:
-    prompt = f"""Create optimized APP PUSH NOTIFICATIONS for a {params.campaignType} campaign:
+    parts = [
+        f"Create optimized APP PUSH NOTIFICATIONS for a {params.campaignType} campaign:\n\n"
+        f"VERTICAL: {params.vertical}\n"
+        f"TONALITY: {params.tonality}\n"
+        f"LANGUAGE: {params.language}\n"
+        f"AUDIENCE: {params.audience}\n"
+        f"{f'OCCASION: {params.occasion}' if params.occasion else ''}\n"
+        f"{f'OFFER: {params.offer}' if params.offer else ''}\n"
+        f"{f'PROMO CODE: {params.promoCode}' if params.promoCode else ''}\n",
+        _USER_PROMPT_REQUIREMENTS,
+    ]
 
-VERTICAL: {params.vertical}
-TONALITY: {params.tonality}
-LANGUAGE: {params.language}
-AUDIENCE: {params.audience}
-{f'OCCASION: {params.occasion}' if params.occasion else ''}
-{f'OFFER: {params.offer}' if params.offer else ''}
-{f'PROMO CODE: {params.promoCode}' if params.promoCode else ''}
+    if params.merlinMode and params.additionalContext:
+        parts.append(f"\n\nADDITIONAL CONTEXT:\n{params.additionalContext}")
 
-REQUIREMENTS:
-1. **Title**: Catchy, <50 chars.
-2. **Body**: Value-driven, <120 chars.
-3. **CTA**: Actionable.
-4. **NO EMOJIS**.
-5. Include {{{{9667589247}}}}.
-6. **Image Prompt**: Include a detailed prompt for generating a matching banner image.
+    if variation_index > 0:
+        parts.append(f"\n\nVARIATION {variation_index + 1}: Make it UNIQUE from previous ones.")
 
-Make it highly creative and conversion-focused!
-"""
+    return "".join(parts)
 
-    if params.merlinMode and params.additionalContext:
-        prompt += f"\n\nADDITIONAL CONTEXT:\n{params.additionalContext}"
 
-    if variation_index > 0:
-        prompt += f"\n\nVARIATION {variation_index + 1}: Make it UNIQUE from previous ones."
+# Provider SDKs are blocking; run them on a dedicated pool so the event loop keeps
+# serving /lint, /trend-insights and /health while generations are in flight.
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "16"))
+GENERATION_MAX_IN_FLIGHT = int(os.getenv("GENERATION_MAX_IN_FLIGHT", str(GENERATION_WORKERS)))
+GENERATION_EXECUTOR = ThreadPoolExecutor(max_workers=GENERATION_WORKERS, thread_name_prefix="generation")
+GENERATION_SLOTS = asyncio.Semaphore(GENERATION_MAX_IN_FLIGHT)
+
+
+@app.on_event("shutdown")
+def _stop_generation_executor() -> None:
+    GENERATION_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
+
+# Every upstream call takes a slot from an AIMD limiter: the limit grows while calls succeed
+# at normal latency and is cut on 429s, 5xx, timeouts or a latency climb. Its ceiling is the
+# static GENERATION_MAX_IN_FLIGHT cap unless LLM_LIMIT_MAX says otherwise.
+LLM_LIMITER = limiter_from_env(max_limit=int(os.getenv("LLM_LIMIT_MAX", str(GENERATION_MAX_IN_FLIGHT))))
+
+# LLM_PROVIDER=gemini (default) | stub; the stub serves schema-valid JSON offline for load tests.
+_llm_client: Optional[LLMProvider] = None
+_llm_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMProvider:
+    """The shared client; built at startup, or on first use outside the app lifecycle."""
+    global _llm_client
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                _llm_client = provider_from_env(default="gemini", schema="components", limiter=LLM_LIMITER)
+    return _llm_client
+
+
+@app.on_event("shutdown")
+def _close_llm_client() -> None:
+    if _llm_client is not None:
+        _llm_client.close()
+
+
+def _call_llm(full_prompt: str) -> str:
+    return get_llm_client().generate(full_prompt)
 
-    return prompt
+
+def _call_llm_stream(full_prompt: str) -> Iterator[str]:
+    return get_llm_client().stream(full_prompt)
+
+
+# Repeat requests (same normalized CampaignRequest) are answered from memory, then disk.
+RESPONSE_CACHE = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+    disk_path=Path(os.environ["RESPONSE_CACHE_PATH"]) if os.getenv("RESPONSE_CACHE_PATH") else None,
+)
+# Lint options only change post-processing, so linted and plain requests share a cache entry.
+CACHE_EXCLUDED_FIELDS = ("bypassCache", "lint", "lintRules", "lintRetries")
+GENERATION_FLIGHTS = SingleFlight()
+
+
+@app.on_event("shutdown")
+def _close_response_cache() -> None:
+    RESPONSE_CACHE.close()
+
+
+@app.get("/generate-campaign-ai/cache")
+def response_cache_stats() -> dict:
+    return {**RESPONSE_CACHE.stats(), "single_flight": GENERATION_FLIGHTS.stats()}
+
+
+@app.get("/generate-campaign-ai/limiter")
+def llm_limiter_stats() -> dict:
+    """Current adaptive concurrency limit, calls in flight and queue depth for this worker."""
+    return LLM_LIMITER.stats()
+
+
+def _llm_outcome(exc: BaseException) -> str:
+    if isinstance(exc, LimiterRejected):
+        return "shed"
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError)) or "timeout" in type(exc).__name__.lower() or "deadline" in type(exc).__name__.lower():
+        return "timeout"
+    status_code = getattr(exc, "status_code", None) if isinstance(exc, ProviderError) else getattr(exc, "code", None)
+    if status_code == 429:
+        return "rate_limited"
+    if isinstance(status_code, int) and status_code >= 500:
+        return "upstream_error"
+    return "error"
+
+
+async def _generate_off_loop(full_prompt: str) -> str:
+    LLM_PROMPT_CHARS.observe(len(full_prompt))
+    with GENERATION_STAGE_SECONDS.time(stage="llm_queue_wait"):
+        await GENERATION_SLOTS.acquire()
+    try:
+        loop = asyncio.get_running_loop()
+        with GENERATION_STAGE_SECONDS.time(stage="llm_call"):
+            raw_text = await loop.run_in_executor(GENERATION_EXECUTOR, _call_llm, full_prompt)
+    except Exception as exc:
+        LLM_CALLS.inc(mode="unary", outcome=_llm_outcome(exc))
+        raise
+    finally:
+        GENERATION_SLOTS.release()
+    LLM_CALLS.inc(mode="unary", outcome="ok")
+    LLM_RESPONSE_CHARS.observe(len(raw_text))
+    return raw_text
+
+
+_STREAM_END = object()
+
+
+async def _stream_off_loop(full_prompt: str) -> AsyncIterator[str]:
+    """Iterate the blocking provider stream on the generation pool, yielding chunks on the loop."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    abandoned = threading.Event()
+
+    def produce() -> None:
+        try:
+            for text in _call_llm_stream(full_prompt):
+                if abandoned.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, text)
+        except Exception as exc:
+            loop.call_soon_threadsafe(queue.put_nowait, exc)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+
+    LLM_PROMPT_CHARS.observe(len(full_prompt))
+    received = 0
+    async with GENERATION_SLOTS:
+        loop.run_in_executor(GENERATION_EXECUTOR, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    LLM_CALLS.inc(mode="stream", outcome=_llm_outcome(item))
+                    raise item
+                received += len(item)
+                yield item
+            LLM_CALLS.inc(mode="stream", outcome="ok")
+            LLM_RESPONSE_CHARS.observe(received)
+        finally:
+            # Client went away or upstream failed: stop pulling chunks.
+            abandoned.set()
 
 
 @app.post("/generate-campaign-ai", response_model=CampaignResponse)
 async def generate_campaign_ai(req: CampaignRequest):
-    import google.generativeai as genai
-    import os
-    import datetime
-    
-    # Gemini Configuration
-    # Using the key provided by the user
-    gemini_key = os.getenv("GEMINI_API_KEY", "YOUR_GEMINI_API_KEY")
-    genai.configure(api_key=gemini_key)
+    return await _generate_campaign(req)
+
+
+def _body_line(line: str) -> str:
+    return line if line.startswith(("👉", "✔")) else f"👉 {line}"
+
+
+def format_components_to_text(components: List[dict], bullets: bool = True) -> str:
+    """
+    Plain-text rendering of components, matching the frontend's formatComponentsToText:
+    body lines get a 👉 bullet unless they already start with 👉 or ✔. `bullets=False`
+    leaves body lines as the model wrote them.
+    """
+    blocks = []
+    for component in components:
+        if not isinstance(component, dict):
+            continue
+        body = component.get("body", "")
+        if isinstance(body, list):
+            body = "\n".join(_body_line(str(line)) if bullets else str(line) for line in body)
+        emoji = component.get("emoji")
+        blocks.append(
+            f"{f'{emoji} ' if emoji else ''}{component.get('category', '')}\n"
+            f"{component.get('hook', '')}\n"
+            f"{body}\n"
+            f"CTA: {component.get('cta', '')}"
+        )
+    return "\n\n".join(blocks)
+
 
-    # Model Configuration
-    # Using gemini-1.5-flash for speed and quality, or gemini-pro
-    model = genai.GenerativeModel('gemini-1.5-flash')
+def _build_full_prompt(req: CampaignRequest) -> str:
+    with GENERATION_STAGE_SECONDS.time(stage="prompt_build"):
+        return _assemble_full_prompt(req)
 
+
+def _assemble_full_prompt(req: CampaignRequest) -> str:
     system_prompt = build_system_prompt(
         req.tonality, 
         req.language, 
@@ -666,82 +1099,489 @@ async def generate_campaign_ai(req: CampaignRequest):
         req.variationIndex or 0,
         req.merlinMode,
         req.additionalContext,
-        req.vertical
+        req.vertical,
+        _retrieval_query(req),
     )
     user_prompt = build_user_prompt(req, req.variationIndex or 0)
 
     # Combine system and user prompt for Gemini (or use system_instruction if supported by lib version)
     # For simplicity and compatibility, we'll combine them.
-    full_prompt = f"{system_prompt}\n\nUSER REQUEST:\n{user_prompt}"
+    return f"{system_prompt}\n\nUSER REQUEST:\n{user_prompt}"
+
+
+def _parse_json_reply(raw_message: str) -> dict:
+    clean_json = raw_message.replace("```json", "").replace("```", "").strip()
+    return json.loads(clean_json)
+
 
+def _finalize_generation(req: CampaignRequest, raw_text: str) -> CampaignResponse:
+    """Parse the model reply, log it and shape the CampaignResponse."""
+    import datetime
+
+    parse_started = time.perf_counter()
+    raw_message = raw_text.strip()
+    
+    # Try to parse JSON
+    components = []
+    notes = ""
+    image_prompt = ""
     try:
-        response = model.generate_content(
-            full_prompt,
-            generation_config=genai.types.GenerationConfig(
-                candidate_count=1,
-                max_output_tokens=800,
-                temperature=0.8,
-                top_p=0.9,
-                top_k=40,
-                response_mime_type="application/json" # Enforce JSON output
-            )
-        )
+        parsed = _parse_json_reply(raw_message)
+        components = parsed.get("components", [])
+        notes = parsed.get("notes", "")
+        image_prompt = parsed.get("image_prompt", "")
+    except:
+        print("Failed to parse JSON response, falling back to raw text")
+    
+    formatted_message = raw_message
+    if components:
+        formatted_message = format_components_to_text(components)
+    GENERATION_STAGE_SECONDS.observe(time.perf_counter() - parse_started, stage="parse")
 
-        raw_message = response.text.strip()
-        
-        # Try to parse JSON
-        components = []
-        notes = ""
-        image_prompt = ""
-        try:
-            clean_json = raw_message.replace("```json", "").replace("```", "").strip()
-            parsed = json.loads(clean_json)
-            components = parsed.get("components", [])
-            notes = parsed.get("notes", "")
-            image_prompt = parsed.get("image_prompt", "")
-        except:
-            print("Failed to parse JSON response, falling back to raw text")
-        
-        formatted_message = raw_message
-        if components:
-            formatted_message = format_components_to_text(components)
+    # Generate Image Prompt if missing (Gemini might have skipped it)
+    if not image_prompt:
+         image_prompt = f"Professional educational banner for {req.vertical} exam preparation. Red and white theme. Text: '{req.vertical} Exam'."
+
+    # LOGGING / STORAGE
+    history_started = time.perf_counter()
+    try:
+        log_entry = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "request": req.dict(),
+            "response_raw": raw_message,
+            "components": components,
+            "image_prompt": image_prompt,
+            "model": get_llm_client().model_name
+        }
+        GENERATION_HISTORY_LOG.write(log_entry)
+    except Exception as log_err:
+        print(f"Logging failed: {log_err}")
+    GENERATION_STAGE_SECONDS.observe(time.perf_counter() - history_started, stage="history_write")
+
+    # Inject image prompt into notes
+    if image_prompt:
+        notes += f" [Image Prompt: {image_prompt}]"
+
+    return CampaignResponse(
+        message=formatted_message if not req.merlinMode else raw_message,
+        components=components,
+        notes=notes,
+        model=get_llm_client().model_name,
+        tokens={"total_tokens": 0} # Gemini doesn't always return token usage in simple response
+    )
+
+
+def _cached_response(req: CampaignRequest, cache_key: str) -> Optional[CampaignResponse]:
+    if req.bypassCache:
+        RESPONSE_CACHE.record_bypass()
+        return None
+    cached = RESPONSE_CACHE.get(cache_key)
+    return CampaignResponse(**cached) if cached is not None else None
 
-        # Generate Image Prompt if missing (Gemini might have skipped it)
-        if not image_prompt:
-             image_prompt = f"Professional educational banner for {req.vertical} exam preparation. Red and white theme. Text: '{req.vertical} Exam'."
 
-        # LOGGING / STORAGE
+async def _generate_uncached(req: CampaignRequest, cache_key: str) -> CampaignResponse:
+    full_prompt = _build_full_prompt(req)
+    raw_text = await _generate_off_loop(full_prompt)
+    result = _finalize_generation(req, raw_text)
+    RESPONSE_CACHE.set(cache_key, result.dict())
+    return result
+
+
+async def _generate_campaign(req: CampaignRequest) -> CampaignResponse:
+    with GENERATION_STAGE_SECONDS.time(stage="cache_lookup"):
+        cache_key = request_cache_key(req.dict(), exclude=CACHE_EXCLUDED_FIELDS)
+        response = _cached_response(req, cache_key)
+    if response is None:
         try:
-            log_entry = {
-                "timestamp": datetime.datetime.now().isoformat(),
-                "request": req.dict(),
-                "response_raw": raw_message,
-                "components": components,
-                "image_prompt": image_prompt,
-                "model": "gemini-1.5-flash"
-            }
-            with open(BASE_DIR / "generation_history.jsonl", "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
-        except Exception as log_err:
-            print(f"Logging failed: {log_err}")
-
-        # Inject image prompt into notes
-        if image_prompt:
-            notes += f" [Image Prompt: {image_prompt}]"
-
-        return CampaignResponse(
-            message=formatted_message if not req.merlinMode else raw_message,
-            components=components,
-            notes=notes,
-            model="gemini-1.5-flash",
-            tokens={"total_tokens": 0} # Gemini doesn't always return token usage in simple response
+            # Identical requests already in flight share that upstream call (and its failure).
+            response = await GENERATION_FLIGHTS.do(cache_key, lambda: _generate_uncached(req, cache_key))
+
+        except Exception as e:
+            print(f"Error generating campaign: {e}")
+            return CampaignResponse(
+                message=f"Error generating campaign: {str(e)}",
+                model="error"
+            )
+
+    if req.lint:
+        retries = min(max(req.lintRetries or 0, 0), LINT_RETRY_MAX)
+        with GENERATION_STAGE_SECONDS.time(stage="lint"):
+            response = await _lint_campaign(req, cache_key, response, retries)
+    return response
+
+
+# --- Fused Generate + Lint ---
+
+LINT_RETRY_MAX = int(os.getenv("LINT_RETRY_MAX", "2"))
+
+_LINT_FIX_PROMPT = """
+
+LINT FIX REQUEST:
+Component {index} ("{category}") failed these checks:
+{problems}
+Rewrite ONLY this component so it passes, keeping its category, language and intent:
+{component}
+Return JSON: {{"components": [<the rewritten component>]}}"""
+
+
+# Generated copy follows the push system prompt, which forbids emojis; lintRules override this.
+PUSH_LINT_RULES = LintRules(min_emojis=0, max_emojis=0)
+
+
+def _lint_rules(req: CampaignRequest) -> dict:
+    return (req.lintRules or PUSH_LINT_RULES).dict()
+
+
+def _lint_component(component: dict, rules: dict) -> dict:
+    """
+    Lint the text the model wrote, not the frontend's rendering of it.
+
+    The text is the server rendering without the 👉 bullets the UI puts before
+    body lines. Those bullets are added after generation, so they are not
+    counted against the push prompt's no-emoji rule, and they do not satisfy
+    `require_cta` either. The CTA check looks at the component's cta field
+    instead, where the prompt asks for it. Every error left is one the model
+    can fix within its prompt, so lintRetries does not spend calls on
+    rewrites that cannot pass.
+    """
+    report = lint_text(format_components_to_text([component], bullets=False), {**rules, "require_cta": False})
+    if rules["require_cta"] and not str(component.get("cta") or "").strip():
+        report["issues"].insert(0, {"severity": "error", "message": "CTA missing. Fill the component's cta line.", "suggestion": None})
+    return report
+
+
+def _hard_errors(report: dict) -> List[dict]:
+    return [issue for issue in report["issues"] if issue["severity"] == "error"]
+
+
+async def _relint_component(full_prompt: str, index: int, component: dict, report: dict, rules: dict) -> Tuple[dict, dict]:
+    """Ask the model to rewrite one failing component; keep it only if it has fewer errors."""
+    errors = _hard_errors(report)
+    prompt = full_prompt + _LINT_FIX_PROMPT.format(
+        index=index + 1,
+        category=component.get("category", ""),
+        problems="\n".join(f"- {issue['message']}" for issue in errors),
+        component=json.dumps(component, ensure_ascii=False),
+    )
+    raw_text = await _generate_off_loop(prompt)
+    try:
+        candidates = _parse_json_reply(raw_text.strip()).get("components") or []
+    except (ValueError, AttributeError):
+        return component, report
+    if not candidates or not isinstance(candidates[0], dict):
+        return component, report
+    candidate = candidates[0]
+    candidate_report = _lint_component(candidate, rules)
+    if len(_hard_errors(candidate_report)) < len(errors):
+        return candidate, candidate_report
+    return component, report
+
+
+async def _lint_campaign(req: CampaignRequest, cache_key: str, response: CampaignResponse, retries: int) -> CampaignResponse:
+    """Attach per-component lint reports, optionally regenerating components with hard errors."""
+    rules = _lint_rules(req)
+    components = [component for component in response.components if isinstance(component, dict)]
+    reports = [_lint_component(component, rules) for component in components]
+
+    retried = 0
+    repaired = set()
+    full_prompt = None
+    for _ in range(retries):
+        failing = [index for index, report in enumerate(reports) if _hard_errors(report)]
+        if not failing:
+            break
+        full_prompt = full_prompt or _build_full_prompt(req)
+        retried += len(failing)
+        outcomes = await asyncio.gather(
+            *(_relint_component(full_prompt, index, components[index], reports[index], rules) for index in failing),
+            return_exceptions=True,
         )
+        for index, outcome in zip(failing, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"Lint retry for component {index} failed: {outcome}")
+                continue
+            if outcome[0] is not components[index]:
+                repaired.add(index)
+            components[index], reports[index] = outcome
+
+    update = {}
+    if repaired:
+        update["components"] = components
+        if not req.merlinMode:
+            update["message"] = format_components_to_text(components)
+        # Later requests (linted or not) start from the repaired campaign.
+        RESPONSE_CACHE.set(cache_key, response.copy(update=update).dict())
+
+    failed = sum(1 for report in reports if _hard_errors(report))
+    update["components"] = [{**component, "lint": report} for component, report in zip(components, reports)]
+    update["lint"] = {
+        "passed": len(reports) - failed,
+        "failed": failed,
+        "retried": retried,
+        "repaired": len(repaired),
+    }
+    return response.copy(update=update)
+
+
+# --- Streaming Generation ---
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {dumps_str(data)}\n\n"
+
+
+async def _campaign_events(req: CampaignRequest) -> AsyncIterator[str]:
+    cache_key = request_cache_key(req.dict(), exclude=CACHE_EXCLUDED_FIELDS)
+    cached = _cached_response(req, cache_key)
+    rules = _lint_rules(req) if req.lint else None
+
+    def component_event(index: int, component: dict) -> str:
+        data = {"index": index, "component": component}
+        if rules is not None and isinstance(component, dict):
+            data["lint"] = _lint_component(component, rules)
+        return _sse("component", data)
+
+    if cached is not None:
+        for index, component in enumerate(cached.components):
+            yield component_event(index, component)
+        if req.lint:
+            cached = await _lint_campaign(req, cache_key, cached, retries=0)
+        yield _sse("done", cached.dict())
+        return
+
+    full_prompt = _build_full_prompt(req)
+    parser = ComponentStreamParser()
+    emitted = 0
+    try:
+        async for text in _stream_off_loop(full_prompt):
+            yield _sse("delta", {"text": text})
+            for component in parser.feed(text):
+                yield component_event(emitted, component)
+                emitted += 1
+        result = _finalize_generation(req, parser.buffer)
+        RESPONSE_CACHE.set(cache_key, result.dict())
+        if req.lint:
+            # Streamed components are already on screen, so no lint retries here.
+            result = await _lint_campaign(req, cache_key, result, retries=0)
+        yield _sse("done", result.dict())
     except Exception as e:
-        print(f"Error generating campaign: {e}")
-        return CampaignResponse(
-            message=f"Error generating campaign: {str(e)}",
-            model="error"
+        print(f"Error streaming campaign: {e}")
+        yield _sse("error", CampaignResponse(message=f"Error generating campaign: {str(e)}", model="error").dict())
+
+
+@app.post("/generate-campaign-ai/stream")
+async def generate_campaign_ai_stream(req: CampaignRequest) -> StreamingResponse:
+    """SSE variant: `delta` events carry raw text, `component` events each finished
+    component (plus its `lint` report when requested), and a final `done` event
+    carries the full CampaignResponse."""
+    return StreamingResponse(
+        _campaign_events(req),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- Batch Generation ---
+
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+
+class CampaignBatchRequest(BaseModel):
+    requests: List[CampaignRequest] = Field(default_factory=list)
+    request: Optional[CampaignRequest] = None  # Expanded into `variations` copies with increasing variationIndex
+    variations: int = Field(1, ge=1, le=BATCH_MAX_ITEMS)
+    concurrency: Optional[int] = None
+
+
+class CampaignBatchItem(BaseModel):
+    index: int
+    variationIndex: int = 0
+    response: Optional[CampaignResponse] = None
+    error: Optional[str] = None
+
+
+class CampaignBatchResponse(BaseModel):
+    results: List[CampaignBatchItem]
+    succeeded: int
+    failed: int
+
+
+def _batch_size(batch: CampaignBatchRequest) -> int:
+    return len(batch.requests) + (batch.variations if batch.request is not None else 0)
+
+
+def _expand_batch(batch: CampaignBatchRequest) -> List[CampaignRequest]:
+    items = list(batch.requests)
+    if batch.request is not None:
+        base_index = batch.request.variationIndex or 0
+        items.extend(
+            batch.request.copy(update={"variationIndex": base_index + offset})
+            for offset in range(batch.variations)
         )
+    return items
+
+
+@app.post("/generate-campaign-ai/batch", response_model=CampaignBatchResponse)
+async def generate_campaign_batch(batch: CampaignBatchRequest) -> CampaignBatchResponse:
+    """Generate many campaigns concurrently; total time tracks the slowest item, not the sum."""
+    size = _batch_size(batch)
+    if not size:
+        raise HTTPException(status_code=400, detail="Provide `requests` or `request` + `variations`.")
+    # Checked before expanding, so an oversized batch never builds its copies.
+    if size > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch has {size} items (max {BATCH_MAX_ITEMS}).")
+    items = _expand_batch(batch)
+
+    concurrency = min(batch.concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    gate = asyncio.Semaphore(max(concurrency, 1))
+
+    async def run_one(index: int, item: CampaignRequest) -> CampaignBatchItem:
+        async with gate:
+            try:
+                response = await _generate_campaign(item)
+            except Exception as exc:
+                return CampaignBatchItem(index=index, variationIndex=item.variationIndex or 0, error=str(exc))
+        if response.model == "error":
+            return CampaignBatchItem(index=index, variationIndex=item.variationIndex or 0, error=response.message)
+        return CampaignBatchItem(index=index, variationIndex=item.variationIndex or 0, response=response)
+
+    results = await asyncio.gather(*(run_one(index, item) for index, item in enumerate(items)))
+    failed = sum(1 for item in results if item.error is not None)
+    return CampaignBatchResponse(results=results, succeeded=len(results) - failed, failed=failed)
+
 
+# --- Metrics ---
+
+def _stats_samples(stats: dict, keys: List[str]) -> List[Tuple[Tuple[str, ...], float]]:
+    return [((key,), float(stats.get(key, 0))) for key in keys]
+
+
+METRICS.gauge(
+    "marcom_response_cache_events",
+    "Response cache lookups by result (memory_hits, disk_hits, misses, bypassed) since start.",
+    lambda: _stats_samples(RESPONSE_CACHE.stats(), ["memory_hits", "disk_hits", "misses", "bypassed"]),
+    ("result",),
+)
+METRICS.gauge("marcom_response_cache_hit_ratio", "Share of response cache lookups served from memory or disk.", lambda: [((), RESPONSE_CACHE.stats()["hit_ratio"])])
+METRICS.gauge("marcom_response_cache_memory_entries", "Entries held in the in-memory response cache.", lambda: [((), RESPONSE_CACHE.stats()["memory_entries"])])
+METRICS.gauge(
+    "marcom_single_flight_calls",
+    "Coalesced generation calls (leaders ran upstream, followers shared a result) since start.",
+    lambda: _stats_samples(GENERATION_FLIGHTS.stats(), ["leaders", "followers", "failures", "in_flight"]),
+    ("kind",),
+)
+METRICS.gauge(
+    "marcom_log_sink_records",
+    "JSONL log sink counters since start.",
+    lambda: [
+        ((sink.path.name, key), float(sink.stats[key]))
+        for sink in (GENERATION_HISTORY_LOG, MOENGAGE_LOG)
+        for key in ("written", "dropped", "errors", "rotations")
+    ],
+    ("log", "kind"),
+)
+METRICS.gauge("marcom_llm_concurrency_limit", "Current adaptive limit on concurrent LLM calls.", lambda: [((), LLM_LIMITER.limit)])
+METRICS.gauge(
+    "marcom_llm_limiter",
+    "Adaptive LLM limiter state (in_flight, queue_depth) and counters since start.",
+    lambda: _stats_samples(LLM_LIMITER.stats(), ["in_flight", "queue_depth", "queued", "rejected", "timed_out", "increases", "decreases"]),
+    ("kind",),
+)
+def _resilience_samples() -> List[Tuple[Tuple[str, ...], float]]:
+    if not isinstance(_llm_client, ResilientProvider):
+        return []
+    stats = _llm_client.stats()
+    return _stats_samples(stats, list(stats))
+
+
+METRICS.gauge("marcom_llm_resilience", "Upstream retries and hedges (fired, won, denied by budget) since start.", _resilience_samples, ("kind",))
+METRICS.gauge("marcom_trend_stream_subscribers", "Connected /trend-insights/stream clients.", lambda: [((), TREND_FEED.subscriber_count())])
+METRICS.gauge("marcom_events_response_cache_hits", "Cached /edtech-events bodies served.", lambda: [((), _events_response.cache_info().hits)])
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# --- Warm-up ---
+# Importing the module does not preload. Read-only state is built either by a pre-fork
+# server hook (gunicorn.conf.py calls preload(freeze_gc=True) in the master, so workers
+# share it copy-on-write) or, failing that, by each worker at startup. Clients and process
+# pools are per worker and are warmed after the worker starts; /ready answers 503 until
+# that finishes.
+
+STARTUP = StartupReport()
+PRELOAD_MODULES = [name.strip() for name in os.getenv("PRELOAD_MODULES", "google.generativeai,requests").split(",") if name.strip()]
+LINT_PREWARM = os.getenv("LINT_PREWARM", "0") == "1"
+_worker_warmup: Optional[asyncio.Future] = None
+
+
+def preload(freeze_gc: bool = False) -> None:
+    """Build the shared read-only state. Pass `freeze_gc` only from a parent that is about to fork workers."""
+    started = time.perf_counter()
+    for module in PRELOAD_MODULES:
+        STARTUP.import_module(module)
+    with STARTUP.step("knowledge_base") as entry:
+        KB_INDEX.refresh()
+        entry["examples"] = KB_INDEX.snapshot().example_count
+    with STARTUP.step("trend_feed") as entry:
+        if "directory" in TREND_FEED.source_names():
+            # Topics hand-added to trend_cache.json before it became generated move to trend_sources/ once.
+            migrate_trend_file(TREND_CACHE_PATH, TREND_SOURCES_DIR, [item.dict() for item in _curated_trends()])
+        TREND_FEED.rebuild()
+        TREND_CACHE.refresh()
+        entry["items"] = len(TREND_CACHE.snapshot().items)
+    with STARTUP.step("edtech_events") as entry:
+        today = datetime.utcnow().date()
+        _events_response(today, today, today + timedelta(days=EVENTS_WINDOW_DAYS), None, None, EVENTS_DEFAULT_LIMIT)
+        entry["events"] = len(EVENTS_CALENDAR)
+    with STARTUP.step("prompt_frames") as entry:
+        for tonality in TONALITY_GUIDES:
+            for language in LANGUAGE_GUIDES:
+                system_prompt_frame(tonality, language)
+        entry["frames"] = system_prompt_frame.cache_info().currsize
+    if freeze_gc:
+        # Move everything built so far out of the GC's tracked generations, so collections in
+        # forked workers do not write to (and un-share) these pages.
+        gc.freeze()
+    STARTUP.mark_preloaded(time.perf_counter() - started)
+
+
+def _warm_worker() -> None:
+    if STARTUP.preloaded_pid is None:
+        # No pre-fork hook ran (plain uvicorn): this worker builds its own copy.
+        preload()
+    started = time.perf_counter()
+    with STARTUP.step("llm_client", "worker") as entry:
+        # A failure keeps lint/trends serving; generation retries client setup on first use.
+        entry["provider"] = get_llm_client().name
+    if LINT_PREWARM:
+        with STARTUP.step("lint_pool", "worker") as entry:
+            pool = _get_lint_pool()
+            list(pool.map(lint_many, [[]] * LINT_WORKERS, [{}] * LINT_WORKERS))
+            entry["workers"] = LINT_WORKERS
+    STARTUP.mark_ready(time.perf_counter() - started)
+
+
+@app.on_event("startup")
+async def _start_worker_warmup() -> None:
+    global _worker_warmup
+    _worker_warmup = asyncio.get_running_loop().run_in_executor(None, _warm_worker)
+
+
+@app.get("/ready")
+def ready() -> Response:
+    """Readiness probe: 200 once this worker is warm, 503 before; the body is the startup report."""
+    report = STARTUP.to_dict()
+    return FastJSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+METRICS.gauge("marcom_ready", "1 once this worker finished warming up.", lambda: [((), 1.0 if STARTUP.ready else 0.0)])
+METRICS.gauge(
+    "marcom_startup_step_seconds",
+    "Time spent in each preload / worker warm-up step.",
+    lambda: [((str(entry["phase"]), str(entry["name"])), float(entry["seconds"])) for entry in STARTUP.steps],
+    ("phase", "step"),
+)
 
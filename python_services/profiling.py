@@ -0,0 +1,211 @@
+"""
+Opt-in, per-request profiling for debugging slow calls.
+
+`ProfileMiddleware` is only installed when PROFILE_TOKEN is set, so a normal
+deployment pays nothing. When installed, a request is profiled only if it
+carries `X-Profile` and an `X-Profile-Token` equal to that token; any other
+request (including one with a wrong token) runs untouched.
+
+Profiling is sampling-based: a background thread snapshots every thread's
+stack (`sys._current_frames`) each `interval` seconds while the request runs.
+That covers work the request hands to thread pools (sync endpoints, LLM
+calls, lint), which cProfile would miss since it only sees the thread that
+enabled it. Samples are wall-clock, so time blocked on the upstream LLM shows
+up next to CPU work such as prompt building, validation and JSON parsing.
+Idle threads are skipped, but anything else the worker is
+doing at the same time shows up too, so profile on a quiet worker. Only one
+request per worker is profiled at a time.
+
+Each report is stored under `directory` as `<name>.txt` (top functions by
+self and total samples) and `<name>.folded` (collapsed stacks, for
+flamegraph.pl / speedscope); the response carries `X-Profile-Report: <name>`.
+`X-Profile: inline` returns the text report instead of the response body.
+"""
+
+from __future__ import annotations
+
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+Stack = Tuple[str, ...]
+
+# (file name, function) pairs where a thread is parked rather than working.
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES
+
+
+class StackSampler:
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._switch_interval = 0.0
+        self.elapsed = 0.0
+
+    def start(self) -> None:
+        # CPU-bound threads only give up the GIL every switch interval (5 ms by
+        # default); shorten it while sampling so ticks are not starved.
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or _is_idle(frame):
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def report(self, title: str, limit: int = 40) -> str:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+        busy = sum(self.stacks.values())
+        lines = [
+            title,
+            f"{self.elapsed * 1000:.1f} ms wall, {self.samples} ticks every {self.interval * 1000:g} ms, {busy} busy thread samples",
+            "",
+            f"{'self %':>7} {'total %':>8}  function",
+        ]
+        busy = busy or 1
+        for label, count in own.most_common(limit):
+            lines.append(f"{100 * count / busy:7.1f} {100 * total[label] / busy:8.1f}  {label}")
+        lines += ["", "By total (inclusive) samples:", f"{'total %':>8}  function"]
+        for label, count in total.most_common(limit):
+            lines.append(f"{100 * count / busy:8.1f}  {label}")
+        return "\n".join(lines) + "\n"
+
+
+class ProfileMiddleware:
+    """ASGI middleware; see the module docstring for the request protocol."""
+
+    def __init__(self, app, token: str, directory: Path, interval: float = 0.001, limit: int = 40):
+        if not token:
+            raise ValueError("ProfileMiddleware needs a non-empty token")
+        self.app = app
+        self.token = token.encode("utf-8")
+        self.directory = Path(directory)
+        self.interval = interval
+        self.limit = limit
+        self._busy = threading.Lock()
+
+    def _requested_mode(self, scope) -> Optional[str]:
+        mode = None
+        supplied = b""
+        for name, value in scope.get("headers", ()):
+            if name == b"x-profile":
+                mode = value.decode("latin-1").strip().lower()
+            elif name == b"x-profile-token":
+                supplied = value
+        if not mode or mode in ("0", "false", "off"):
+            return None
+        if not hmac.compare_digest(supplied, self.token):
+            return None
+        return "inline" if mode == "inline" else "store"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = self._requested_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            print("Profile skipped: another request is being profiled on this worker")
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send, mode)
+        finally:
+            self._busy.release()
+
+    async def _profile(self, scope, receive, send, mode: str) -> None:
+        method = scope.get("method", "")
+        path = scope.get("path", "")
+        name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{method}{path.replace('/', '_')}"
+        report_header = (b"x-profile-report", name.encode("latin-1"))
+        status: Dict[str, int] = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if mode == "inline":
+                    return
+                message = {**message, "headers": [*message.get("headers", ()), report_header]}
+            elif mode == "inline":
+                return
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            report = sampler.report(f"{method} {path} -> {status['code']}", self.limit)
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                (self.directory / f"{name}.txt").write_text(report, encoding="utf-8")
+                (self.directory / f"{name}.folded").write_text(sampler.folded(), encoding="utf-8")
+            except OSError as exc:
+                print(f"Could not store profile {name}: {exc}")
+        if mode == "inline":
+            body = report.encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    report_header,
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
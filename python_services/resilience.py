@@ -0,0 +1,110 @@
+"""
+Retry, backoff and hedging policy for upstream LLM calls.
+
+Campaign generation has no side effects upstream, so a call can be retried
+or duplicated safely. Two budgets keep that from multiplying cost:
+
+  * retries  - only for transient errors (429, 5xx, timeouts), with full
+               jitter exponential backoff, and at most `retry_ratio` retries
+               per call on average (a token bucket refilled by every call),
+               so an outage does not turn into a retry storm.
+  * hedging  - when an attempt is still running after the recent p95
+               latency, a second identical request is sent and whichever
+               answers first wins. Capped at `hedge_ratio` hedges per call.
+
+Every call also has an overall `call_budget` in seconds covering all its
+attempts, backoff sleeps and hedges.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional
+
+
+class BudgetExhausted(TimeoutError):
+    """The call's time budget ran out before any attempt succeeded."""
+
+
+@dataclass(frozen=True)
+class ResiliencePolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    call_budget: float = 60.0
+    attempt_timeout: float = 30.0
+    retry_ratio: float = 0.2
+    hedge: bool = True
+    hedge_quantile: float = 0.95
+    hedge_min_delay: float = 1.0
+    hedge_min_samples: int = 20
+    hedge_ratio: float = 0.1
+
+    @classmethod
+    def from_env(cls) -> "ResiliencePolicy":
+        return cls(
+            max_attempts=int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", cls.max_attempts)),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", cls.base_delay)),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", cls.max_delay)),
+            call_budget=float(os.getenv("LLM_CALL_BUDGET", cls.call_budget)),
+            attempt_timeout=float(os.getenv("LLM_ATTEMPT_TIMEOUT", cls.attempt_timeout)),
+            retry_ratio=float(os.getenv("LLM_RETRY_RATIO", cls.retry_ratio)),
+            hedge=os.getenv("LLM_HEDGE", "1") != "0",
+            hedge_quantile=float(os.getenv("LLM_HEDGE_QUANTILE", cls.hedge_quantile)),
+            hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", cls.hedge_min_delay)),
+            hedge_min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", cls.hedge_min_samples)),
+            hedge_ratio=float(os.getenv("LLM_HEDGE_RATIO", cls.hedge_ratio)),
+        )
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: random.Random = random) -> float:
+    """Full jitter: uniform in [0, min(cap, base * 2**attempt)]."""
+    return rng.uniform(0.0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBudget:
+    """Each call deposits `ratio` tokens (up to `max_tokens`); each retry or hedge spends one."""
+
+    def __init__(self, ratio: float, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+class LatencyWindow:
+    """Latencies of the last `size` successful attempts, for the hedge delay."""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._sorted: Optional[List[float]] = None
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self._sorted = None
+
+    def quantile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < min_samples or not self._samples:
+                return None
+            if self._sorted is None:
+                self._sorted = sorted(self._samples)
+            index = min(int(q * len(self._sorted)), len(self._sorted) - 1)
+            return self._sorted[index]
@@ -0,0 +1,181 @@
+"""
+Two-tier response cache for campaign generation.
+
+Tier 1 is an in-process LRU; tier 2 is an optional SQLite file that survives
+restarts and is shared by every worker on the host. Entries carry their own
+expiry, and disk hits are promoted back into memory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from json_codec import dumps_str, loads
+
+
+def request_cache_key(payload: dict, exclude: Iterable[str] = ()) -> str:
+    """Stable hash of a request body: trims strings and ignores empty/None fields."""
+    skipped = set(exclude)
+
+    def normalize(value):
+        if isinstance(value, str):
+            return value.strip()
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items() if v not in (None, "", [], {})}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        return value
+
+    body = {k: normalize(v) for k, v in payload.items() if k not in skipped and v not in (None, "", [], {})}
+    encoded = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=20).hexdigest()
+
+
+class _DiskTier:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        # A SQLite handle must not cross fork() (e.g. a server that preloads the
+        # app before forking workers): each child opens its own.
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reopen)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        conn.commit()
+        return conn
+
+    def _reopen(self) -> None:
+        # The parent's handle is left alone (closing it here could disturb the parent's file state).
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def get(self, key: str, now: float) -> Optional[Tuple[float, dict]]:
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at, value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[0] <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return row[0], loads(row[1])
+
+    def set(self, key: str, expires_at: float, value: dict) -> None:
+        encoded = dumps_str(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, expires_at, encoded),
+            )
+            self._conn.commit()
+
+    def purge_expired(self, now: float) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self._conn.commit()
+            return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """Memory LRU in front of an optional on-disk tier, with per-entry TTL and hit/miss counters."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0, disk_path: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(disk_path) if disk_path else None
+        self._stats: Dict[str, int] = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "bypassed": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self._disk is not None
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+
+        if self._disk is not None:
+            try:
+                found = self._disk.get(key, now)
+            except sqlite3.Error as exc:
+                print(f"Response cache disk read failed: {exc}")
+                found = None
+            if found is not None:
+                self._remember(key, found[0], found[1])
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                return found[1]
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: dict, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl_seconds if ttl is None else ttl)
+        self._remember(key, expires_at, value)
+        if self._disk is not None:
+            try:
+                self._disk.set(key, expires_at, value)
+            except sqlite3.Error as exc:
+                print(f"Response cache disk write failed: {exc}")
+        with self._lock:
+            self._stats["stores"] += 1
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._stats["bypassed"] += 1
+
+    def _remember(self, key: str, expires_at: float, value: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        stats["disk_enabled"] = self._disk is not None
+        return stats
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.purge_expired(time.time())
+            self._disk.close()
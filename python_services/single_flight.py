@@ -0,0 +1,45 @@
+"""
+Single-flight coalescing for identical in-flight async calls.
+
+The first caller for a key starts the work as its own task; callers that
+arrive while it is running await the same task. The shared task is shielded,
+so a caller that disconnects does not cancel it for everyone else, and a
+failure is delivered to every waiter before the key is released.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._stats = {"leaders": 0, "followers": 0, "failures": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._stats["leaders"] += 1
+            task.add_done_callback(lambda done, key=key: self._release(key, done))
+        else:
+            self._stats["followers"] += 1
+        return await asyncio.shield(task)
+
+    def _release(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception retrieved even if every waiter has gone away.
+        if not task.cancelled() and task.exception() is not None:
+            self._stats["failures"] += 1
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict:
+        return {**self._stats, "in_flight": len(self._calls)}
@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# The service modules are imported flat, the way uvicorn runs them from python_services/.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("LLM_PROVIDER", "stub")
@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from adaptive_limit import IGNORE, OK, OVERLOAD, AdaptiveLimiter, LimiterRejected
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def test_limit_grows_while_saturated_and_successful():
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=4)
+    for _ in range(20):
+        for _ in range(limiter.limit):
+            limiter.acquire()
+        for _ in range(limiter.limit):
+            limiter.release(OK)
+    assert limiter.limit == 4
+    assert limiter.stats()["increases"] == 2
+
+
+def test_limit_does_not_grow_when_not_in_use():
+    limiter = AdaptiveLimiter(initial_limit=4, max_limit=16)
+    for _ in range(50):
+        limiter.acquire()
+        limiter.release(OK)
+    assert limiter.limit == 4
+
+
+def test_overload_cuts_the_limit_once_per_round_trip():
+    limiter = AdaptiveLimiter(initial_limit=10, min_limit=2, backoff=0.5)
+    for _ in range(3):
+        limiter.acquire()
+    for _ in range(3):
+        limiter.release(OVERLOAD)
+    assert limiter.limit == 5
+    assert limiter.stats()["decreases"] == 1
+
+
+def test_ignored_outcomes_leave_the_limit_alone():
+    limiter = AdaptiveLimiter(initial_limit=3)
+    limiter.acquire()
+    limiter.release(IGNORE)
+    assert limiter.limit == 3 and limiter.stats()["in_flight"] == 0
+
+
+def test_latency_far_above_baseline_counts_as_overload():
+    limiter = AdaptiveLimiter(initial_limit=8, latency_tolerance=2.0, smoothing=1.0)
+    limiter.acquire()
+    limiter.release(OK, 0.01)
+    limiter.acquire()
+    limiter.release(OK, 0.5)
+    assert limiter.limit == 5
+
+
+def test_waiters_are_served_in_fifo_order():
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    limiter.acquire()
+    order = []
+
+    def waiter(n):
+        limiter.acquire(timeout=5)
+        order.append(n)
+        limiter.release(IGNORE)
+
+    threads = []
+    for n in range(5):
+        thread = threading.Thread(target=waiter, args=(n,))
+        thread.start()
+        threads.append(thread)
+        _wait_for(lambda: limiter.stats()["queue_depth"] == n + 1)
+    limiter.release(IGNORE)
+    for thread in threads:
+        thread.join(5)
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_no_barging_past_queued_waiters():
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    limiter.acquire()
+    got = threading.Event()
+    thread = threading.Thread(target=lambda: (limiter.acquire(timeout=5), got.set()))
+    thread.start()
+    _wait_for(lambda: limiter.stats()["queue_depth"] == 1)
+    limiter.release(IGNORE)  # handed to the waiter, not left free for a newcomer
+    with pytest.raises(LimiterRejected):
+        limiter.acquire(timeout=0.01)
+    thread.join(5)
+    assert got.is_set()
+
+
+def test_acquire_times_out_and_leaves_the_queue():
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    limiter.acquire()
+    started = time.monotonic()
+    with pytest.raises(LimiterRejected) as excinfo:
+        limiter.acquire(timeout=0.05)
+    assert excinfo.value.reason == "timeout"
+    assert time.monotonic() - started >= 0.05
+    stats = limiter.stats()
+    assert stats["queue_depth"] == 0 and stats["timed_out"] == 1
+    limiter.release(IGNORE)
+    assert limiter.acquire(timeout=0.05) == 0.0
+
+
+def test_full_queue_rejects_immediately():
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1, max_queue=1)
+    limiter.acquire()
+    reasons = []
+
+    def queued():
+        try:
+            limiter.acquire(timeout=0.2)
+        except LimiterRejected as exc:
+            reasons.append(exc.reason)
+
+    thread = threading.Thread(target=queued)
+    thread.start()
+    _wait_for(lambda: limiter.stats()["queue_depth"] == 1)
+    with pytest.raises(LimiterRejected) as excinfo:
+        limiter.acquire(timeout=5)
+    assert excinfo.value.reason == "queue_full"
+    thread.join(5)
+    assert reasons == ["timeout"]
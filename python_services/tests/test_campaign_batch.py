@@ -0,0 +1,50 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import marcom_service
+
+REQUEST = {
+    "campaignType": "push",
+    "vertical": "SSC",
+    "language": "English",
+    "tonality": "Friendly",
+    "audience": "Aspirants",
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def never(batch):
+        raise AssertionError("oversized batch was expanded")
+
+    monkeypatch.setattr(marcom_service, "_expand_batch", never)
+    return TestClient(marcom_service.app)
+
+
+def test_variations_above_the_batch_limit_are_rejected_by_validation(client):
+    response = client.post(
+        "/generate-campaign-ai/batch",
+        json={"request": REQUEST, "variations": marcom_service.BATCH_MAX_ITEMS + 1},
+    )
+    assert response.status_code == 422
+
+
+def test_huge_variation_count_is_rejected_without_expanding(client):
+    response = client.post("/generate-campaign-ai/batch", json={"request": REQUEST, "variations": 10 ** 9})
+    assert response.status_code == 422
+
+
+def test_requests_plus_variations_over_the_limit_is_rejected_before_expanding(client):
+    half = marcom_service.BATCH_MAX_ITEMS // 2 + 1
+    response = client.post(
+        "/generate-campaign-ai/batch",
+        json={"requests": [REQUEST] * half, "request": REQUEST, "variations": half},
+    )
+    assert response.status_code == 400
+    assert f"max {marcom_service.BATCH_MAX_ITEMS}" in response.json()["detail"]
+
+
+def test_variations_expand_with_increasing_variation_index():
+    batch = marcom_service.CampaignBatchRequest(request={**REQUEST, "variationIndex": 2}, variations=3)
+    items = marcom_service._expand_batch(batch)
+    assert [item.variationIndex for item in items] == [2, 3, 4]
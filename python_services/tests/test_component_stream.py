@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from component_stream import ComponentStreamParser
+
+COMPONENTS = [
+    {"category": "FOMO", "hook": "Only {{FIRST_NAME}} gets this", "body": ["Ends {tonight}"], "cta": "Join now"},
+    {"category": "Curiosity", "hook": 'He said "wait}" and left', "body": ["back\\slash \\\" ]["], "cta": "Tap"},
+    {"category": "Urgency", "hook": "नमस्ते", "body": [], "cta": "Call {{9667589247}}", "meta": {"a": [1, {"b": 2}]}},
+]
+REPLY = json.dumps({"components": COMPONENTS, "image_prompt": "banner {x}", "notes": "n"}, ensure_ascii=False)
+
+
+def _feed_in(parser, text, size):
+    found = []
+    for start in range(0, len(text), size):
+        found.extend(parser.feed(text[start:start + size]))
+    return found
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(REPLY)])
+def test_components_split_across_chunks(size):
+    assert _feed_in(ComponentStreamParser(), REPLY, size) == COMPONENTS
+
+
+def test_each_component_is_emitted_as_soon_as_it_closes():
+    parser = ComponentStreamParser()
+    first_end = REPLY.index('"Join now"}') + len('"Join now"}')
+    assert parser.feed(REPLY[:first_end - 1]) == []
+    assert parser.feed(REPLY[first_end - 1:first_end]) == [COMPONENTS[0]]
+
+
+def test_escaped_quotes_and_braces_inside_strings():
+    text = '{"components": [{"hook": "a \\"}\\" b", "body": ["{[", "\\\\"]}]}'
+    assert _feed_in(ComponentStreamParser(), text, 1) == [{"hook": 'a "}" b', "body": ["{[", "\\"]}]
+
+
+def test_truncated_output_yields_only_complete_components():
+    cut = REPLY.index('"Urgency"') + 4
+    parser = ComponentStreamParser()
+    assert _feed_in(parser, REPLY[:cut], 5) == COMPONENTS[:2]
+    assert parser.feed("") == []
+
+
+def test_prose_before_the_json_and_text_after_the_array_are_ignored():
+    text = "Sure! Here you go:\n```json\n" + REPLY + "\n```\n{\"components\": [{\"x\": 1}]}"
+    assert _feed_in(ComponentStreamParser(), text, 11) == COMPONENTS
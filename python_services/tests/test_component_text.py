@@ -0,0 +1,26 @@
+from marcom_service import format_components_to_text
+
+COMPONENT = {
+    "category": "FOMO",
+    "emoji": "",
+    "hook": "Last day, {{FIRST_NAME}}",
+    "body": ["Get 50% off", "👉 Already bulleted", "✔ Checked"],
+    "cta": "Enroll now",
+}
+
+
+def test_body_lines_get_the_frontends_bullet():
+    assert format_components_to_text([COMPONENT]) == (
+        "FOMO\nLast day, {{FIRST_NAME}}\n👉 Get 50% off\n👉 Already bulleted\n✔ Checked\nCTA: Enroll now"
+    )
+
+
+def test_string_bodies_and_emojis_render_like_the_frontend():
+    text = format_components_to_text([{**COMPONENT, "emoji": "⏰", "body": "Plain body"}, "not a component", COMPONENT])
+    first, second = text.split("\n\n")
+    assert first == "⏰ FOMO\nLast day, {{FIRST_NAME}}\nPlain body\nCTA: Enroll now"
+    assert second.startswith("FOMO\n")
+
+
+def test_bullets_can_be_left_off():
+    assert "\nGet 50% off\n" in format_components_to_text([COMPONENT], bullets=False)
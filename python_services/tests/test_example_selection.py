@@ -0,0 +1,29 @@
+import marcom_service
+
+
+def _samples(n):
+    return [{"title": f"Caller {i}", "message": f"Message {i}", "cta": "Go"} for i in range(n)]
+
+
+def test_caller_examples_are_preserved_in_full():
+    samples = _samples(marcom_service.FEW_SHOT_EXAMPLES + 2)
+    assert marcom_service.select_examples("SSC", "Friendly", samples) == samples
+
+
+def test_caller_examples_are_capped_by_sample_examples_max(monkeypatch):
+    monkeypatch.setattr(marcom_service, "SAMPLE_EXAMPLES_MAX", 4)
+    samples = _samples(6)
+    assert marcom_service.select_examples("SSC", "Friendly", samples) == samples[:4]
+
+
+def test_knowledge_base_fills_only_the_free_slots():
+    samples = _samples(1)
+    examples = marcom_service.select_examples("Banking", "Friendly", samples, retrieval_query="bank exam offer")
+    assert examples[0] == samples[0]
+    assert 1 <= len(examples) <= max(marcom_service.FEW_SHOT_EXAMPLES, 1)
+
+
+def test_prompt_renders_every_caller_example():
+    samples = _samples(5)
+    prompt = marcom_service.build_system_prompt("Friendly", "English", samples, vertical="SSC")
+    assert all(f"Title: Caller {i}" in prompt for i in range(5))
@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+import pytest
+
+import marcom_service
+from llm_providers import _stub_components
+
+REQUEST = {
+    "campaignType": "push",
+    "vertical": "SSC",
+    "language": "English",
+    "tonality": "Friendly",
+    "audience": "Aspirants",
+    "lint": True,
+}
+
+
+def _campaign(components):
+    return marcom_service.CampaignResponse(
+        message=marcom_service.format_components_to_text(components),
+        components=components,
+        model="stub",
+    )
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Replaces the LLM for lint rewrites; records every prompt it receives."""
+    prompts = []
+    replies = []
+
+    async def generate(prompt):
+        prompts.append(prompt)
+        return replies.pop(0) if replies else json.dumps({"components": []})
+
+    monkeypatch.setattr(marcom_service, "_generate_off_loop", generate)
+    monkeypatch.setattr(marcom_service, "_build_full_prompt", lambda req: "PROMPT")
+    return prompts, replies
+
+
+def _lint(components, retries, **request):
+    req = marcom_service.CampaignRequest(**{**REQUEST, **request})
+    return asyncio.run(marcom_service._lint_campaign(req, "test-key", _campaign(components), retries))
+
+
+def test_prompt_compliant_components_pass_the_default_rules(upstream):
+    prompts, _ = upstream
+    components = _stub_components(7)["components"]
+    response = _lint(components, retries=2)
+    assert response.lint == {"passed": len(components), "failed": 0, "retried": 0, "repaired": 0}
+    assert all(not marcom_service._hard_errors(component["lint"]) for component in response.components)
+    assert prompts == []
+
+
+def test_emoji_free_copy_has_no_emoji_warning_by_default():
+    component = _stub_components(1)["components"][0]
+    report = marcom_service._lint_component(component, marcom_service._lint_rules(marcom_service.CampaignRequest(**REQUEST)))
+    assert not [issue for issue in report["issues"] if "emoji" in issue["message"].lower()]
+
+
+def test_blocked_phrase_and_empty_cta_fail(upstream):
+    good, bad, no_cta = _stub_components(3)["components"]
+    bad = {**bad, "hook": "Win the lottery of ranks"}
+    no_cta = {**no_cta, "cta": " "}
+    response = _lint([good, bad, no_cta], retries=0)
+    assert response.lint == {"passed": 1, "failed": 2, "retried": 0, "repaired": 0}
+    assert "lottery" in marcom_service._hard_errors(response.components[1]["lint"])[0]["message"]
+    assert "CTA missing" in marcom_service._hard_errors(response.components[2]["lint"])[0]["message"]
+
+
+def test_retry_rewrites_only_failing_components(upstream):
+    prompts, replies = upstream
+    good, bad = _stub_components(5)["components"][:2]
+    bad = {**bad, "hook": "Win the lottery of ranks"}
+    fixed = {**bad, "hook": "Top the ranks this month"}
+    replies.append(json.dumps({"components": [fixed]}))
+    response = _lint([good, bad], retries=2)
+    assert len(prompts) == 1 and "lottery" in prompts[0]
+    assert response.lint == {"passed": 2, "failed": 0, "retried": 1, "repaired": 1}
+    assert response.components[1]["hook"] == fixed["hook"]
+
+
+def test_retry_keeps_the_original_when_the_rewrite_is_no_better(upstream):
+    prompts, replies = upstream
+    bad = {**_stub_components(9)["components"][0], "hook": "Win the lottery"}
+    replies.extend([json.dumps({"components": [bad]})] * 2)
+    response = _lint([bad], retries=2)
+    assert len(prompts) == 2
+    assert response.lint == {"passed": 0, "failed": 1, "retried": 2, "repaired": 0}
+
+
+def test_explicit_rules_still_apply(upstream):
+    component = _stub_components(2)["components"][0]
+    response = _lint([component], retries=0, lintRules={"banned_words": ["enroll"]})
+    assert response.lint["failed"] == 1
+
+
+def test_lint_ignores_the_bullets_the_ui_adds(upstream):
+    component = {**_stub_components(4)["components"][0], "body": ["Line one", "Line two"], "cta": ""}
+    assert "👉 Line one" in marcom_service.format_components_to_text([component])
+    response = _lint([component], retries=0)
+    report = response.components[0]["lint"]
+    assert report["emojis_found"] == 0
+    assert "CTA missing" in marcom_service._hard_errors(report)[0]["message"]
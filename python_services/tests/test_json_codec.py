@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from json_codec import dumps, dumps_str, loads
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_round_trip_keeps_indic_text_unescaped():
+    record = {"message": "नमस्ते {{FIRST_NAME}}", "n": 3, "nested": [1.5, None, True]}
+    assert "नमस्ते" in dumps_str(record)
+    assert loads(dumps(record)) == record
+
+
+def test_integers_beyond_64_bits_fall_back_to_stdlib():
+    assert loads(dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+
+
+def test_storage_modules_import_without_fastapi():
+    # None in sys.modules makes any `import fastapi` fail.
+    script = "import sys; sys.modules['fastapi'] = None; import json_codec, log_sink, response_cache, trend_cache"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(SERVICE_DIR), os.getenv("PYTHONPATH")]))}
+    result = subprocess.run([sys.executable, "-c", script], cwd=SERVICE_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
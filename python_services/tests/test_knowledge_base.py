@@ -0,0 +1,60 @@
+import json
+import threading
+
+from knowledge_base import KnowledgeBaseIndex, canonical_vertical, normalize_vertical
+
+
+def _example(title):
+    return {"title": title, "message": f"{title} message", "cta": "Enroll"}
+
+
+def _index(tmp_path, data):
+    path = tmp_path / "kb.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return KnowledgeBaseIndex(path)
+
+
+def test_spellings_fold_into_one_deduplicated_pool(tmp_path):
+    index = _index(tmp_path, {
+        "Banking": [_example("a"), _example("b")],
+        "BANK": [_example("b"), _example("c")],
+        "Banking3": [_example("d")],
+    })
+    snapshot = index.snapshot()
+    assert [ex["title"] for ex in snapshot.pools["BANKING"]] == ["a", "b", "c", "d"]
+    for spelling in ("banking", "Bank", "बैंकिंग", "Banking 3"):
+        assert snapshot.resolve(spelling) == "BANKING"
+    assert canonical_vertical("Railway") == "RAILWAYS"
+
+
+def test_untagged_examples_do_not_become_a_general_pool(tmp_path):
+    index = _index(tmp_path, {"": [_example("x"), _example("y")], "SSC": [_example("s")]})
+    snapshot = index.snapshot()
+    assert normalize_vertical("") == ""
+    assert "GENERAL" not in snapshot.pools
+    assert snapshot.examples_for("General") == []
+    assert snapshot.examples_for("") == []
+    assert snapshot.example_count == 3  # raw data is still counted
+
+
+def test_partial_spellings_resolve_without_mutating_the_snapshot(tmp_path):
+    index = _index(tmp_path, {"Railway": [_example("r")], "SSC CGL": [_example("s")]})
+    snapshot = index.snapshot()
+    before = dict(vars(snapshot))
+    errors = []
+
+    def read():
+        try:
+            for n in range(500):
+                assert snapshot.resolve("SSC CGL Tier 1") == "SSC_CGL"
+                assert snapshot.resolve(f"unknown{n}") is None
+        except AssertionError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert vars(snapshot) == before
@@ -0,0 +1,36 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import marcom_service
+
+
+def test_small_batches_are_linted_off_the_event_loop(monkeypatch):
+    threads = []
+    real_lint_many = marcom_service.lint_many
+
+    def recording_lint_many(texts, rules):
+        threads.append(threading.get_ident())
+        return real_lint_many(texts, rules)
+
+    monkeypatch.setattr(marcom_service, "lint_many", recording_lint_many)
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        response = await marcom_service.lint_batch(marcom_service.LintBatchRequest(texts=["👉 Join http://x", "lottery"]))
+        return loop_thread, json.loads(response.body)
+
+    loop_thread, body = asyncio.run(scenario())
+    assert threads and threads[0] != loop_thread
+    assert body["count"] == 2
+    assert any("lottery" in issue["message"] for issue in body["results"][1]["issues"])
+
+
+def test_oversized_batches_are_rejected(monkeypatch):
+    monkeypatch.setattr(marcom_service, "LINT_BATCH_MAX_ITEMS", 3)
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(marcom_service.lint_batch(marcom_service.LintBatchRequest(texts=["a"] * 4)))
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from lint_engine import AUTOMATON_MIN_PHRASES, DEFAULT_RULES, PhraseMatcher, count_emojis, lint_text
+
+FILLER = [f"filler phrase {n}" for n in range(AUTOMATON_MIN_PHRASES)]
+
+
+def _naive(phrases, lowered):
+    return [index for index, phrase in enumerate(phrases) if phrase and phrase.lower() in lowered]
+
+
+@pytest.mark.parametrize("extra", [0, AUTOMATON_MIN_PHRASES])
+def test_overlapping_phrases_are_all_found(extra):
+    phrases = ["he", "she", "his", "hers", "ushers"] + FILLER[:extra]
+    matcher = PhraseMatcher(phrases)
+    assert matcher._use_automaton == (len(phrases) >= AUTOMATON_MIN_PHRASES)
+    assert matcher.find("ushers") == [0, 1, 3, 4]
+    assert matcher.find("this") == [2]
+    assert matcher.find("nothing here") == [0]
+
+
+def test_automaton_switches_on_at_the_threshold():
+    assert not PhraseMatcher(FILLER[: AUTOMATON_MIN_PHRASES - 1])._use_automaton
+    assert PhraseMatcher(FILLER[:AUTOMATON_MIN_PHRASES])._use_automaton
+
+
+def test_automaton_matches_substring_checks():
+    rng = random.Random(14)
+    alphabet = "abc "
+    phrases = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(40)]
+    phrases += ["Free Job", "", "free job"]  # mixed case, empty and duplicate entries
+    matcher = PhraseMatcher(phrases)
+    assert matcher._use_automaton
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet + "free job") for _ in range(rng.randint(0, 30)))
+        assert matcher.find(text) == _naive(phrases, text), text
+
+
+def test_blocked_phrases_are_reported_in_list_order():
+    rules = {**DEFAULT_RULES, "banned_words": FILLER + ["lottery", "free job"]}
+    report = lint_text("Free job lottery 👉 http://x", rules)
+    blocked = [issue["message"] for issue in report["issues"] if "blocked phrase" in issue["message"]]
+    assert blocked == ["Contains blocked phrase 'lottery'. Remove or rephrase.", "Contains blocked phrase 'free job'. Remove or rephrase."]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("no emoji here 123 #1 *", 0),
+        ("🔥", 1),
+        ("👨‍👩‍👧‍👦", 1),  # family ZWJ sequence
+        ("👩🏽‍💻", 1),  # skin tone inside a ZWJ sequence
+        ("🏃‍♀️", 1),  # text-default symbol joined without its own VS16
+        ("👍🏿👍🏻", 2),  # skin-tone modifiers attach to their base
+        ("🇮🇳🇺🇸", 2),  # two regional-indicator flags
+        ("🏴\U000E0067\U000E0062\U000E0065\U000E006E\U000E0067\U000E007F", 1),  # tag-sequence flag
+        ("1️⃣ #️⃣", 2),  # keycaps
+        ("❤ ©", 0),  # text-presentation symbols without VS16
+        ("❤️ ⚡", 2),
+    ],
+)
+def test_emoji_graphemes_count_once(text, expected):
+    assert count_emojis(text) == expected
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from adaptive_limit import AdaptiveLimiter
+from llm_providers import LimitedProvider, LLMProvider, ProviderError, ResilientProvider, is_overload
+from resilience import ResiliencePolicy
+
+
+class SleepyProvider(LLMProvider):
+    name = "sleepy"
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    @property
+    def model_name(self):
+        return "sleepy"
+
+    def generate(self, prompt, system=None, **options):
+        time.sleep(self.seconds)
+        return prompt
+
+
+def test_hedge_latency_excludes_limiter_queue_wait():
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    provider = ResilientProvider(
+        LimitedProvider(SleepyProvider(0.02), limiter),
+        ResiliencePolicy(hedge=False),
+        limiter=limiter,
+    )
+    limiter.acquire()  # someone else holds the only slot for a while
+    releaser = threading.Timer(0.3, limiter.release)
+    releaser.start()
+    started = time.monotonic()
+    assert provider.generate("hi") == "hi"
+    releaser.join()
+    assert time.monotonic() - started >= 0.3
+    recorded = provider.latencies.quantile(1.0)
+    assert recorded is not None and recorded < 0.2
+
+
+def test_unlimited_provider_is_timed_around_the_call():
+    text, seconds = SleepyProvider(0.01).generate_timed("x")
+    assert text == "x" and seconds >= 0.01
+
+
+class FlakySession:
+    """Stands in for requests.Session: raises the queued errors, then answers."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def post(self, url, json=None, timeout=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return type("Reply", (), {
+            "status_code": 200,
+            "text": "",
+            "json": lambda self: {"choices": [{"message": {"content": "ok"}}]},
+        })()
+
+
+def _azure(errors):
+    pytest.importorskip("requests")
+    from llm_providers import AzureOpenAIProvider, AzureOpenAISettings
+
+    provider = AzureOpenAIProvider(AzureOpenAISettings(api_key="k", endpoint="https://azure.invalid", deployment="d", api_version="v"))
+    provider.session = FlakySession(errors)
+    return provider
+
+
+def test_wrapped_azure_timeouts_count_as_overload():
+    requests = pytest.importorskip("requests")
+    for error in (requests.Timeout("read timed out"), requests.ConnectionError("reset")):
+        with pytest.raises(ProviderError) as excinfo:
+            _azure([error]).generate("hi")
+        assert isinstance(excinfo.value, TimeoutError)
+        assert is_overload(excinfo.value)
+    wrapped = ProviderError("wrapped")
+    wrapped.__cause__ = requests.Timeout("slow")
+    assert is_overload(wrapped)
+    assert not is_overload(ProviderError("bad request", 400))
+
+
+def test_resilient_provider_retries_an_azure_timeout():
+    requests = pytest.importorskip("requests")
+    azure = _azure([requests.Timeout("read timed out")])
+    provider = ResilientProvider(azure, ResiliencePolicy(hedge=False, base_delay=0.001))
+    assert provider.generate("hi") == "ok"
+    assert azure.session.calls == 2
+    assert provider.stats()["retries"] == 1 and provider.stats()["retry_wins"] == 1
+
+
+def test_limiter_backs_off_on_wrapped_timeouts():
+    requests = pytest.importorskip("requests")
+    limiter = AdaptiveLimiter(initial_limit=8, backoff=0.5)
+    provider = LimitedProvider(_azure([requests.Timeout("read timed out")] * 3), limiter)
+    for _ in range(3):
+        with pytest.raises(ProviderError):
+            provider.generate("hi")
+    assert limiter.limit == 4
+    assert limiter.stats()["decreases"] == 1
+
+
+def test_incomplete_providers_cannot_be_instantiated():
+    class NoModelName(LLMProvider):
+        def generate(self, prompt, system=None, **options):
+            return prompt
+
+    with pytest.raises(TypeError):
+        LLMProvider()
+    with pytest.raises(TypeError):
+        NoModelName()
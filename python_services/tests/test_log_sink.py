@@ -0,0 +1,51 @@
+import json
+import os
+import threading
+
+import log_sink
+from log_sink import JsonlLogSink
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_records_are_appended_as_jsonl(tmp_path):
+    sink = JsonlLogSink(tmp_path / "log.jsonl", flush_interval=0.05)
+    sink.write({"n": 1})
+    sink.write_many([{"n": 2}, {"n": 3}])
+    sink.close()
+    assert _lines(tmp_path / "log.jsonl") == [{"n": 1}, {"n": 2}, {"n": 3}]
+
+
+def test_short_writes_are_completed(tmp_path, monkeypatch):
+    real_write = os.write
+    monkeypatch.setattr(log_sink.os, "write", lambda fd, data: real_write(fd, bytes(data[:5])))
+    sink = JsonlLogSink(tmp_path / "log.jsonl", flush_interval=0.05)
+    sink.write_many([{"text": "x" * 40, "n": n} for n in range(20)])
+    sink.close()
+    assert [record["n"] for record in _lines(tmp_path / "log.jsonl")] == list(range(20))
+
+
+def test_close_leaves_a_busy_writer_alone(tmp_path):
+    entered = threading.Event()
+    release = threading.Event()
+
+    def slow_encoder(record):
+        entered.set()
+        release.wait(5)
+        return json.dumps(record).encode("utf-8")
+
+    sink = JsonlLogSink(tmp_path / "log.jsonl", flush_interval=0.01, encoder=slow_encoder)
+    sink.write({"n": 1})
+    assert entered.wait(5)
+    writer = sink._thread
+    sink.close(timeout=0.05)
+    # The writer still owns the batch and the file descriptor.
+    assert writer.is_alive() and sink._thread is writer
+    sink.write({"n": 2})
+    release.set()
+    writer.join(5)
+    assert not writer.is_alive()
+    sink.close()
+    assert _lines(tmp_path / "log.jsonl") == [{"n": 1}, {"n": 2}]
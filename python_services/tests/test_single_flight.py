@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_followers_share_the_leaders_result():
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "value"
+
+        results = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+        return results, calls, flights.stats()
+
+    results, calls, stats = asyncio.run(scenario())
+    assert results == ["value"] * 5
+    assert calls == [1]
+    assert stats == {"leaders": 1, "followers": 4, "failures": 0, "in_flight": 0}
+
+
+def test_cancelled_follower_does_not_cancel_the_shared_call():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return 42
+
+        leader = asyncio.ensure_future(flights.do("k", work))
+        follower = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        late = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        release.set()
+        return await leader, await late, flights.stats()
+
+    leader, late, stats = asyncio.run(scenario())
+    assert leader == late == 42
+    assert stats["leaders"] == 1 and stats["followers"] == 2 and stats["in_flight"] == 0
+
+
+def test_cancelled_leader_caller_leaves_the_work_running_for_followers():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.ensure_future(flights.do("k", work))
+        follower = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_leader_failure_reaches_every_waiter_and_releases_the_key():
+    async def scenario():
+        flights = SingleFlight()
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        outcomes = await asyncio.gather(*(flights.do("k", failing) for _ in range(3)), return_exceptions=True)
+        assert flights.in_flight() == 0
+
+        async def working():
+            return "recovered"
+
+        return outcomes, attempts, await flights.do("k", working), flights.stats()
+
+    outcomes, attempts, recovered, stats = asyncio.run(scenario())
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert attempts == [1]
+    assert recovered == "recovered"
+    assert stats["failures"] == 1 and stats["leaders"] == 2
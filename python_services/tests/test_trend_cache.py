@@ -0,0 +1,37 @@
+import json
+
+import trend_cache
+from trend_cache import TrendCache, etag_matches
+
+
+def _worker_cache(path):
+    return TrendCache(path, lambda: json.loads(path.read_text(encoding="utf-8")) if path.exists() else [], check_interval=0)
+
+
+def test_workers_publishing_the_same_items_write_once(tmp_path, monkeypatch):
+    path = tmp_path / "trend_cache.json"
+    writes = []
+    real_write = trend_cache.atomic_write_bytes
+    monkeypatch.setattr(trend_cache, "atomic_write_bytes", lambda *args, **kwargs: writes.append(args[0]) or real_write(*args, **kwargs))
+    monkeypatch.setattr(trend_cache.os, "fsync", lambda fd: (_ for _ in ()).throw(AssertionError("fsync on a rebuildable cache")))
+    items = [{"title": "A"}, {"title": "B"}]
+    workers = [_worker_cache(path) for _ in range(3)]
+    assert all(worker.publish(items) for worker in workers)
+    assert writes == [path]
+    assert len({worker.snapshot().etag for worker in workers}) == 1
+    assert json.loads(path.read_text(encoding="utf-8")) == items
+
+
+def test_changed_items_are_written(tmp_path):
+    path = tmp_path / "trend_cache.json"
+    first, second = _worker_cache(path), _worker_cache(path)
+    first.publish([{"title": "A"}])
+    assert second.publish([{"title": "C"}])
+    assert not second.publish([{"title": "C"}])
+    assert json.loads(path.read_text(encoding="utf-8")) == [{"title": "C"}]
+
+
+def test_etag_matching_is_weak():
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"x"')
+    assert not etag_matches(None, '"x"')
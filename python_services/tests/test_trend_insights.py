@@ -0,0 +1,41 @@
+import asyncio
+import json
+
+import marcom_service
+from trend_cache import TrendCache
+
+
+def test_cached_snapshot_is_served_without_touching_the_file(tmp_path, monkeypatch):
+    path = tmp_path / "trend_cache.json"
+    path.write_text(json.dumps([{"title": "A"}]), encoding="utf-8")
+    cache = TrendCache(path, lambda: json.loads(path.read_text(encoding="utf-8")), check_interval=0)
+    cache.refresh()
+    monkeypatch.setattr(marcom_service, "TREND_CACHE", cache)
+
+    def no_file_access(*args, **kwargs):
+        raise AssertionError("request path touched the trend file")
+
+    monkeypatch.setattr(cache, "refresh", no_file_access)
+    snapshot = asyncio.run(marcom_service._trend_snapshot())
+    assert [item["title"] for item in snapshot.items] == ["A"]
+
+
+def test_first_load_happens_off_the_event_loop(tmp_path, monkeypatch):
+    import threading
+
+    loaded_on = []
+    path = tmp_path / "trend_cache.json"
+
+    def load():
+        loaded_on.append(threading.get_ident())
+        return [{"title": "B"}]
+
+    cache = TrendCache(path, load, check_interval=0)
+    monkeypatch.setattr(marcom_service, "TREND_CACHE", cache)
+
+    async def scenario():
+        return threading.get_ident(), await marcom_service._trend_snapshot()
+
+    loop_thread, snapshot = asyncio.run(scenario())
+    assert snapshot.items == ({"title": "B"},)
+    assert loaded_on and loaded_on[0] != loop_thread
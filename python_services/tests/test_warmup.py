@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import marcom_service
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_import_does_not_preload_or_freeze_the_gc():
+    # A fresh interpreter, so nothing else in the test session has touched the module.
+    script = (
+        "import gc, marcom_service as m; "
+        "assert m.STARTUP.preloaded_pid is None and not m.STARTUP.steps, m.STARTUP.steps; "
+        "assert gc.get_freeze_count() == 0"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(SERVICE_DIR), os.getenv("PYTHONPATH")]))}
+    result = subprocess.run([sys.executable, "-c", script], cwd=SERVICE_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_worker_startup_preloads_without_freezing(monkeypatch):
+    calls = []
+    monkeypatch.setattr(marcom_service, "STARTUP", marcom_service.StartupReport())
+    monkeypatch.setattr(marcom_service, "preload", lambda freeze_gc=False: calls.append(freeze_gc) or marcom_service.STARTUP.mark_preloaded(0.0))
+    monkeypatch.setattr(marcom_service, "get_llm_client", lambda: type("Client", (), {"name": "stub"})())
+    marcom_service._warm_worker()
+    assert calls == [False]
+    assert marcom_service.STARTUP.ready
+
+
+def test_inherited_preload_is_not_repeated(monkeypatch):
+    report = marcom_service.StartupReport()
+    report.mark_preloaded(0.0)
+    monkeypatch.setattr(marcom_service, "STARTUP", report)
+    monkeypatch.setattr(marcom_service, "preload", lambda freeze_gc=False: (_ for _ in ()).throw(AssertionError("preloaded twice")))
+    monkeypatch.setattr(marcom_service, "get_llm_client", lambda: type("Client", (), {"name": "stub"})())
+    marcom_service._warm_worker()
+    assert report.ready
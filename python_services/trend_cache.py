@@ -0,0 +1,202 @@
+"""
+Resident, pre-serialized snapshot of the /trend-insights feed.
+
+The trend list is loaded once and kept in memory together with its encoded
+JSON body and a strong ETag (a hash of that body). Requests only stat the
+file, at most every `check_interval` seconds, and the body is rebuilt only
+when the file's mtime/size change and its content actually differs. Polling
+clients that send `If-None-Match` can be answered with a bodyless 304.
+Async handlers read `current()` instead, which never touches the file or the
+lock; the trend feed's background task does the checking off the loop.
+
+`publish(items)` is the write side used by the background refresher: the
+file is replaced atomically (temp file + rename), so readers in any worker
+see either the old or the new file, never a partial one. Publishes take an
+advisory lock and skip the write when the file already holds the same
+bytes, so N workers rebuilding the same items write it once.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from json_codec import dumps
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev setups only
+    fcntl = None
+
+
+def encode_json(content) -> bytes:
+    """Same bytes the app's default response class would send."""
+    return dumps(content)
+
+
+def strong_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def atomic_write_bytes(path: Path, data: bytes, fsync: bool = True) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with tmp.open("wb") as handle:
+            handle.write(data)
+            handle.flush()
+            if fsync:
+                os.fsync(handle.fileno())
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def _read_bytes(path: Path) -> Optional[bytes]:
+    try:
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
+@contextmanager
+def _publish_lock(path: Path) -> Iterator[None]:
+    """Advisory lock serialising publishes of `path` across worker processes."""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(str(path.with_name(f".{path.name}.lock")), os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _stat_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+@dataclass(frozen=True)
+class TrendSnapshot:
+    items: Tuple[dict, ...]
+    updated_at: str
+    body: bytes
+    etag: str
+    mtime_ns: int = 0
+    size: int = 0
+    checked_at: float = 0.0
+
+
+def build_snapshot(items: List[dict], updated_at: str, signature: Optional[Tuple[int, int]] = None) -> TrendSnapshot:
+    body = encode_json({"updated_at": updated_at, "items": items})
+    mtime_ns, size = signature or (0, 0)
+    return TrendSnapshot(
+        items=tuple(items),
+        updated_at=updated_at,
+        body=body,
+        etag=strong_etag(body),
+        mtime_ns=mtime_ns,
+        size=size,
+        checked_at=time.monotonic(),
+    )
+
+
+class TrendCache:
+    """`load` returns validated trend dicts (and may create the file with defaults)."""
+
+    def __init__(self, path: Path, load: Callable[[], List[dict]], check_interval: float = 2.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._load = load
+        self._lock = threading.Lock()
+        self._snapshot: Optional[TrendSnapshot] = None
+
+    def current(self) -> Optional[TrendSnapshot]:
+        """The last loaded snapshot, without checking the file; None before the first load."""
+        return self._snapshot
+
+    def snapshot(self) -> TrendSnapshot:
+        current = self._snapshot
+        if current is None or time.monotonic() - current.checked_at >= self.check_interval:
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the file if it changed. Returns True when a new body was swapped in."""
+        with self._lock:
+            current = self._snapshot
+            signature = _stat_signature(self.path)
+            if not force and current is not None and signature == (current.mtime_ns, current.size):
+                self._snapshot = replace(current, checked_at=time.monotonic())
+                return False
+            try:
+                items = self._load()
+                # The loader may have just written the file; stamp the snapshot with what is on disk now.
+                signature = _stat_signature(self.path) or signature
+                if current is not None and not force and tuple(items) == current.items:
+                    # Touched but unchanged: keep the body (and ETag), remember the new stat.
+                    mtime_ns, size = signature or (0, 0)
+                    self._snapshot = replace(current, mtime_ns=mtime_ns, size=size, checked_at=time.monotonic())
+                    return False
+                new_snapshot = build_snapshot(items, _updated_at(signature), signature)
+            except Exception as exc:
+                print(f"Trend cache reload failed: {exc}")
+                if current is None:
+                    raise
+                self._snapshot = replace(current, checked_at=time.monotonic())
+                return False
+            self._snapshot = new_snapshot
+            return True
+
+    def publish(self, items: List[dict]) -> bool:
+        """Write `items` to the file and swap them in. Returns False when nothing changed."""
+        items = list(items)
+        with self._lock:
+            current = self._snapshot
+            if current is not None and tuple(items) == current.items:
+                return False
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            data = json.dumps(items, indent=2, ensure_ascii=False).encode("utf-8")
+            with _publish_lock(self.path):
+                # Every worker rebuilds the same items; only the first one to get here writes.
+                if _read_bytes(self.path) != data:
+                    # No fsync: the file is rebuilt from its sources, and the rename alone
+                    # keeps readers from seeing a partial file.
+                    atomic_write_bytes(self.path, data, fsync=False)
+                signature = _stat_signature(self.path)
+            self._snapshot = build_snapshot(items, _updated_at(signature), signature)
+            return True
+
+
+def _updated_at(signature: Optional[Tuple[int, int]]) -> str:
+    if signature is None:
+        return datetime.utcnow().isoformat()
+    return datetime.utcfromtimestamp(signature[0] / 1e9).isoformat()
@@ -0,0 +1,242 @@
+"""
+Background refresh and push delivery for the trend feed.
+
+`TrendFeed` rebuilds the trend list from pluggable local sources every
+`refresh_interval` seconds, publishes it through the TrendCache (atomic file
+swap + in-memory snapshot), and checks the file every `check_interval`
+seconds to pick up another worker's publish. Whenever the served snapshot
+changes, subscribers (the SSE endpoint) receive a delta of added, updated
+and removed items keyed by title.
+
+The cache file is an output. A rebuild only publishes when the sources
+produced something different from the previous rebuild, so a hand edit to
+the file is served until a source changes or the process restarts, and is
+then replaced. Topics that should stay belong in a source such as
+trend_sources/; `migrate_trend_file` moves a hand-maintained cache file
+there once.
+
+A source is any zero-argument callable returning trend dicts. Sources run in
+order and the first item with a given title wins.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from trend_cache import TrendCache, TrendSnapshot, atomic_write_bytes
+
+TrendSource = Callable[[], Iterable[dict]]
+
+
+class JsonDirectorySource:
+    """Every *.json file in `directory` holding a list of trend items (or {"items": [...]})."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def __call__(self) -> List[dict]:
+        if not self.directory.is_dir():
+            return []
+        items: List[dict] = []
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as exc:
+                print(f"Skipping trend source {path.name}: {exc}")
+                continue
+            if isinstance(data, dict):
+                data = data.get("items", [])
+            items.extend(item for item in data if isinstance(item, dict))
+        return items
+
+
+def migrate_trend_file(cache_path: Path, directory: Path, defaults: Iterable[dict] = ()) -> Optional[Path]:
+    """
+    One-time move of a hand-maintained cache file into `directory` (as local.json).
+
+    Runs only while `directory` does not exist yet, so it never repeats and never
+    touches an operator's sources. Items equal to `defaults` (the curated list a
+    generated file also contains) are left out. Returns the written path, if any.
+    """
+    cache_path, directory = Path(cache_path), Path(directory)
+    if directory.exists() or not cache_path.is_file():
+        return None
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        print(f"Not migrating {cache_path.name}: {exc}")
+        return None
+    if isinstance(data, dict):
+        data = data.get("items", [])
+    known = list(defaults)
+    items = [item for item in data if isinstance(item, dict) and item not in known]
+    if not items:
+        return None
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / "local.json"
+    atomic_write_bytes(target, json.dumps(items, ensure_ascii=False, indent=2).encode("utf-8"))
+    print(f"Migrated {len(items)} trend item(s) from {cache_path.name} to {target}")
+    return target
+
+
+def diff_trends(old: Iterable[dict], new: Iterable[dict]) -> dict:
+    old_by_title = {item.get("title"): item for item in old}
+    new_by_title = {item.get("title"): item for item in new}
+    return {
+        "added": [item for title, item in new_by_title.items() if title not in old_by_title],
+        "updated": [item for title, item in new_by_title.items() if title in old_by_title and old_by_title[title] != item],
+        "removed": [title for title in old_by_title if title not in new_by_title],
+    }
+
+
+class TrendFeed:
+    def __init__(
+        self,
+        cache: TrendCache,
+        validate: Callable[[dict], dict],
+        refresh_interval: float = 300.0,
+        check_interval: float = 2.0,
+        subscriber_queue_size: int = 32,
+    ):
+        self.cache = cache
+        self.validate = validate
+        self.refresh_interval = refresh_interval
+        self.check_interval = check_interval
+        self.subscriber_queue_size = subscriber_queue_size
+        self._sources: Dict[str, TrendSource] = {}
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._last_collected: Optional[List[dict]] = None
+        self.stats = {"rebuilds": 0, "published": 0, "deltas": 0, "source_errors": 0}
+
+    # --- sources ---
+
+    def add_source(self, name: str, source: TrendSource) -> None:
+        self._sources[name] = source
+
+    def source_names(self) -> List[str]:
+        return list(self._sources)
+
+    def collect(self) -> List[dict]:
+        items: List[dict] = []
+        seen: Set[str] = set()
+        for name, source in self._sources.items():
+            try:
+                produced = list(source())
+            except Exception as exc:
+                self.stats["source_errors"] += 1
+                print(f"Trend source '{name}' failed: {exc}")
+                continue
+            for raw in produced:
+                try:
+                    item = self.validate(raw)
+                except Exception as exc:
+                    reason = str(exc).splitlines()[0] if str(exc) else type(exc).__name__
+                    print(f"Trend source '{name}' produced an invalid item: {reason}")
+                    continue
+                if item["title"] in seen:
+                    continue
+                seen.add(item["title"])
+                items.append(item)
+        return items
+
+    def rebuild(self) -> bool:
+        """Collect from every source and publish if they changed. Returns True when the feed changed."""
+        self.stats["rebuilds"] += 1
+        if not self._sources:
+            return False
+        items = self.collect()
+        if not items:
+            # Every source came back empty or broken: keep serving what we have.
+            return False
+        if items == self._last_collected:
+            # Nothing upstream moved; leave the file (and any edit to it) alone.
+            return False
+        self._last_collected = items
+        changed = self.cache.publish(items)
+        if changed:
+            self.stats["published"] += 1
+        return changed
+
+    # --- subscribers ---
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.subscriber_queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _broadcast(self, event: str, data: dict) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and have it resync from a full snapshot.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("snapshot", snapshot_event(self.cache.current())))
+
+    # --- lifecycle ---
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        last = await loop.run_in_executor(None, self.cache.snapshot)
+        next_rebuild = time.monotonic() + self.refresh_interval
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                if time.monotonic() >= next_rebuild:
+                    next_rebuild = time.monotonic() + self.refresh_interval
+                    await loop.run_in_executor(None, self.rebuild)
+                else:
+                    await loop.run_in_executor(None, self.cache.refresh)
+                current = self.cache.current()
+                if current.etag != last.etag:
+                    self.stats["deltas"] += 1
+                    self._broadcast("delta", delta_event(last, current))
+                    last = current
+            except Exception as exc:
+                print(f"Trend refresh failed: {exc}")
+
+
+def snapshot_event(snapshot: TrendSnapshot) -> dict:
+    return {"updated_at": snapshot.updated_at, "etag": snapshot.etag, "items": list(snapshot.items)}
+
+
+def delta_event(old: TrendSnapshot, new: TrendSnapshot) -> dict:
+    return {"updated_at": new.updated_at, "etag": new.etag, **diff_trends(old.items, new.items)}
+
+
+def enabled_sources(spec: str, available: Dict[str, TrendSource]) -> List[Tuple[str, TrendSource]]:
+    """Resolve a comma-separated TREND_SOURCES value against the known sources."""
+    selected = []
+    for name in (part.strip() for part in spec.split(",")):
+        if not name:
+            continue
+        if name not in available:
+            print(f"Unknown trend source '{name}' (known: {', '.join(available)})")
+            continue
+        selected.append((name, available[name]))
+    return selected
@@ -0,0 +1,84 @@
+"""
+Startup bookkeeping: timed preload steps and a readiness flag.
+
+The service builds its read-only state (heavy imports, knowledge-base
+snapshot, trend feed, event calendar) from an explicit hook, never on import.
+Under a server that imports the app once and then forks workers (gunicorn
+with gunicorn.conf.py), the master does it once and the workers share the
+pages copy-on-write; otherwise each worker does it on startup. Work that
+must not cross a fork (network clients, process pools) is left to each
+worker's own warm-up.
+
+`StartupReport` times every step, keeps failures instead of raising, and
+records which process did the preload so /ready can show whether a worker
+inherited it.
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+class StartupReport:
+    def __init__(self) -> None:
+        self.steps: List[Dict[str, object]] = []
+        self.preloaded_pid: Optional[int] = None
+        self.preload_seconds = 0.0
+        self.warmed_pid: Optional[int] = None
+        self.warm_seconds = 0.0
+        self._ready = threading.Event()
+
+    @contextmanager
+    def step(self, name: str, phase: str = "preload") -> Iterator[Dict[str, object]]:
+        """Time a step; the yielded dict takes extra details. Exceptions are recorded, not raised."""
+        entry: Dict[str, object] = {"name": name, "phase": phase, "pid": os.getpid(), "ok": True}
+        started = time.perf_counter()
+        try:
+            yield entry
+        except Exception as exc:
+            entry["ok"] = False
+            entry["error"] = f"{type(exc).__name__}: {exc}"
+            print(f"Startup step '{name}' failed: {entry['error']}")
+        finally:
+            entry["seconds"] = round(time.perf_counter() - started, 4)
+            self.steps.append(entry)
+
+    def import_module(self, module: str, phase: str = "preload") -> None:
+        with self.step(f"import {module}", phase) as entry:
+            if module in sys.modules:
+                entry["cached"] = True
+                return
+            importlib.import_module(module)
+
+    def mark_preloaded(self, seconds: float) -> None:
+        self.preloaded_pid = os.getpid()
+        self.preload_seconds = round(seconds, 4)
+
+    def mark_ready(self, seconds: float) -> None:
+        self.warmed_pid = os.getpid()
+        self.warm_seconds = round(seconds, 4)
+        self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        # A forked worker inherits a set flag from the parent; it is only ready once it warmed itself.
+        return self._ready.is_set() and self.warmed_pid == os.getpid()
+
+    def to_dict(self) -> dict:
+        pid = os.getpid()
+        return {
+            "ready": self.ready,
+            "pid": pid,
+            "preloaded_pid": self.preloaded_pid,
+            "inherited_preload": self.preloaded_pid is not None and self.preloaded_pid != pid,
+            "preload_seconds": self.preload_seconds,
+            "warm_seconds": self.warm_seconds if self.ready else None,
+            "failed": [entry["name"] for entry in self.steps if not entry["ok"]],
+            "steps": list(self.steps),
+        }
@@ -10,7 +10,11 @@ import re
 from pathlib import Path
 from collections import defaultdict
 from datetime import datetime
-import requests
+import sys
+
+# Shared LLM providers live with the service (LLM_PROVIDER=azure|gemini|stub)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python_services"))
+from llm_providers import AzureOpenAISettings, provider_from_env
 
 # Azure OpenAI Configuration
 AZURE_OPENAI_API_KEY = "YOUR_AZURE_OPENAI_API_KEY"
@@ -18,9 +22,17 @@ AZURE_OPENAI_ENDPOINT = "https://adda-mfuvs7bm-eastus.cognitiveservices.azure.co
 AZURE_OPENAI_API_VERSION = "2025-04-01-preview"
 AZURE_OPENAI_DEPLOYMENT_NAME = "gpt-5-mini"
 
+AZURE_DEFAULTS = AzureOpenAISettings(
+    api_key=AZURE_OPENAI_API_KEY,
+    endpoint=AZURE_OPENAI_ENDPOINT,
+    deployment=AZURE_OPENAI_DEPLOYMENT_NAME,
+    api_version=AZURE_OPENAI_API_VERSION,
+)
+
 class CampaignAnalyzer:
-    def __init__(self, base_dir):
+    def __init__(self, base_dir, llm=None):
         self.base_dir = Path(base_dir)
+        self.llm = llm or provider_from_env(default="azure", schema="push_campaign", azure_defaults=AZURE_DEFAULTS)
         self.campaigns = []
         self.revenue_data = []
         self.patterns = defaultdict(list)
@@ -437,36 +449,11 @@ Return JSON:
             if 'top_product' in context_data:
                 prompt += f"Top Product: {context_data['top_product']}\n"
         
-        url = f"{AZURE_OPENAI_ENDPOINT}/openai/deployments/{AZURE_OPENAI_DEPLOYMENT_NAME}/chat/completions?api-version={AZURE_OPENAI_API_VERSION}"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "api-key": AZURE_OPENAI_API_KEY
-        }
-        
-        payload = {
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are an expert marketing copywriter for Indian exam preparation platforms. Always return valid JSON."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.7,
-            "max_tokens": 500,
-            "top_p": 0.95
-        }
+        system = "You are an expert marketing copywriter for Indian exam preparation platforms. Always return valid JSON."
         
         try:
             print(f"\n🤖 Training GPT-5-mini for {vertical}...")
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            
-            result = response.json()
-            content = result['choices'][0]['message']['content']
+            content = self.llm.generate(prompt, system=system, temperature=0.7, max_tokens=500, top_p=0.95)
             
             # Parse JSON response
             generated = json.loads(content)
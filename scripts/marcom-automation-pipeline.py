@@ -7,10 +7,17 @@ import pandas as pd
 import json
 import os
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import re
-import requests
+import sys
+
+# Shared LLM providers (LLM_PROVIDER=azure|gemini|stub) and the event calendar live with the service
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python_services"))
+from events_calendar import CalendarEvent, EventCalendar
+from llm_providers import AzureOpenAISettings, ResilientProvider, provider_from_env
 
 # Azure OpenAI Configuration
 AZURE_OPENAI_API_KEY = "YOUR_AZURE_OPENAI_API_KEY"
@@ -18,9 +25,63 @@ AZURE_OPENAI_ENDPOINT = "https://adda-mfuvs7bm-eastus.cognitiveservices.azure.co
 AZURE_OPENAI_API_VERSION = "2025-04-01-preview"
 AZURE_OPENAI_DEPLOYMENT_NAME = "gpt-5-mini"
 
+AZURE_DEFAULTS = AzureOpenAISettings(
+    api_key=AZURE_OPENAI_API_KEY,
+    endpoint=AZURE_OPENAI_ENDPOINT,
+    deployment=AZURE_OPENAI_DEPLOYMENT_NAME,
+    api_version=AZURE_OPENAI_API_VERSION,
+)
+
+# Campaigns are requested from this many threads; the provider's adaptive limiter
+# (LLM_LIMIT_* env vars) decides how many calls actually run at once.
+PIPELINE_GENERATION_WORKERS = int(os.getenv("PIPELINE_GENERATION_WORKERS", "8"))
+
+# Indian exam calendar & festivals (2025-2026)
+PIPELINE_EVENTS = [
+    {'date': '2025-11-14', 'name': "Children's Day", 'tags': ['festive', 'student']},
+    {'date': '2025-11-15', 'name': "Jharkhand Foundation Day", 'tags': ['state', 'regional']},
+    {'date': '2025-12-01', 'name': "World AIDS Day", 'tags': ['awareness']},
+    {'date': '2025-12-25', 'name': "Christmas", 'tags': ['festive', 'holiday']},
+    {'date': '2025-12-31', 'name': "New Year Eve", 'tags': ['festive', 'sale']},
+    {'date': '2026-01-01', 'name': "New Year", 'tags': ['festive', 'new_start']},
+    {'date': '2026-01-15', 'name': "Makar Sankranti", 'tags': ['festive']},
+    {'date': '2026-01-26', 'name': "Republic Day", 'tags': ['national', 'patriotic']},
+    {'date': '2026-02-14', 'name': "Valentine's Day", 'tags': ['festive']},
+    {'date': '2026-03-08', 'name': "International Women's Day", 'tags': ['special', 'women']},
+    {'date': '2026-03-14', 'name': "Holi", 'tags': ['festive', 'colorful']},
+    {'date': '2026-04-14', 'name': "Ambedkar Jayanti", 'tags': ['national']},
+    {'date': '2026-05-01', 'name': "Labour Day", 'tags': ['national']},
+    {'date': '2026-08-15', 'name': "Independence Day", 'tags': ['national', 'patriotic']},
+    {'date': '2026-08-26', 'name': "Janmashtami", 'tags': ['festive']},
+    {'date': '2026-09-05', 'name': "Teachers' Day", 'tags': ['education', 'teachers']},
+    {'date': '2026-10-02', 'name': "Gandhi Jayanti", 'tags': ['national']},
+    {'date': '2026-10-24', 'name': "Dussehra", 'tags': ['festive']},
+    {'date': '2026-11-13', 'name': "Diwali", 'tags': ['festive', 'sale', 'biggest']},
+]
+
+# Exam seasons
+PIPELINE_EXAM_EVENTS = [
+    {'date': '2025-12-01', 'name': "SSC CGL Exam Season", 'tags': ['exam', 'ssc']},
+    {'date': '2026-01-01', 'name': "Banking Exam Season", 'tags': ['exam', 'banking']},
+    {'date': '2026-02-01', 'name': "CTET Exam Season", 'tags': ['exam', 'teaching']},
+    {'date': '2026-03-01', 'name': "Railway Exam Season", 'tags': ['exam', 'railway']},
+    {'date': '2026-04-01', 'name': "State PSC Season", 'tags': ['exam', 'state']},
+]
+
+
+@lru_cache(maxsize=1)
+def pipeline_calendar():
+    """The pipeline's events in the same date-indexed calendar the service uses."""
+    return EventCalendar(
+        CalendarEvent(title=event['name'], date=date.fromisoformat(event['date']), category=event['tags'][0], tags=tuple(event['tags']))
+        for event in PIPELINE_EVENTS + PIPELINE_EXAM_EVENTS
+    )
+
+
 class MarComAutomationPipeline:
-    def __init__(self, base_dir):
+    def __init__(self, base_dir, llm=None):
         self.base_dir = Path(base_dir)
+        self.llm = llm or provider_from_env(default="azure", schema="push_campaign", azure_defaults=AZURE_DEFAULTS)
         self.historical_data = []
         self.patterns_by_vertical = {}
         self.upcoming_events = []
@@ -197,53 +258,18 @@ class MarComAutomationPipeline:
         """Detect upcoming events and holidays"""
         print("\n📅 Detecting Upcoming Events...")
         
-        today = datetime.now()
-        
-        # Indian exam calendar & festivals (2025-2026)
-        events = [
-            {'date': '2025-11-14', 'name': "Children's Day", 'tags': ['festive', 'student']},
-            {'date': '2025-11-15', 'name': "Jharkhand Foundation Day", 'tags': ['state', 'regional']},
-            {'date': '2025-12-01', 'name': "World AIDS Day", 'tags': ['awareness']},
-            {'date': '2025-12-25', 'name': "Christmas", 'tags': ['festive', 'holiday']},
-            {'date': '2025-12-31', 'name': "New Year Eve", 'tags': ['festive', 'sale']},
-            {'date': '2026-01-01', 'name': "New Year", 'tags': ['festive', 'new_start']},
-            {'date': '2026-01-15', 'name': "Makar Sankranti", 'tags': ['festive']},
-            {'date': '2026-01-26', 'name': "Republic Day", 'tags': ['national', 'patriotic']},
-            {'date': '2026-02-14', 'name': "Valentine's Day", 'tags': ['festive']},
-            {'date': '2026-03-08', 'name': "International Women's Day", 'tags': ['special', 'women']},
-            {'date': '2026-03-14', 'name': "Holi", 'tags': ['festive', 'colorful']},
-            {'date': '2026-04-14', 'name': "Ambedkar Jayanti", 'tags': ['national']},
-            {'date': '2026-05-01', 'name': "Labour Day", 'tags': ['national']},
-            {'date': '2026-08-15', 'name': "Independence Day", 'tags': ['national', 'patriotic']},
-            {'date': '2026-08-26', 'name': "Janmashtami", 'tags': ['festive']},
-            {'date': '2026-09-05', 'name': "Teachers' Day", 'tags': ['education', 'teachers']},
-            {'date': '2026-10-02', 'name': "Gandhi Jayanti", 'tags': ['national']},
-            {'date': '2026-10-24', 'name': "Dussehra", 'tags': ['festive']},
-            {'date': '2026-11-13', 'name': "Diwali", 'tags': ['festive', 'sale', 'biggest']},
-        ]
-        
-        # Exam seasons
-        exam_events = [
-            {'date': '2025-12-01', 'name': "SSC CGL Exam Season", 'tags': ['exam', 'ssc']},
-            {'date': '2026-01-01', 'name': "Banking Exam Season", 'tags': ['exam', 'banking']},
-            {'date': '2026-02-01', 'name': "CTET Exam Season", 'tags': ['exam', 'teaching']},
-            {'date': '2026-03-01', 'name': "Railway Exam Season", 'tags': ['exam', 'railway']},
-            {'date': '2026-04-01', 'name': "State PSC Season", 'tags': ['exam', 'state']},
-        ]
-        
-        events.extend(exam_events)
-        
-        # Filter upcoming events (next 45 days)
-        for event in events:
-            event_date = datetime.strptime(event['date'], '%Y-%m-%d')
-            days_until = (event_date - today).days
-            
-            if 0 <= days_until <= 45:
-                event['days_until'] = days_until
-                event['urgency'] = 'high' if days_until <= 7 else 'medium' if days_until <= 21 else 'low'
-                self.upcoming_events.append(event)
-        
-        self.upcoming_events.sort(key=lambda x: x['days_until'])
+        today = datetime.now().date()
+        
+        # Filter upcoming events (next 45 days) with a range query on the shared calendar index
+        for event in pipeline_calendar().query(today, today + timedelta(days=45)):
+            days_until = event.days_until(today)
+            self.upcoming_events.append({
+                'date': event.date.isoformat(),
+                'name': event.title,
+                'tags': list(event.tags),
+                'days_until': days_until,
+                'urgency': 'high' if days_until <= 7 else 'medium' if days_until <= 21 else 'low',
+            })
         
         print(f"  🎯 Found {len(self.upcoming_events)} upcoming events")
         for event in self.upcoming_events[:5]:
@@ -325,29 +351,10 @@ Return ONLY valid JSON:
 }
 """
         
-        url = f"{AZURE_OPENAI_ENDPOINT}/openai/deployments/{AZURE_OPENAI_DEPLOYMENT_NAME}/chat/completions?api-version={AZURE_OPENAI_API_VERSION}"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "api-key": AZURE_OPENAI_API_KEY
-        }
-        
-        payload = {
-            "messages": [
-                {"role": "system", "content": "You are an expert marketing copywriter for Indian exam preparation platforms. Always return valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.8,
-            "max_tokens": 800,
-            "top_p": 0.95
-        }
+        system = "You are an expert marketing copywriter for Indian exam preparation platforms. Always return valid JSON."
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
-            response.raise_for_status()
-            
-            result = response.json()
-            content = result['choices'][0]['message']['content']
+            content = self.llm.generate(prompt, system=system, temperature=0.8, max_tokens=800, top_p=0.95, timeout=30)
             
             # Extract JSON from markdown code blocks if present
             if '```json' in content:
@@ -394,15 +401,20 @@ Return ONLY valid JSON:
             reverse=True
         )[:10]  # Top 10 verticals
         
-        for vertical, pattern in top_verticals:
-            print(f"\n  📝 {vertical} ({pattern['total_campaigns']} historical campaigns)")
-            
-            # Generate for next 3 most urgent events
-            for event in self.upcoming_events[:3]:
-                if event['urgency'] in ['high', 'medium']:
+        # Next 3 most urgent events per vertical; calls run concurrently, results print in order
+        urgent_events = [event for event in self.upcoming_events[:3] if event['urgency'] in ['high', 'medium']]
+        with ThreadPoolExecutor(max_workers=PIPELINE_GENERATION_WORKERS) as pool:
+            futures = [
+                (vertical, pattern, [(event, pool.submit(self.generate_campaign_with_ai, vertical, event)) for event in urgent_events])
+                for vertical, pattern in top_verticals
+            ]
+            for vertical, pattern, jobs in futures:
+                print(f"\n  📝 {vertical} ({pattern['total_campaigns']} historical campaigns)")
+                
+                for event, future in jobs:
                     print(f"    🎯 Event: {event['name']} (in {event['days_until']} days)")
                     
-                    campaign = self.generate_campaign_with_ai(vertical, event)
+                    campaign = future.result()
                     
                     if campaign:
                         self.generated_campaigns.append(campaign)
@@ -411,6 +423,15 @@ Return ONLY valid JSON:
                         print(f"       Code: {campaign.get('promo_code', 'N/A')}")
                         print(f"       Discount: {campaign.get('discount', 'N/A')}")
         
+        if getattr(self.llm, 'limiter', None) is not None:
+            limiter = self.llm.limiter.stats()
+            print(f"\n  ⚙️ LLM concurrency limit {limiter['limit']} (queued {limiter['queued']}, "
+                  f"cut {limiter['decreases']}x, shed {limiter['rejected'] + limiter['timed_out']})")
+        if isinstance(self.llm, ResilientProvider):
+            upstream = self.llm.stats()
+            print(f"  ⚙️ LLM retries {upstream['retries']} (won {upstream['retry_wins']}), "
+                  f"hedges {upstream['hedges']} (won {upstream['hedge_wins']})")
+        
         # Step 5: Save output
         output_dir = self.base_dir / 'sheet-spark-63' / 'marcom-output'
         output_dir.mkdir(exist_ok=True)